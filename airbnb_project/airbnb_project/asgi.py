@@ -11,6 +11,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from .tracing import configure_tracing
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'airbnb_project.settings')
 
 application = get_asgi_application()
+configure_tracing()
@@ -1,6 +1,10 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from kombu import Queue
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_init, worker_process_shutdown
+
+from . import tracing
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'airbnb_project.settings')
@@ -13,3 +17,40 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
+
+# The crawls and the policy evaluations run on their own queues, consumed by their own workers, so that a long
+# crawl doesn't hold the evaluations back and the other way round. The short tasks stay on the default queue.
+app.conf.task_default_queue = 'celery'
+app.conf.task_queues = (
+    Queue('celery'),
+    Queue('harvest'),
+    Queue('policy'),
+)
+app.conf.task_routes = {
+    'listings.tasks.run_harvest_task': {'queue': 'harvest'},
+    'listings.tasks.run_dead_letters_task': {'queue': 'harvest'},
+    'policies.tasks.evaluate_policies_task': {'queue': 'policy'},
+}
+
+# Propagate the trace of the caller to the tasks
+before_task_publish.connect(tracing.before_task_publish)
+task_prerun.connect(tracing.task_prerun)
+task_postrun.connect(tracing.task_postrun)
+
+
+@worker_init.connect
+def configure_worker_tracing(**kwargs):
+    """
+    Install the tracer provider of the worker, inherited by the prefork children.
+    """
+    tracing.configure_tracing()
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    """
+    Drop the live metrics of a prefork child that exits, in Prometheus multiprocess mode.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,76 @@
+"""
+Connection settings of the Postgres database, by connection mode and by type of process.
+
+Without reuse, every web request, Celery task and crawl opens a new Postgres connection and closes it when done,
+paying the connection setup (TCP, TLS, authentication, backend fork) each time, and parallel workers can exhaust
+`max_connections`. `DB_CONNECTION_MODE` selects how the connections are reused:
+
+- 'pool' (default): a psycopg pool in each process, sized for its `DB_PROCESS_TYPE`. The connections are
+  returned to the pool at the end of a request or a task, and checked before they are handed out. The pool
+  is opened by the first query, so every Celery prefork child opens its own.
+- 'persistent': a connection per thread, kept for `DB_CONN_MAX_AGE` seconds and checked before it is reused.
+- 'pgbouncer': persistent connections to a PgBouncer in transaction pooling mode, which pools the server
+  connections of all the processes. Server-side cursors are disabled, as they don't survive a transaction there.
+- 'none': a connection per request or task.
+"""
+import os
+
+CONNECTION_MODES = ('pool', 'persistent', 'pgbouncer', 'none')
+
+# Connections of the pool of a process, by DB_PROCESS_TYPE
+POOL_SIZES = {
+    # Threads of the web server
+    'web': {'min_size': 2, 'max_size': 10},
+    # A Celery prefork child runs one task at a time
+    'celery': {'min_size': 1, 'max_size': 2},
+    # A crawl writes from the reactor thread, its parsing offload threads may query too
+    'harvest': {'min_size': 1, 'max_size': 4},
+}
+
+
+def database_connection_settings(mode: str = None, process_type: str = None) -> dict:
+    """
+    Get the connection settings of the `DATABASES` entry of the Postgres database.
+
+    Args:
+        mode (str, optional): The connection mode, one of CONNECTION_MODES, defaults to `DB_CONNECTION_MODE`.
+        process_type (str, optional): 'web', 'celery' or 'harvest', defaults to `DB_PROCESS_TYPE`. Sizes the pool,
+            `DB_POOL_MIN_SIZE` and `DB_POOL_MAX_SIZE` override its sizes.
+
+    Returns:
+        dict: `CONN_MAX_AGE`, `CONN_HEALTH_CHECKS`, `DISABLE_SERVER_SIDE_CURSORS` and `OPTIONS`.
+
+    Raises:
+        ValueError: If the mode or the process type is unknown.
+    """
+    mode = mode or os.environ.get('DB_CONNECTION_MODE', 'pool')
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f"Invalid DB_CONNECTION_MODE: {mode}, expected one of {', '.join(CONNECTION_MODES)}")
+    process_type = process_type or os.environ.get('DB_PROCESS_TYPE', 'web')
+    if process_type not in POOL_SIZES:
+        raise ValueError(f"Invalid DB_PROCESS_TYPE: {process_type}, expected one of {', '.join(POOL_SIZES)}")
+
+    conn_max_age = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+    connection_settings = {
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'DISABLE_SERVER_SIDE_CURSORS': mode == 'pgbouncer',
+        'OPTIONS': {},
+    }
+    if mode in ('persistent', 'pgbouncer'):
+        connection_settings.update(CONN_MAX_AGE=conn_max_age, CONN_HEALTH_CHECKS=True)
+    elif mode == 'pool':
+        sizes = POOL_SIZES[process_type]
+        # Check a connection before handing it out, so that a restart of Postgres isn't seen by the queries
+        connection_settings['CONN_HEALTH_CHECKS'] = True
+        connection_settings['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', sizes['min_size'])),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', sizes['max_size'])),
+            # Seconds to wait for a free connection before failing
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            # Close the connections idle for longer, and all of them after max_lifetime
+            'max_idle': 300,
+            'max_lifetime': 1800,
+        }
+    return connection_settings
+
@@ -0,0 +1,78 @@
+"""
+Prometheus metrics of the harvester, the listing writes and the policy evaluation, and their exporters.
+
+In a single process, the metrics are kept in memory and served by `metrics_view`. Under gunicorn or the
+Celery prefork pool, set `PROMETHEUS_MULTIPROC_DIR` to a directory shared by the processes, and emptied
+before they start: every process then writes its metrics there and `metrics_view` aggregates them.
+A crawl or an evaluation running where `/metrics` isn't scraped exports its metrics with `export_metrics`.
+"""
+import logging
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess, push_to_gateway, write_to_textfile)
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HARVEST_REQUESTS = Counter(
+    'harvest_requests_total', "Responses received by the harvester, by endpoint type and status",
+    ['endpoint', 'status'])
+HARVEST_DOWNLOAD_LATENCY = Histogram(
+    'harvest_download_latency_seconds', "Download latency of the harvester requests, by endpoint type",
+    ['endpoint'], buckets=LATENCY_BUCKETS)
+HARVEST_ITEMS = Counter(
+    'harvest_items_total', "Listings scraped or dropped by the harvester", ['outcome'])
+DB_BATCH_WRITE_LATENCY = Histogram(
+    'db_batch_write_seconds', "Latency of the batch writes to the database, by writer",
+    ['writer'], buckets=LATENCY_BUCKETS)
+BUSINESS_LICENCE_LATENCY = Histogram(
+    'business_licence_request_seconds', "Latency of the Opendata business licence lookups, retries included",
+    ['outcome'], buckets=LATENCY_BUCKETS)
+LICENCE_STATUS_CACHE_LOOKUPS = Counter(
+    'licence_status_cache_lookups_total', "Lookups of the licence status cache, by result", ['result'])
+POLICY_EVALUATIONS = Counter(
+    'policy_evaluations_total', "Listings evaluated against the policies, by outcome", ['outcome'])
+
+
+def get_registry():
+    """
+    Get the registry of the metrics to expose, aggregating the metrics of all the processes in multiprocess mode.
+
+    Returns:
+        CollectorRegistry: The registry.
+    """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """
+    Django view exposing the metrics in the Prometheus text format.
+    """
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def export_metrics(job: str) -> None:
+    """
+    Push the metrics to the Pushgateway of `METRICS_PUSHGATEWAY_URL`, or write them to the node exporter
+    textfile `METRICS_TEXTFILE_PATH`. Nothing is exported when neither is set. Errors are logged, not raised,
+    so that they don't fail the task.
+
+    Args:
+        job (str): The job the metrics are pushed as, e.g. 'harvester'.
+    """
+    pushgateway_url = os.environ.get('METRICS_PUSHGATEWAY_URL', '')
+    textfile_path = os.environ.get('METRICS_TEXTFILE_PATH', '')
+    try:
+        if pushgateway_url:
+            push_to_gateway(pushgateway_url, job=job, registry=get_registry())
+        elif textfile_path:
+            write_to_textfile(textfile_path, get_registry())
+    except Exception as e:
+        logger.error(f"Failed to export the {job} metrics: {e}")
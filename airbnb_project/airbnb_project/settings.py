@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+from celery.schedules import crontab
+from .database import database_connection_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -86,8 +88,22 @@ DATABASES = {
         'PASSWORD': ENV_VARIABLES['POSTGRES_PASSWORD'],
         'HOST': ENV_VARIABLES['POSTGRES_URL'],
         'PORT': ENV_VARIABLES['POSTGRES_HOST_PORT'],
+        # Connection pool or persistent connections, by DB_CONNECTION_MODE and DB_PROCESS_TYPE, see database.py
+        **database_connection_settings(),
     }
 }
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Shared by the web app and every Celery worker
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/1')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -132,3 +148,63 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CELERY_BROKER_URL = 'redis://redis:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+# The tasks run for minutes, so that a worker process reserves one at a time. The queues and the routes of the
+# tasks are in celery.py, the concurrency of the harvest and policy workers in docker-compose.yml
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(os.environ.get('CELERY_WORKER_PREFETCH_MULTIPLIER', 1))
+# Periodic tasks, sent by `celery -A airbnb_project beat`
+CELERY_BEAT_SCHEDULE = {
+    'harvest-listings': {
+        'task': 'listings.tasks.start_harvest_task',
+        'schedule': crontab(hour=0, minute=0),
+    },
+    'retry-dead-letters': {
+        'task': 'listings.tasks.run_dead_letters_task',
+        'schedule': crontab(hour=12, minute=0),
+    },
+}
+
+# Whether a harvest run which succeeded enqueues the policy evaluation of the listings it scraped
+HARVEST_EVALUATE_POLICIES = True
+
+# Policy evaluation settings
+# Number of listings fetched from the database per round trip
+POLICY_EVALUATION_CHUNK_SIZE = 500
+# Number of policy results written to the database per batch
+POLICY_EVALUATION_BATCH_SIZE = 200
+
+# Licence status cache in front of the Opendata business licences API
+LICENCE_STATUS_CACHE = {
+    # Django cache used as the shared tier, `None` keeps the cache in process only
+    'ALIAS': 'default',
+    # Number of licence numbers kept in each process
+    'LOCAL_MAX_SIZE': 10000,
+    # Seconds to keep a status found in Opendata
+    'POSITIVE_TTL': 24 * 60 * 60,
+    # Seconds to keep "No results found", so newly issued licences are picked up sooner
+    'NEGATIVE_TTL': 60 * 60,
+}
+
+# Single-flight lock of the harvest runs, so that a single harvest runs at a time
+HARVEST_LOCK = {
+    # Django cache holding the lock, shared by the web app and every Celery worker
+    'ALIAS': 'default',
+    # Seconds the lock is held at most, in case its worker dies: longer than the time limit of run_harvest_task
+    'TIMEOUT': 35 * 60,
+}
+
+# HTTP transport of the Opendata business licences API client
+BUSINESS_LICENCE_TRANSPORT = {
+    # Connections kept open to Opendata, raise together with the evaluation concurrency
+    'POOL_CONNECTIONS': 10,
+    'POOL_MAXSIZE': 10,
+    # Seconds to connect and to wait for a response
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    # Retries of connection errors, timeouts, 429 and 5xx with jittered exponential backoff
+    'MAX_RETRIES': 4,
+    'BACKOFF_BASE': 0.5,
+    'BACKOFF_MAX': 30,
+    # Client-side rate limit per process
+    'RATE_LIMIT_PER_SECOND': 5,
+    'RATE_LIMIT_BURST': 10,
+}
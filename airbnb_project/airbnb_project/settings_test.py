@@ -13,4 +13,11 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from .settings import *
 
 # Ensure this setting to indicate it's a test environment
-DEBUG = False  # Set to True or False as per your testing needs
\ No newline at end of file
+DEBUG = False  # Set to True or False as per your testing needs
+
+# Keep the tests independent of a running Redis server
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+OpenTelemetry tracing of a harvest, from the trigger view through Celery, the spider and the pipelines to the SQL.
+
+Tracing is off unless `TRACING_EXPORTER` is 'console' or 'otlp', in which case the spans of a sampled trace are
+exported to the console or to the OTLP/HTTP collector of `OTEL_EXPORTER_OTLP_ENDPOINT` (default
+`http://localhost:4318`). `TRACING_SAMPLE_RATIO` (default 0.1) of the traces started by a request or a task are
+sampled, their children follow the decision of their parent. Off, or in a trace not sampled, the spans are
+no-ops, so tracing can be left on in production at a low ratio.
+"""
+import os
+import time
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+tracer = trace.get_tracer('airbnb_project')
+
+EXPORTERS = ('none', 'console', 'otlp')
+
+_provider = None
+
+
+def configure_tracing(exporter: str = None, sample_ratio: float = None, span_exporter=None) -> bool:
+    """
+    Install the tracer provider of the process, once.
+
+    Args:
+        exporter (str, optional): 'none', 'console' or 'otlp', defaults to `TRACING_EXPORTER`.
+        sample_ratio (float, optional): Ratio of the traces sampled, defaults to `TRACING_SAMPLE_RATIO`.
+        span_exporter (SpanExporter, optional): Exporter the spans are sent to instead, e.g. in the tests.
+
+    Returns:
+        bool: Whether tracing is on.
+    """
+    global _provider
+    exporter = exporter or os.environ.get('TRACING_EXPORTER', 'none')
+    if exporter not in EXPORTERS:
+        raise ValueError(f"Invalid TRACING_EXPORTER: {exporter}, expected one of {', '.join(EXPORTERS)}")
+    if span_exporter is None:
+        if exporter == 'none':
+            return _provider is not None
+        if exporter == 'console':
+            processor = SimpleSpanProcessor(ConsoleSpanExporter())
+        else:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            processor = BatchSpanProcessor(OTLPSpanExporter())
+    else:
+        processor = SimpleSpanProcessor(span_exporter)
+
+    if _provider is None:
+        if sample_ratio is None:
+            sample_ratio = float(os.environ.get('TRACING_SAMPLE_RATIO', 0.1))
+        _provider = TracerProvider(
+            resource=Resource.create({'service.name': os.environ.get('TRACING_SERVICE_NAME', 'airbnb-regulation')}),
+            sampler=ParentBased(TraceIdRatioBased(sample_ratio)))
+        trace.set_tracer_provider(_provider)
+        install_sql_tracing()
+    _provider.add_span_processor(processor)
+    return True
+
+
+def install_sql_tracing() -> None:
+    """
+    Trace the SQL queries run in a sampled trace, on every database connection.
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_add_sql_wrapper, dispatch_uid='tracing.sql')
+    for connection in connections.all(initialized_only=True):
+        _add_sql_wrapper(None, connection)
+
+
+def _add_sql_wrapper(sender, connection, **kwargs):
+    if trace_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_sql)
+
+
+def trace_sql(execute, sql, params, many, query_context):
+    """
+    Django execute wrapper running a query in a `db.query` span, when its trace is sampled.
+    """
+    if not trace.get_current_span().is_recording():
+        return execute(sql, params, many, query_context)
+    connection = query_context['connection']
+    with tracer.start_as_current_span('db.query', kind=trace.SpanKind.CLIENT, attributes={
+        'db.system': connection.vendor,
+        'db.statement': sql[:2048],
+        'db.executemany': many,
+    }):
+        return execute(sql, params, many, query_context)
+
+
+def crawl_context(spider):
+    """
+    Get the span context of a crawl, set on its spider by the CrawlTracer extension.
+
+    Args:
+        spider: The spider of the crawl.
+
+    Returns:
+        Context | None: The context of the `harvest.crawl` span, None if the crawl isn't traced.
+    """
+    trace_context = getattr(spider, 'trace_context', None)
+    return trace_context if isinstance(trace_context, context.Context) else None
+
+
+def is_recording(trace_context) -> bool:
+    """
+    Whether the span of a context is recorded, to skip the spans of a hot path when it isn't.
+
+    Args:
+        trace_context (Context | None): The context, e.g. of `crawl_context`.
+
+    Returns:
+        bool: Whether the span of the context is recorded, False without a context.
+    """
+    return trace_context is not None and trace.get_current_span(trace_context).is_recording()
+
+
+def before_task_publish(headers=None, **kwargs):
+    """
+    Celery signal handler propagating the current trace in the headers of the task message.
+    """
+    if headers is None or not trace.get_current_span().get_span_context().is_valid:
+        return
+    propagate.inject(headers)
+    headers['published_at'] = time.time()
+
+
+def task_prerun(task_id=None, task=None, **kwargs):
+    """
+    Celery signal handler running the task in a span, child of the span which published it.
+    """
+    request = task.request
+    carrier = {key: getattr(request, key) for key in ('traceparent', 'tracestate')
+               if isinstance(getattr(request, key, None), str)}
+    span = tracer.start_span(f"celery.task {task.name}", context=propagate.extract(carrier),
+                             kind=trace.SpanKind.CONSUMER, attributes={'celery.task_id': task_id or ''})
+    published_at = getattr(request, 'published_at', None)
+    if isinstance(published_at, (int, float)):
+        span.set_attribute('celery.queue_wait_seconds', round(max(time.time() - published_at, 0.0), 4))
+    request.trace_span = span
+    request.trace_token = context.attach(trace.set_span_in_context(span))
+
+
+def task_postrun(task=None, state=None, **kwargs):
+    """
+    Celery signal handler ending the span of a task.
+    """
+    span = getattr(task.request, 'trace_span', None)
+    if span is None:
+        return
+    span.set_attribute('celery.state', state or '')
+    span.end()
+    context.detach(task.request.trace_token)
+    task.request.trace_span = None
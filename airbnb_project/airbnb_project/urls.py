@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('listings/', include('listings.urls')),
-    path('policies/', include('policies.urls'))
+    path('policies/', include('policies.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -11,6 +11,9 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from .tracing import configure_tracing
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'airbnb_project.settings')
 
 application = get_wsgi_application()
+configure_tracing()
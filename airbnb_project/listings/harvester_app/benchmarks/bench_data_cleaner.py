@@ -0,0 +1,132 @@
+"""
+Benchmark of AirbnbListingsPipelineDataCleaner against the previous per-item implementation.
+
+Run from the `airbnb_project` directory:
+
+    python -m listings.harvester_app.benchmarks.bench_data_cleaner [--corpus PATH | --archive DIR] [--repeat N]
+
+The corpus is a JSON lines file of scraped items, or the listing details of a response archive (RESPONSE_ARCHIVE_DIR)
+recorded by the crawls, parsed into items.
+
+The default corpus, `fixtures/cleaner_corpus.jsonl`, is synthetic: 300 generated items whose bed and bath strings
+follow the literal forms Airbnb uses ('1 bed', '2.5 baths', '1 shared bath', 'Private half-bath', ...), with a few
+empty values. No recorded responses can be checked in, so it stands in for a recorded corpus. Its mix of strings is an
+assumption, and it holds no unexpected form missing from the normalization tables, whose fallback to the patterns is
+slower. Benchmark on a response archive to measure the real mix.
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import timeit
+
+import django
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'cleaner_corpus.jsonl')
+
+
+def legacy_process_item(item):
+    """
+    The per-item cleaning as implemented before the normalization tables, kept as the baseline.
+
+    Args:
+        item (dict): The item to clean.
+
+    Returns:
+        dict: The cleaned item.
+    """
+    from itemadapter import ItemAdapter
+
+    adapter = ItemAdapter(item)
+    beds = None
+    try:
+        match = re.search(r'^\d+', adapter.get('beds'))
+        beds = match.group() if match else None
+    except Exception:
+        pass
+    adapter['beds'] = beds
+
+    un_formatted_bathrooms = adapter.get('baths_text')
+    bathroom = None
+    try:
+        adapter['bath_is_shared'] = "shared" in un_formatted_bathrooms
+        match = re.search(r'^\d+\.?\d*', un_formatted_bathrooms)
+        if match:
+            bathroom = match.group()
+        elif re.search(r'(?i)\bhalf-bath\b', un_formatted_bathrooms):
+            bathroom = 0.5
+    except Exception:
+        pass
+    adapter['baths'] = bathroom
+    return item
+
+
+def load_corpus(path):
+    """
+    Load the items of a JSON lines corpus.
+
+    Args:
+        path (str): Path of the corpus.
+
+    Returns:
+        list: The items.
+    """
+    with open(path) as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+def load_archive(directory):
+    """
+    Parse the archived listing details of a response archive into items.
+
+    Args:
+        directory (str): Root directory of the archive.
+
+    Returns:
+        list: The items, as dicts.
+    """
+    from listings.harvester_app.harvester.archive import ResponseArchive
+    from listings.harvester_app.harvester.parse_engine import ParseEngine
+
+    archive = ResponseArchive(directory)
+    try:
+        entries = archive.entries(kind='listing')
+    finally:
+        archive.close()
+    with ParseEngine(directory, workers=0) as engine:
+        return [item.to_dict() for items in engine.iter_listing_items(entries) for item in items]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    corpus = parser.add_mutually_exclusive_group()
+    corpus.add_argument('--corpus', default=CORPUS_PATH, help='JSON lines file of scraped items')
+    corpus.add_argument('--archive', help='Response archive whose listing details are parsed into the corpus')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of passes over the corpus')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'airbnb_project.settings')
+    django.setup()
+    from listings.harvester_app.harvester.pipelines import AirbnbListingsPipelineDataCleaner
+
+    corpus = load_archive(args.archive) if args.archive else load_corpus(args.corpus)
+    cleaner = AirbnbListingsPipelineDataCleaner()
+    runs = {
+        'legacy per-item': lambda items: [legacy_process_item(item) for item in items],
+        'per-item': lambda items: [cleaner.process_item(item, None) for item in items],
+        'batch': cleaner.process_items,
+    }
+
+    print(f"{len(corpus)} items x {args.repeat} passes")
+    baseline = None
+    for name, run in runs.items():
+        batches = [copy.deepcopy(corpus) for _ in range(args.repeat)]
+        seconds = timeit.timeit(lambda: run(batches.pop()), number=args.repeat)
+        per_item = seconds / (len(corpus) * args.repeat) * 1e6
+        baseline = baseline or per_item
+        print(f"{name:>16}: {per_item:7.2f} us/item ({baseline / per_item:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of the connection setup in the write path of DjangoORMPipeline, by database connection mode.
+
+Run from the `airbnb_project` directory, against the Postgres database of the settings:
+
+    python -m listings.harvester_app.benchmarks.bench_db_connections [--batches N] [--batch-size N]
+
+Batches of synthetic listings are inserted by the pipeline, releasing the connection between two batches as Django
+does at the end of a request or a Celery task. Without reuse ('none') every batch opens a new connection, with
+'pool' or 'persistent' it gets the connection kept from the previous batch. The time to get a connection and the
+time of the insert are reported per batch. The inserted listings are deleted afterwards.
+"""
+import argparse
+import logging
+import os
+import time
+from types import SimpleNamespace
+
+import django
+
+from listings.harvester_app.standin.payloads import synthetic_listings
+
+MODES = ('none', 'persistent', 'pool')
+
+
+def use_mode(mode: str) -> None:
+    """
+    Close the connections of the current mode and reconfigure the default database for another one.
+
+    Args:
+        mode (str): The connection mode, see `airbnb_project.database`.
+    """
+    from django.db import connection, connections
+    from airbnb_project.database import database_connection_settings
+
+    connection.close()
+    if connection.settings_dict['OPTIONS'].get('pool'):
+        connection.close_pool()
+    connections.settings['default'].update(database_connection_settings(mode, 'harvest'))
+    del connections['default']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batches', type=int, default=200, help='Number of batches per mode')
+    parser.add_argument('--batch-size', type=int, default=50, help='Listings per batch')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='Connection modes to compare')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'airbnb_project.settings')
+    django.setup()
+    from django.db import close_old_connections, connection
+    from listings.harvester_app.harvester.pipelines import DjangoORMPipeline
+    from listings.listing_models import Listing
+
+    logging.getLogger(__name__).setLevel(logging.WARNING)
+    spider = SimpleNamespace(logger=logging.getLogger(__name__))
+    listings = synthetic_listings(args.batch_size)
+
+    print(f"{args.batches} batches of {args.batch_size} listings per mode, "
+          f"{connection.settings_dict['HOST']}:{connection.settings_dict['PORT']}")
+    baseline = None
+    try:
+        for mode in args.modes:
+            use_mode(mode)
+            pipeline = DjangoORMPipeline(batch_size=args.batch_size)
+            connect_seconds = write_seconds = 0.0
+            for batch in range(args.batches):
+                pipeline.pending = [
+                    Listing(airbnb_listing_id=f"bench-{mode}-{batch}-{listing['id']}", name=listing['name'],
+                            title=listing['title'], room_type=listing['room_type'],
+                            latitude=str(listing['latitude']), longitude=str(listing['longitude']))
+                    for listing in listings]
+                # The end of a request or a task
+                close_old_connections()
+                started_at = time.perf_counter()
+                connection.ensure_connection()
+                connected_at = time.perf_counter()
+                pipeline.flush(spider)
+                connect_seconds += connected_at - started_at
+                write_seconds += time.perf_counter() - connected_at
+            per_batch = (connect_seconds + write_seconds) / args.batches * 1000
+            baseline = baseline or per_batch
+            print(f"{mode:>10}: {connect_seconds / args.batches * 1000:7.2f} ms connect + "
+                  f"{write_seconds / args.batches * 1000:7.2f} ms insert per batch, "
+                  f"{args.batches * args.batch_size / (connect_seconds + write_seconds):8.0f} listings/s "
+                  f"({baseline / per_batch:4.2f}x)")
+    finally:
+        Listing.objects.filter(airbnb_listing_id__startswith='bench-').delete()
+        use_mode('none')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark of the memory and pipeline time per item of ListingItem against the scrapy.Item based ExpandedAirBnBListingItem.
+
+Run from the `airbnb_project` directory:
+
+    python -m listings.harvester_app.benchmarks.bench_item_representation [--corpus PATH] [--repeat N]
+
+The pipeline time covers the data cleaner and the conversion of the item into a Listing, without the database insert.
+"""
+import argparse
+import copy
+import timeit
+import tracemalloc
+import os
+
+import django
+
+from listings.harvester_app.benchmarks.bench_data_cleaner import CORPUS_PATH, legacy_process_item, load_corpus
+
+
+def legacy_to_listing(item):
+    """
+    The conversion of an item into a Listing as implemented before ListingItem, kept as the baseline.
+
+    Args:
+        item (ExpandedAirBnBListingItem): The cleaned item.
+
+    Returns:
+        Listing: The unsaved listing.
+    """
+    from itemadapter import ItemAdapter
+    from listings.listing_models import Listing
+
+    adapter = ItemAdapter(item)
+    return Listing(
+        airbnb_listing_id=adapter.get('airbnb_listing_id'),
+        name=adapter.get('name'),
+        title=adapter.get('title'),
+        baths=adapter.get('baths'),
+        beds=adapter.get('beds'),
+        latitude=adapter.get('latitude'),
+        longitude=adapter.get('longitude'),
+        person_capacity=adapter.get('person_capacity'),
+        registration_number=adapter.get('registration_number'),
+        room_type=adapter.get('room_type'),
+        location=adapter.get('location'),
+        is_bath_shared=adapter.get('bath_is_shared'),
+        baths_text=adapter.get('baths_text')
+    )
+
+
+def bytes_per_item(item_class, corpus):
+    """
+    Measure the memory allocated per in-flight item.
+
+    Args:
+        item_class (type): The item class to instantiate.
+        corpus (list): The scraped items, as dictionaries.
+
+    Returns:
+        float: Bytes allocated per item.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    items = [item_class(**fields) for fields in corpus]
+    allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    tracemalloc.stop()
+    del items
+    return allocated / len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=CORPUS_PATH, help='JSON lines file of scraped items')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of passes over the corpus')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'airbnb_project.settings')
+    django.setup()
+    from listings.harvester_app.harvester.items import ExpandedAirBnBListingItem, ListingItem
+    from listings.harvester_app.harvester.pipelines import (AirbnbListingsPipelineDataCleaner, DjangoORMPipeline,
+                                                            LISTING_COLUMNS)
+    from listings.listing_models import Listing
+
+    corpus = load_corpus(args.corpus)
+    cleaner = AirbnbListingsPipelineDataCleaner()
+    runs = {
+        'scrapy.Item': (
+            ExpandedAirBnBListingItem,
+            lambda item: legacy_to_listing(legacy_process_item(item))),
+        'ListingItem': (
+            ListingItem,
+            lambda item: Listing(**dict(zip(LISTING_COLUMNS, DjangoORMPipeline.listing_row(
+                cleaner.process_item(item, None)))))),
+    }
+
+    print(f"{len(corpus)} items x {args.repeat} passes")
+    baseline = None
+    for name, (item_class, pipeline) in runs.items():
+        memory = bytes_per_item(item_class, corpus)
+        batches = [[item_class(**copy.deepcopy(fields)) for fields in corpus] for _ in range(args.repeat)]
+        seconds = timeit.timeit(lambda: [pipeline(item) for item in batches.pop()], number=args.repeat)
+        per_item = seconds / (len(corpus) * args.repeat) * 1e6
+        baseline = baseline or per_item
+        print(f"{name:>12}: {memory:7.1f} bytes/item, {per_item:6.2f} us/item in pipeline ({baseline / per_item:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
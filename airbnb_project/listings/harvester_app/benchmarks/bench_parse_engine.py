@@ -0,0 +1,52 @@
+"""
+Benchmark of the offline ParseEngine throughput by number of processes.
+
+Run from the `airbnb_project` directory:
+
+    python -m listings.harvester_app.benchmarks.bench_parse_engine [--listings N] [--padding-kb KB] [--workers 1 2 4]
+
+A temporary archive is filled with synthetic listing details responses, padded with sections to the size of real
+StaysPdpSections responses, and parsed with each number of processes. The parse only throughput is reported, the
+items are not ingested.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from listings.harvester_app.harvester.archive import ResponseArchive
+from listings.harvester_app.harvester.parse_engine import ParseEngine
+from listings.harvester_app.standin.payloads import padded_listing_details, synthetic_listings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=2000, help='Number of listing responses')
+    parser.add_argument('--padding-kb', type=int, default=150, help='Padding of each response, in KB')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count()}), help='Numbers of processes to compare')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResponseArchive(directory)
+        for number, listing in enumerate(synthetic_listings(args.listings)):
+            archive.store(f"https://www.airbnb.ca/api/{number}", f"listing-{number}", "listing", 200,
+                          padded_listing_details(listing, args.padding_kb),
+                          meta={'airbnb_params': {'airbnb_listing_id': listing['id']}})
+        entries = archive.entries(kind='listing')
+        archive.close()
+
+        print(f"{args.listings} listings of ~{args.padding_kb} KB, {os.cpu_count()} CPUs")
+        baseline = None
+        for workers in args.workers:
+            with ParseEngine(directory, workers=workers) as engine:
+                started_at = time.perf_counter()
+                parsed = sum(len(items) for items in engine.iter_listing_items(entries))
+                seconds = time.perf_counter() - started_at
+            throughput = parsed / seconds
+            baseline = baseline or throughput
+            print(f"{workers:>3} workers: {throughput:8.1f} listings/s ({throughput / baseline:4.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark of the generation of the seed search requests with compiled URL templates against formatted URLs.
+
+Run from the `airbnb_project` directory:
+
+    python -m listings.harvester_app.benchmarks.bench_url_builder [--grid-sizes 100 10000 100000] [--requests]
+
+For each grid size, the Vancouver bounding box is divided into that many tiles and the search URLs of all the
+templates are built for every tile. With `--requests`, the scrapy.Request objects are built too, which escape
+their URL.
+"""
+import argparse
+import time
+
+import scrapy
+
+from listings.harvester_app.harvester.spiders.airbnb_url_builder import AirBnbURLBuilder
+from listings.harvester_app.harvester.spiders.constants import CITY_COORDINATE_BOUNDARY, Cities
+from listings.harvester_app.harvester.spiders.coordinates_builder import AirbnbCoordinatesBuilder
+
+ZOOM_LEVEL = 15.4
+
+
+def build_tiles(grid_size):
+    """
+    Divide the Vancouver bounding box into tiles.
+
+    Args:
+        grid_size (int): Number of tiles.
+
+    Returns:
+        list: The bounds of the tiles.
+    """
+    builder = AirbnbCoordinatesBuilder()
+    (lon_min, lat_min), (lon_max, lat_max) = CITY_COORDINATE_BOUNDARY[Cities.VANCOUVER]["bounding_box"]
+    num_cols, num_rows = builder._calculate_grid_size(grid_size)
+    return builder._generate_bounding_boxes(lon_min, lat_min, lon_max, lat_max, num_cols, num_rows)
+
+
+def formatted_urls(tiles, make_request):
+    """
+    The seed URLs as generated before the URL templates, kept as the baseline.
+    """
+    urls = AirBnbURLBuilder().get_urls()
+    return [make_request(url.format(cord["ne_lat"], cord["ne_lng"], cord["sw_lat"], cord["sw_lng"],
+                                    ZOOM_LEVEL, ZOOM_LEVEL))
+            for url in urls for cord in tiles]
+
+
+def template_urls(tiles, make_request):
+    """
+    The seed URLs built from the compiled URL templates, as ListingsSpider does.
+    """
+    builder = AirBnbURLBuilder()
+    templates = builder.get_templates()
+    bounds_queries = [builder.bounds_query(tile, ZOOM_LEVEL) for tile in tiles]
+    return [make_request(template.url(bounds_query)) for template in templates for bounds_query in bounds_queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grid-sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                        help='Numbers of tiles to compare')
+    parser.add_argument('--requests', action='store_true', help='Build the scrapy.Request objects too')
+    args = parser.parse_args()
+
+    make_request = scrapy.Request if args.requests else str
+    for grid_size in args.grid_sizes:
+        tiles = build_tiles(grid_size)
+        results = []
+        for build in (formatted_urls, template_urls):
+            started_at = time.perf_counter()
+            urls = build(tiles, make_request)
+            results.append((len(urls), time.perf_counter() - started_at))
+        (count, baseline), (_, seconds) = results
+        print(f"{len(tiles):>7} tiles, {count:>7} URLs: formatted {baseline * 1000:9.1f} ms, "
+              f"templates {seconds * 1000:9.1f} ms ({baseline / seconds:4.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+Content-addressed archive of the raw responses downloaded by the harvester.
+
+Response bodies are compressed one zstd frame each and appended to segment files, one writer
+per process. A body is stored once whatever the number of URLs and dates it was downloaded for.
+An SQLite index maps every archived response, keyed by request fingerprint and date, to the
+digest of its body and to the location of that body in the segments.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import zstandard
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """
+    An archived response.
+
+    Attributes:
+        fingerprint (str): Hex fingerprint of the request.
+        archived_on (str): ISO date the response was downloaded on.
+        url (str): URL of the request.
+        kind (str): 'search' for a search results page, 'listing' for a listing details (PDP) response.
+        status (int): HTTP status of the response.
+        digest (str): SHA-256 of the response body.
+        meta (dict): The request meta needed to parse the response again, e.g. `airbnb_params`.
+    """
+    fingerprint: str
+    archived_on: str
+    url: str
+    kind: str
+    status: int
+    digest: str
+    meta: dict
+
+
+class ResponseArchive:
+    """
+    Archive of response bodies in zstd-compressed segment files with an SQLite index.
+    """
+    INDEX_NAME = 'index.sqlite3'
+    SEGMENTS_DIRECTORY = 'segments'
+    COMMIT_EVERY = 100
+
+    def __init__(self, directory: str, segment_max_bytes: int = 256 * 1024 * 1024, compression_level: int = 3) -> None:
+        """
+        Initialize the ResponseArchive, creating the directory and the index if needed.
+
+        Args:
+            directory (str): Root directory of the archive.
+            segment_max_bytes (int): Size after which a writer starts a new segment file.
+            compression_level (int): zstd compression level.
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.compression_level = compression_level
+        os.makedirs(os.path.join(directory, self.SEGMENTS_DIRECTORY), exist_ok=True)
+        self._pid = None
+        self._index = None
+        self._segment = None
+        self._segment_path = None
+        self._segment_number = 0
+        self._uncommitted = 0
+        self._readers = {}
+        self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._create_index()
+
+    @property
+    def index(self) -> sqlite3.Connection:
+        """
+        The SQLite connection of the current process, reopened after a fork.
+        """
+        if self._index is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._segment = None
+            self._index = sqlite3.connect(os.path.join(self.directory, self.INDEX_NAME), timeout=30)
+            self._index.execute("PRAGMA journal_mode=WAL")
+        return self._index
+
+    def _create_index(self) -> None:
+        self.index.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                fingerprint TEXT NOT NULL,
+                archived_on TEXT NOT NULL,
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                digest TEXT NOT NULL REFERENCES blobs (digest),
+                meta TEXT NOT NULL,
+                archived_at TEXT NOT NULL,
+                PRIMARY KEY (fingerprint, archived_on)
+            );
+            CREATE INDEX IF NOT EXISTS responses_archived_on ON responses (archived_on, kind);
+        """)
+        self.index.commit()
+
+    def store(self, url: str, fingerprint: str, kind: str, status: int, body: bytes, meta: dict = None,
+              archived_at: datetime = None) -> tuple[str, bool]:
+        """
+        Archive a response body, writing it to a segment only if the same body is not archived yet.
+
+        A response downloaded again on the same date for the same fingerprint replaces the previous one.
+
+        Args:
+            url (str): URL of the request.
+            fingerprint (str): Hex fingerprint of the request.
+            kind (str): 'search' or 'listing'.
+            status (int): HTTP status of the response.
+            body (bytes): The response body.
+            meta (dict, optional): JSON serializable request meta needed to parse the response again.
+            archived_at (datetime, optional): When the response was downloaded, defaults to now.
+
+        Returns:
+            tuple[str, bool]: The digest of the body and whether the body was written (False if deduplicated).
+        """
+        archived_at = archived_at or datetime.now(timezone.utc)
+        digest = hashlib.sha256(body).hexdigest()
+        index = self.index
+        written = index.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is None
+        if written:
+            segment, offset, length = self._append(self._compressor.compress(body))
+            index.execute("INSERT OR IGNORE INTO blobs (digest, segment, offset, length, size) VALUES (?, ?, ?, ?, ?)",
+                          (digest, segment, offset, length, len(body)))
+        index.execute(
+            "INSERT OR REPLACE INTO responses (fingerprint, archived_on, url, kind, status, digest, meta, archived_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (fingerprint, archived_at.date().isoformat(), url, kind, status, digest, json.dumps(meta or {}),
+             archived_at.isoformat()))
+        self._uncommitted += 1
+        if self._uncommitted >= self.COMMIT_EVERY:
+            self.flush()
+        return digest, written
+
+    def _append(self, frame: bytes) -> tuple[str, int, int]:
+        """
+        Append a compressed frame to the segment of the current process.
+
+        Args:
+            frame (bytes): The zstd frame.
+
+        Returns:
+            tuple[str, int, int]: The segment path relative to the archive, the offset and the length of the frame.
+        """
+        if self._segment is None or self._segment.tell() >= self.segment_max_bytes:
+            self._open_segment()
+        offset = self._segment.tell()
+        self._segment.write(frame)
+        return self._segment_path, offset, len(frame)
+
+    def _open_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        day = datetime.now(timezone.utc).date().isoformat()
+        os.makedirs(os.path.join(self.directory, self.SEGMENTS_DIRECTORY, day), exist_ok=True)
+        while True:
+            self._segment_number += 1
+            self._segment_path = os.path.join(self.SEGMENTS_DIRECTORY, day,
+                                              f"{os.getpid()}-{self._segment_number:04d}.zst")
+            if not os.path.exists(os.path.join(self.directory, self._segment_path)):
+                break
+        self._segment = open(os.path.join(self.directory, self._segment_path), 'ab')
+
+    def flush(self) -> None:
+        """
+        Write the segment to disk and commit the index.
+        """
+        if self._segment is not None and self._pid == os.getpid():
+            self._segment.flush()
+        if self._index is not None:
+            self._index.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        """
+        Flush and close the segment files and the index.
+        """
+        self.flush()
+        for segment_file in self._readers.values():
+            segment_file.close()
+        self._readers = {}
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def read(self, digest: str) -> bytes:
+        """
+        Read an archived body.
+
+        Args:
+            digest (str): The digest of the body.
+
+        Returns:
+            bytes: The decompressed body.
+
+        Raises:
+            KeyError: If no body with this digest is archived.
+        """
+        row = self.index.execute("SELECT segment, offset, length FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        segment, offset, length = row
+        segment_file = self._readers.get(segment)
+        if segment_file is None:
+            segment_file = self._readers[segment] = open(os.path.join(self.directory, segment), 'rb')
+        segment_file.seek(offset)
+        return self._decompressor.decompress(segment_file.read(length))
+
+    def entries(self, kind: str = None, since: str = None, until: str = None) -> list[ArchiveEntry]:
+        """
+        List the archived responses, ordered by date and URL.
+
+        Args:
+            kind (str, optional): Only list the responses of this kind.
+            since (str, optional): First ISO date to list.
+            until (str, optional): Last ISO date to list.
+
+        Returns:
+            list[ArchiveEntry]: The archived responses.
+        """
+        conditions, params = [], []
+        for condition, value in (("kind = ?", kind), ("archived_on >= ?", since), ("archived_on <= ?", until)):
+            if value:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.index.execute(
+            f"SELECT fingerprint, archived_on, url, kind, status, digest, meta FROM responses {where} "
+            f"ORDER BY archived_on, url", params)
+        return [ArchiveEntry(fingerprint, archived_on, url, kind, status, digest, json.loads(meta))
+                for fingerprint, archived_on, url, kind, status, digest, meta in rows]
@@ -0,0 +1,256 @@
+"""
+Distributed crawl: a request queue and a fingerprint set in Redis, shared by the harvester nodes of one crawl.
+"""
+import logging
+import os
+import pickle
+import socket
+import time
+from typing import Callable, Optional
+
+import redis
+from scrapy import signals
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.dupefilters import BaseDupeFilter
+from scrapy.exceptions import DontCloseSpider, NotConfigured
+from scrapy.utils.request import request_from_dict
+
+logger = logging.getLogger(__name__)
+
+
+class RedisKeys:
+    """
+    Names of the Redis keys of a distributed crawl.
+
+    Attributes:
+        queue (str): Sorted set of the pending requests, by priority.
+        dupefilter (str): Set of the fingerprints of the requests already scheduled.
+        seeded (str): Set by the node pushing the seed requests.
+        nodes (str): Number of nodes taking part in the crawl.
+    """
+
+    def __init__(self, prefix: str, spider_name: str) -> None:
+        base = f"{prefix}:{spider_name}"
+        self.queue = f"{base}:requests"
+        self.dupefilter = f"{base}:dupefilter"
+        self.seeded = f"{base}:seeded"
+        self.nodes = f"{base}:nodes"
+
+    def all(self) -> list:
+        return [self.queue, self.dupefilter, self.seeded, self.nodes]
+
+    @classmethod
+    def from_crawler(cls, crawler, spider_name: str):
+        return cls(crawler.settings.get('HARVEST_REDIS_PREFIX', 'harvester'), spider_name)
+
+
+def redis_from_settings(settings) -> redis.Redis:
+    """
+    Connect to the Redis server of the HARVEST_REDIS_URL setting.
+
+    Raises:
+        NotConfigured: If HARVEST_REDIS_URL is empty.
+    """
+    url = settings.get('HARVEST_REDIS_URL')
+    if not url:
+        raise NotConfigured("HARVEST_REDIS_URL is empty")
+    return redis.Redis.from_url(url)
+
+
+class RedisRequestQueue:
+    """
+    Priority queue of requests in a Redis sorted set, the highest priority first.
+    """
+
+    def __init__(self, server: redis.Redis, key: str, spider) -> None:
+        """
+        Initialize the RedisRequestQueue.
+
+        Args:
+            server (redis.Redis): The Redis connection.
+            key (str): The key of the sorted set.
+            spider (Spider): The spider whose callbacks the requests refer to, by name.
+        """
+        self.server = server
+        self.key = key
+        self.spider = spider
+
+    def push(self, request) -> None:
+        data = pickle.dumps(request.to_dict(spider=self.spider), protocol=pickle.HIGHEST_PROTOCOL)
+        self.server.zadd(self.key, {data: -request.priority})
+
+    def pop(self):
+        popped = self.server.zpopmin(self.key)
+        if not popped:
+            return None
+        data, _ = popped[0]
+        return request_from_dict(pickle.loads(data), spider=self.spider)
+
+    def __len__(self) -> int:
+        return self.server.zcard(self.key)
+
+
+class RedisDupeFilter(BaseDupeFilter):
+    """
+    Filter of the requests already scheduled by any node, on their fingerprint.
+    """
+
+    def __init__(self, server: redis.Redis, key: str, fingerprinter, debug: bool = False) -> None:
+        """
+        Initialize the RedisDupeFilter.
+
+        Args:
+            server (redis.Redis): The Redis connection.
+            key (str): The key of the fingerprint set.
+            fingerprinter (RequestFingerprinter): The request fingerprinter of the crawler.
+            debug (bool): Whether to log every filtered request, not only the first one.
+        """
+        self.server = server
+        self.key = key
+        self.fingerprinter = fingerprinter
+        self.debug = debug
+        self.logged = False
+
+    def request_seen(self, request) -> bool:
+        return self.server.sadd(self.key, self.fingerprinter.fingerprint(request).hex()) == 0
+
+    def log(self, request, spider) -> None:
+        if self.debug or not self.logged:
+            logger.debug(f"Filtered duplicate request {request} (seen by a harvester node)")
+            self.logged = True
+        spider.crawler.stats.inc_value('dupefilter/filtered', spider=spider)
+
+
+class RedisScheduler(BaseScheduler):
+    """
+    Scheduler sharing its request queue and its dupefilter with the other harvester nodes of the crawl.
+
+    A node keeps waiting for requests pushed by the other nodes while the queue stays empty for less than
+    `HARVEST_REDIS_IDLE_TIMEOUT` seconds. When the last node closes, the keys of the crawl are deleted,
+    unless `HARVEST_REDIS_PERSIST` is set. The keys expire after `HARVEST_REDIS_KEY_TTL` seconds in any
+    case, so that a crashed node doesn't block the next crawl.
+    """
+
+    def __init__(self, server: redis.Redis, crawler, idle_timeout: float = 30.0, key_ttl: int = 6 * 3600,
+                 persist: bool = False, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the RedisScheduler.
+
+        Args:
+            server (redis.Redis): The Redis connection.
+            crawler (Crawler): The crawler.
+            idle_timeout (float): Seconds a node waits for requests once the shared queue is empty.
+            key_ttl (int): Seconds the keys of the crawl are kept after the last node opened.
+            persist (bool): Whether to keep the queue and the fingerprints when the last node closes.
+            clock (Callable[[], float]): Monotonic clock.
+        """
+        self.server = server
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.idle_timeout = idle_timeout
+        self.key_ttl = key_ttl
+        self.persist = persist
+        self._clock = clock
+        self.keys = None
+        self.queue = None
+        self.df = None
+        self.spider = None
+        self._idle_since = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = cls(redis_from_settings(crawler.settings), crawler,
+                        idle_timeout=crawler.settings.getfloat('HARVEST_REDIS_IDLE_TIMEOUT', 30.0),
+                        key_ttl=crawler.settings.getint('HARVEST_REDIS_KEY_TTL', 6 * 3600),
+                        persist=crawler.settings.getbool('HARVEST_REDIS_PERSIST'))
+        crawler.signals.connect(scheduler.spider_idle, signal=signals.spider_idle)
+        return scheduler
+
+    def open(self, spider) -> None:
+        self.spider = spider
+        self.keys = RedisKeys.from_crawler(self.crawler, spider.name)
+        self.queue = RedisRequestQueue(self.server, self.keys.queue, spider)
+        self.df = RedisDupeFilter(self.server, self.keys.dupefilter, self.crawler.request_fingerprinter,
+                                  self.crawler.settings.getbool('DUPEFILTER_DEBUG'))
+        nodes = self.server.incr(self.keys.nodes)
+        for key in self.keys.all():
+            self.server.expire(key, self.key_ttl)
+        logger.info(f"Joined the distributed crawl {self.keys.queue} as node {nodes}, "
+                    f"{len(self.queue)} requests pending")
+
+    def close(self, reason: str) -> None:
+        nodes = self.server.decr(self.keys.nodes)
+        if nodes <= 0 and not self.persist:
+            self.server.delete(*self.keys.all())
+            logger.info(f"Last node of the distributed crawl {self.keys.queue}, keys deleted")
+
+    def has_pending_requests(self) -> bool:
+        return len(self.queue) > 0
+
+    def enqueue_request(self, request) -> bool:
+        if not request.dont_filter and self.df.request_seen(request):
+            self.df.log(request, self.spider)
+            return False
+        self.queue.push(request)
+        self.stats.inc_value('scheduler/enqueued/redis', spider=self.spider)
+        self.stats.inc_value('scheduler/enqueued', spider=self.spider)
+        return True
+
+    def next_request(self):
+        request = self.queue.pop()
+        if request is not None:
+            self._idle_since = None
+            self.stats.inc_value('scheduler/dequeued/redis', spider=self.spider)
+            self.stats.inc_value('scheduler/dequeued', spider=self.spider)
+        return request
+
+    def spider_idle(self, spider):
+        """
+        Keep the spider open while other nodes may still push requests to the shared queue.
+        """
+        now = self._clock()
+        if self._idle_since is None:
+            self._idle_since = now
+        if now - self._idle_since < self.idle_timeout:
+            raise DontCloseSpider
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+
+class RedisSeedMiddleware:
+    """
+    Spider middleware letting a single node of a distributed crawl push the start requests.
+
+    The first node opening the crawl claims the seeding, the other nodes drop their start requests
+    without generating them and only pull requests from the shared queue.
+    """
+
+    def __init__(self, server: redis.Redis, crawler, key_ttl: int = 6 * 3600, node: Optional[str] = None) -> None:
+        """
+        Initialize the RedisSeedMiddleware.
+
+        Args:
+            server (redis.Redis): The Redis connection.
+            crawler (Crawler): The crawler.
+            key_ttl (int): Seconds the seeding claim is kept.
+            node (str, optional): The name of this node, stored with the claim. Defaults to host:pid.
+        """
+        self.server = server
+        self.crawler = crawler
+        self.key_ttl = key_ttl
+        self.node = node or f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(redis_from_settings(crawler.settings), crawler,
+                   key_ttl=crawler.settings.getint('HARVEST_REDIS_KEY_TTL', 6 * 3600))
+
+    def process_start_requests(self, start_requests, spider):
+        keys = RedisKeys.from_crawler(self.crawler, spider.name)
+        if not self.server.set(keys.seeded, self.node, nx=True, ex=self.key_ttl):
+            seeder = self.server.get(keys.seeded)
+            logger.info(f"Seeds pushed by node {seeder.decode() if seeder else 'unknown'}, not seeding")
+            return
+        self.crawler.stats.set_value('scheduler/seeded', True, spider=spider)
+        yield from start_requests
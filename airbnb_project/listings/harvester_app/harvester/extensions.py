@@ -0,0 +1,566 @@
+"""
+Scrapy extensions of the harvester.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable
+
+from django.db import transaction
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider, NotConfigured
+from twisted.internet.task import LoopingCall
+
+from opentelemetry import trace
+
+from airbnb_project.metrics import HARVEST_DOWNLOAD_LATENCY, HARVEST_ITEMS, HARVEST_REQUESTS, export_metrics
+from airbnb_project.tracing import tracer
+from listings.harvester_app.harvester.logs import JsonLogFormatter, harvest_log
+from listings.harvester_app.harvester.signals import listing_failed, search_page_parsed
+from listings.harvester_app.harvester.spiders.constants import SEARCH_PAGE_CAP
+from listings.listing_models import DeadLetter, HarvestRun, TileMetric
+
+
+class ReactorLagMonitor:
+    """
+    Measure how late the reactor runs a call scheduled at a fixed interval.
+
+    A lag means the reactor thread was busy, e.g. decoding a large JSON payload, and could not
+    process network events meanwhile. The lag is reported in the `reactor_lag/*` stats.
+    """
+    SLOW_LAG_SECONDS = 0.1
+    # Upper bounds of the lag histogram, in seconds
+    LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0)
+
+    def __init__(self, stats, interval: float = 0.5, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the ReactorLagMonitor.
+
+        Args:
+            stats (StatsCollector): The crawler stats.
+            interval (float): Seconds between two measures.
+            clock (Callable[[], float]): Monotonic clock.
+        """
+        self.stats = stats
+        self.interval = interval
+        self._clock = clock
+        self._expected_at = None
+        self._total_lag = 0.0
+        self._samples = 0
+        self._task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        interval = crawler.settings.getfloat('REACTOR_LAG_INTERVAL', 0.5)
+        if interval <= 0:
+            raise NotConfigured("REACTOR_LAG_INTERVAL is 0")
+        monitor = cls(crawler.stats, interval)
+        crawler.signals.connect(monitor.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(monitor.spider_closed, signal=signals.spider_closed)
+        return monitor
+
+    def spider_opened(self, spider):
+        self._expected_at = self._clock() + self.interval
+        self._task = LoopingCall(self.tick)
+        self._task.start(self.interval, now=False)
+
+    def tick(self) -> None:
+        """
+        Record the lag of the current call and schedule the next expected one.
+        """
+        now = self._clock()
+        lag = max(now - self._expected_at, 0.0)
+        self._expected_at = now + self.interval
+        self._samples += 1
+        self._total_lag += lag
+        self.stats.inc_value('reactor_lag/samples')
+        self.stats.max_value('reactor_lag/max_seconds', round(lag, 4))
+        if lag >= self.SLOW_LAG_SECONDS:
+            self.stats.inc_value('reactor_lag/slow_samples')
+        bucket = next((f"le_{bucket:g}" for bucket in self.LAG_BUCKETS if lag <= bucket),
+                      f"gt_{self.LAG_BUCKETS[-1]:g}")
+        self.stats.inc_value(f'reactor_lag/histogram/{bucket}')
+
+    def spider_closed(self, spider):
+        if self._task is not None and self._task.running:
+            self._task.stop()
+        if self._samples:
+            self.stats.set_value('reactor_lag/mean_seconds', round(self._total_lag / self._samples, 4))
+
+
+class CrawlProfiler:
+    """
+    Profile a crawl with cProfile and tracemalloc, and save the results as artifacts of its harvest run.
+
+    `HARVEST_PROFILE` selects the profilers: 'cpu' (cProfile), 'memory' (tracemalloc) or 'all'. The extension
+    isn't loaded when it is empty, so a crawl without profiling runs as before. When the crawl closes, a
+    directory of HARVEST_PROFILE_DIR named after the start of the crawl receives:
+
+    - `crawl.pstats`, the cProfile stats for `python -m pstats` or snakeviz, and `crawl_profile.txt`, the
+      functions with the most cumulative time,
+    - `allocations.txt`, the lines holding the most memory at the end of the crawl, and the peak traced memory,
+    - `reactor_lag.json`, the histogram of the reactor lag measured by ReactorLagMonitor.
+
+    The directory is saved in the `profile/path` stat and in the `profile_path` of the HarvestRun.
+    """
+    MODES = ('cpu', 'memory', 'all')
+
+    def __init__(self, stats, mode: str, directory: str = "profiles", top: int = 50) -> None:
+        """
+        Initialize the CrawlProfiler.
+
+        Args:
+            stats (StatsCollector): The crawler stats.
+            mode (str): 'cpu', 'memory' or 'all'.
+            directory (str): Directory of the profiles of the crawls.
+            top (int): Number of functions and allocation sites reported.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid HARVEST_PROFILE: {mode}, expected one of {', '.join(self.MODES)}")
+        self.stats = stats
+        self.mode = mode
+        self.directory = directory
+        self.top = top
+        self.started_at = None
+        self.profiler = None
+        self._started_tracemalloc = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        mode = crawler.settings.get('HARVEST_PROFILE', '')
+        if not mode:
+            raise NotConfigured("HARVEST_PROFILE is empty")
+        profiler = cls(crawler.stats, mode, directory=crawler.settings.get('HARVEST_PROFILE_DIR', 'profiles'),
+                       top=crawler.settings.getint('HARVEST_PROFILE_TOP', 50))
+        crawler.signals.connect(profiler.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(profiler.spider_closed, signal=signals.spider_closed)
+        return profiler
+
+    def spider_opened(self, spider):
+        self.started_at = datetime.now(timezone.utc)
+        if self.mode in ('memory', 'all') and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.mode in ('cpu', 'all'):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def spider_closed(self, spider):
+        if self.profiler is not None:
+            self.profiler.disable()
+        started_at = self.started_at or datetime.now(timezone.utc)
+        path = os.path.join(self.directory, f"{started_at:%Y%m%dT%H%M%S}-{spider.name}")
+        os.makedirs(path, exist_ok=True)
+        if self.profiler is not None:
+            self.write_cpu_profile(path)
+            self.profiler = None
+        if tracemalloc.is_tracing():
+            self.write_allocations(path)
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        with open(os.path.join(path, 'reactor_lag.json'), 'w') as lag_file:
+            json.dump({key.removeprefix('reactor_lag/'): value for key, value in self.stats.get_stats().items()
+                       if key.startswith('reactor_lag/')}, lag_file, indent=2, sort_keys=True)
+        self.stats.set_value('profile/path', path)
+        spider.logger.info(f"Crawl profile saved to {path}")
+
+    def write_cpu_profile(self, path: str) -> None:
+        self.profiler.dump_stats(os.path.join(path, 'crawl.pstats'))
+        report = io.StringIO()
+        pstats.Stats(self.profiler, stream=report).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        with open(os.path.join(path, 'crawl_profile.txt'), 'w') as report_file:
+            report_file.write(report.getvalue())
+
+    def write_allocations(self, path: str) -> None:
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        current, peak = tracemalloc.get_traced_memory()
+        self.stats.set_value('profile/peak_traced_bytes', peak)
+        with open(os.path.join(path, 'allocations.txt'), 'w') as allocations_file:
+            allocations_file.write(f"Traced memory: {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB\n\n")
+            for statistic in snapshot.statistics('lineno')[:self.top]:
+                allocations_file.write(f"{statistic}\n")
+
+
+class HarvestMetrics:
+    """
+    Record the responses, download latency and items of the crawl in the Prometheus metrics, and export them when
+    the crawl closes, since the Celery worker running it isn't scraped.
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('HARVEST_METRICS_ENABLED', True):
+            raise NotConfigured("HARVEST_METRICS_ENABLED is False")
+        extension = cls()
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(extension.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def response_received(self, response, request, spider):
+        endpoint = 'listing' if 'airbnb_params' in request.meta else 'search'
+        HARVEST_REQUESTS.labels(endpoint, response.status).inc()
+        if 'download_latency' in request.meta:
+            HARVEST_DOWNLOAD_LATENCY.labels(endpoint).observe(request.meta['download_latency'])
+
+    def item_scraped(self, item, response, spider):
+        HARVEST_ITEMS.labels('scraped').inc()
+
+    def item_dropped(self, item, response, exception, spider):
+        HARVEST_ITEMS.labels('dropped').inc()
+
+    def spider_closed(self, spider):
+        export_metrics('harvester')
+
+
+class CrawlTracer:
+    """
+    Trace the crawl in a `harvest.crawl` span, child of the current span, e.g. the span of the Celery task.
+
+    Every response is recorded in a `scrapy.download` span, spanning its download latency. The span context of the
+    crawl is set as `spider.trace_context`, for the spans of the parsing and of the pipelines.
+    """
+
+    def __init__(self, stats) -> None:
+        """
+        Initialize the CrawlTracer.
+
+        Args:
+            stats (StatsCollector): The crawler stats.
+        """
+        self.stats = stats
+        self.span = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('HARVEST_TRACING_ENABLED', True):
+            raise NotConfigured("HARVEST_TRACING_ENABLED is False")
+        extension = cls(crawler.stats)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        self.span = tracer.start_span('harvest.crawl', attributes={'spider.name': spider.name})
+        spider.trace_context = trace.set_span_in_context(self.span)
+
+    def response_received(self, response, request, spider):
+        if self.span is None or not self.span.is_recording():
+            return
+        endpoint = 'listing' if 'airbnb_params' in request.meta else 'search'
+        end_time = time.time_ns()
+        span = tracer.start_span('scrapy.download', context=spider.trace_context, kind=trace.SpanKind.CLIENT,
+                                 start_time=end_time - int(request.meta.get('download_latency', 0.0) * 1e9),
+                                 attributes={'http.url': request.url, 'http.status_code': response.status,
+                                             'harvest.endpoint': endpoint})
+        span.end(end_time=end_time)
+
+    def spider_closed(self, spider, reason):
+        if self.span is None:
+            return
+        self.span.set_attribute('harvest.finish_reason', reason)
+        self.span.set_attribute('harvest.items_scraped', self.stats.get_value('item_scraped_count', 0))
+        self.span.end()
+        self.span = None
+
+
+class HarvestLogReporter:
+    """
+    Configure the rate limiting of the harvester log for the crawl, and write its error samples when it closes.
+
+    With `HARVEST_LOG_FORMAT = 'json'`, the log records of the crawl are written as JSON objects, the formatters of
+    the root handlers being restored once it closes.
+    """
+
+    def __init__(self, stats, interval: float = 60.0, burst: int = 5, samples: int = 50, samples_file: str = "",
+                 log_format: str = "text") -> None:
+        """
+        Initialize the HarvestLogReporter.
+
+        Args:
+            stats (StatsCollector): The crawler stats.
+            interval (float): Seconds of a rate limiting window.
+            burst (int): Messages logged per key and window.
+            samples (int): Number of error payloads kept.
+            samples_file (str): JSON lines file the error payloads are appended to, none to drop them.
+            log_format (str): 'text' or 'json'.
+        """
+        if log_format not in ('text', 'json'):
+            raise ValueError(f"Invalid HARVEST_LOG_FORMAT: {log_format}, expected 'text' or 'json'")
+        self.stats = stats
+        self.interval = interval
+        self.burst = burst
+        self.samples = samples
+        self.samples_file = samples_file
+        self.log_format = log_format
+        self.formatters = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        reporter = cls(crawler.stats,
+                       interval=crawler.settings.getfloat('HARVEST_LOG_INTERVAL', 60.0),
+                       burst=crawler.settings.getint('HARVEST_LOG_BURST', 5),
+                       samples=crawler.settings.getint('HARVEST_LOG_SAMPLES', 50),
+                       samples_file=crawler.settings.get('HARVEST_LOG_SAMPLES_FILE', ''),
+                       log_format=crawler.settings.get('HARVEST_LOG_FORMAT', 'text'))
+        crawler.signals.connect(reporter.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(reporter.spider_closed, signal=signals.spider_closed)
+        return reporter
+
+    def spider_opened(self, spider):
+        harvest_log.configure(self.stats, interval=self.interval, burst=self.burst, samples=self.samples)
+        if self.log_format == 'json':
+            for handler in logging.root.handlers:
+                self.formatters[handler] = handler.formatter
+                handler.setFormatter(JsonLogFormatter())
+
+    def spider_closed(self, spider):
+        harvest_log.flush()
+        if self.samples_file:
+            written = harvest_log.write_samples(self.samples_file)
+            if written:
+                spider.logger.info(f"{written} error samples written to {self.samples_file}")
+        harvest_log.configure()
+        # Not the log of the next tasks of the worker
+        for handler, formatter in self.formatters.items():
+            handler.setFormatter(formatter)
+        self.formatters = {}
+
+
+class TileMetricsCollector:
+    """
+    Record the search metrics of every map tile of a crawl, saved as a HarvestRun and its TileMetric rows.
+
+    A listing is new the first time the crawl finds it, in any tile or search, and a duplicate afterwards.
+    A tile is saturated when one of its searches announced SEARCH_PAGE_CAP result pages, so that it may hold
+    more listings than Airbnb returns and should be split.
+
+    When the crawl was started for a HarvestRun, `HARVEST_RUN_ID`, the metrics are saved on that run.
+    """
+
+    def __init__(self, stats, run_id: int = None) -> None:
+        """
+        Initialize the TileMetricsCollector.
+
+        Args:
+            stats (StatsCollector): The crawler stats.
+            run_id (int, optional): The id of the HarvestRun of the crawl, a new run is saved when None.
+        """
+        self.stats = stats
+        self.run_id = run_id
+        self.tiles = {}
+        self.seen_ids = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('TILE_METRICS_ENABLED', True):
+            raise NotConfigured("TILE_METRICS_ENABLED is False")
+        collector = cls(crawler.stats, run_id=crawler.settings.getint('HARVEST_RUN_ID') or None)
+        crawler.signals.connect(collector.response_received, signal=signals.response_received)
+        crawler.signals.connect(collector.search_page_parsed, signal=search_page_parsed)
+        crawler.signals.connect(collector.spider_closed, signal=signals.spider_closed)
+        return collector
+
+    def _tile(self, tile: dict) -> TileMetric:
+        metric = self.tiles.get(tile["index"])
+        if metric is None:
+            metric = self.tiles[tile["index"]] = TileMetric(
+                tile_index=tile["index"], sw_lat=float(tile["sw_lat"]), sw_lng=float(tile["sw_lng"]),
+                ne_lat=float(tile["ne_lat"]), ne_lng=float(tile["ne_lng"]))
+        return metric
+
+    def response_received(self, response, request, spider):
+        tile = request.meta.get('tile')
+        if tile is None or 'airbnb_params' in request.meta:
+            return
+        metric = self._tile(tile)
+        metric.requests += 1
+        metric.response_seconds += request.meta.get('download_latency', 0.0)
+
+    def search_page_parsed(self, response, listing_ids, page_cursors, spider):
+        tile = response.meta.get('tile')
+        if tile is None:
+            return
+        metric = self._tile(tile)
+        new_listings = len(set(listing_ids) - self.seen_ids)
+        self.seen_ids.update(listing_ids)
+        metric.pages += 1
+        metric.listings_found += len(listing_ids)
+        metric.new_listings += new_listings
+        metric.duplicate_listings += len(listing_ids) - new_listings
+        metric.max_page_cursors = max(metric.max_page_cursors, len(page_cursors))
+        metric.saturated = metric.saturated or len(page_cursors) >= SEARCH_PAGE_CAP
+
+    def spider_closed(self, spider, reason):
+        run = self.save(reason)
+        self.stats.set_value('tile_metrics/run_id', run.pk)
+        self.stats.set_value('tile_metrics/saturated_tiles', sum(tile.saturated for tile in self.tiles.values()))
+        self.stats.set_value('tile_metrics/empty_tiles',
+                             sum(not tile.listings_found for tile in self.tiles.values()))
+
+    def save(self, reason: str = "") -> HarvestRun:
+        """
+        Save the run and the metrics of its tiles.
+
+        Args:
+            reason (str): Why the crawl finished.
+
+        Returns:
+            HarvestRun: The saved run.
+        """
+        start_time = self.stats.get_value('start_time')
+        with transaction.atomic():
+            run = HarvestRun.objects.filter(pk=self.run_id).first() if self.run_id else None
+            if run is None:
+                run = HarvestRun(started_at=start_time or datetime.now(timezone.utc),
+                                 status=HarvestRun.STATUS_SUCCEEDED if reason == 'finished'
+                                 else HarvestRun.STATUS_FAILED)
+            run.finished_at = datetime.now(timezone.utc)
+            run.finish_reason = reason or ""
+            run.items_scraped = self.stats.get_value('item_scraped_count', 0)
+            run.profile_path = self.stats.get_value('profile/path', "")
+            run.save()
+            for metric in self.tiles.values():
+                metric.run = run
+            TileMetric.objects.bulk_create(sorted(self.tiles.values(), key=lambda metric: metric.tile_index))
+        return run
+
+
+class DeadLetterCollector:
+    """
+    Collect the listings whose details failed, retry them once the crawl is done and store those still failing.
+
+    The listings reported by the listing_failed signal are held back. When the crawl gets idle, their details
+    requests are sent again, at most `retry_concurrency` at a time, so that a rate limited or failing API gets
+    a break. The listings failing again are saved in the DeadLetter store, for a later crawl of
+    `ListingsSpider` with `dead_letters=True`, and the dead letters of the listings scraped are resolved.
+    """
+
+    def __init__(self, crawler, retry_pass: bool = True, store: bool = True, retry_concurrency: int = 2) -> None:
+        """
+        Initialize the DeadLetterCollector.
+
+        Args:
+            crawler (Crawler): The crawler.
+            retry_pass (bool): Whether to retry the failed listings at the end of the crawl.
+            store (bool): Whether to save the listings still failing in the DeadLetter store.
+            retry_concurrency (int): Number of retries in flight at once.
+        """
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.retry_pass = retry_pass
+        self.store = store
+        self.retry_concurrency = max(retry_concurrency, 1)
+        # Last failure of the listings still failing, by listing id: the request, the reason and the attempts
+        self.failures = {}
+        self.scraped_ids = set()
+        self.retries = None
+        self.retries_in_flight = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        retry_pass = crawler.settings.getbool('DEAD_LETTER_RETRY_PASS', True)
+        store = crawler.settings.getbool('DEAD_LETTER_STORE', True)
+        if not retry_pass and not store:
+            raise NotConfigured("DEAD_LETTER_RETRY_PASS and DEAD_LETTER_STORE are False")
+        collector = cls(crawler, retry_pass, store, crawler.settings.getint('DEAD_LETTER_RETRY_CONCURRENCY', 2))
+        crawler.signals.connect(collector.listing_failed, signal=listing_failed)
+        crawler.signals.connect(collector.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(collector.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(collector.spider_closed, signal=signals.spider_closed)
+        return collector
+
+    def listing_failed(self, request, reason, spider):
+        listing_id = request.meta.get('airbnb_params', {}).get('airbnb_listing_id')
+        if not listing_id:
+            return
+        _, _, attempts = self.failures.get(listing_id, (None, None, 0))
+        self.failures[listing_id] = (request, reason, attempts + 1)
+        if request.meta.get('dead_letter_pass'):
+            self._retry_done()
+        self.stats.inc_value('dead_letter/failed')
+
+    def item_scraped(self, item, response, spider):
+        listing_id = item.get('airbnb_listing_id')
+        self.scraped_ids.add(listing_id)
+        if self.failures.pop(listing_id, None) is not None:
+            self.stats.inc_value('dead_letter/recovered')
+        if response.meta.get('dead_letter_pass'):
+            self._retry_done()
+
+    def spider_idle(self, spider):
+        """
+        Start the retry pass when the crawl is done, and keep the spider open until it is over.
+        """
+        if not self.retry_pass:
+            return
+        if self.retries is None:
+            self.retries = [self._retry_request(request) for request, _, _ in self.failures.values()]
+            self.stats.set_value('dead_letter/retried', len(self.retries))
+        # Retries lost without a signal, e.g. filtered out, are not waited for
+        self.retries_in_flight = 0
+        if self.retries:
+            self._send_retries()
+            raise DontCloseSpider
+
+    def _retry_request(self, request):
+        meta = {key: request.meta[key] for key in ('airbnb_params', 'tile') if key in request.meta}
+        return request.replace(meta={**meta, 'dead_letter_pass': True}, dont_filter=True)
+
+    def _retry_done(self) -> None:
+        self.retries_in_flight = max(self.retries_in_flight - 1, 0)
+        self._send_retries()
+
+    def _send_retries(self) -> None:
+        while self.retries and self.retries_in_flight < self.retry_concurrency:
+            self.retries_in_flight += 1
+            self.crawler.engine.crawl(self.retries.pop())
+
+    def spider_closed(self, spider, reason):
+        self.stats.set_value('dead_letter/remaining', len(self.failures))
+        if self.store:
+            self.save()
+
+    def save(self) -> None:
+        """
+        Save the listings still failing in the DeadLetter store and resolve the dead letters of the listings scraped.
+        """
+        now = datetime.now(timezone.utc)
+        with transaction.atomic():
+            pending = {}
+            failed_ids = list(self.failures)
+            for start in range(0, len(failed_ids), 1000):
+                for dead_letter in DeadLetter.objects.filter(airbnb_listing_id__in=failed_ids[start:start + 1000],
+                                                             resolved_at__isnull=True):
+                    pending[dead_letter.airbnb_listing_id] = dead_letter
+            created, updated = [], []
+            for listing_id, (request, reason, attempts) in self.failures.items():
+                dead_letter = pending.get(listing_id)
+                if dead_letter is None:
+                    created.append(DeadLetter(airbnb_listing_id=listing_id, airbnb_params=request.meta['airbnb_params'],
+                                              url=request.url, reason=reason, attempts=attempts, first_failed_at=now,
+                                              last_failed_at=now))
+                    continue
+                dead_letter.url, dead_letter.reason, dead_letter.last_failed_at = request.url, reason, now
+                dead_letter.attempts += attempts
+                updated.append(dead_letter)
+            DeadLetter.objects.bulk_create(created)
+            DeadLetter.objects.bulk_update(updated, ['url', 'reason', 'attempts', 'last_failed_at'])
+
+            scraped_ids = list(self.scraped_ids)
+            for start in range(0, len(scraped_ids), 1000):
+                DeadLetter.objects.filter(airbnb_listing_id__in=scraped_ids[start:start + 1000],
+                                          resolved_at__isnull=True).update(resolved_at=now)
+        self.stats.set_value('dead_letter/stored', len(created) + len(updated))
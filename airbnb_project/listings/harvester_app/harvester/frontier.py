@@ -0,0 +1,132 @@
+"""
+Crawl frontier of the harvester: priorities of the requests, so that a time-limited crawl does the most valuable work first.
+"""
+import logging
+from datetime import date, datetime, timedelta
+
+from django.db import DatabaseError
+from django.db.models import Sum
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlFrontier:
+    """
+    Score the map tiles by their historic yield and the listings by staleness and registration risk.
+
+    The yield of a tile is the number of new listings it found per search response over the last
+    `history_runs` harvest runs. Tile priorities range from 0 to MAX_TILE_PRIORITY, tiles without history
+    sitting in the middle. Listing details requests go before the search pages, from LISTING_BASE_PRIORITY
+    up: the longer since a listing was last scraped, up to `stale_days`, the higher, plus
+    `registration_boost` when it showed no registration number.
+    """
+    MAX_TILE_PRIORITY = 100
+    LISTING_BASE_PRIORITY = MAX_TILE_PRIORITY + 1
+
+    def __init__(self, enabled: bool = True, history_runs: int = 5, stale_days: int = 30,
+                 registration_boost: int = 50) -> None:
+        """
+        Initialize the CrawlFrontier.
+
+        Args:
+            enabled (bool): When False, every request gets priority 0.
+            history_runs (int): Number of recent harvest runs the tile yields are computed over.
+            stale_days (int): Days after which a listing is as stale as a listing never scraped.
+            registration_boost (int): Priority added to listings without a registration number.
+        """
+        self.enabled = enabled
+        self.history_runs = history_runs
+        self.stale_days = stale_days
+        self.registration_boost = registration_boost
+        self.today = date.today()
+        self.tile_yields = {}
+        self.max_yield = 0.0
+        # Last scrape date and registration of the listings scraped in the last `stale_days`, by listing id
+        self.listings = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(enabled=settings.getbool('FRONTIER_ENABLED', True),
+                   history_runs=settings.getint('FRONTIER_HISTORY_RUNS', 5),
+                   stale_days=settings.getint('FRONTIER_STALE_DAYS', 30),
+                   registration_boost=settings.getint('FRONTIER_REGISTRATION_BOOST', 50))
+
+    def load(self, today: date = None) -> None:
+        """
+        Load the tile yields and the listings history from the database, once per crawl.
+
+        The priorities stay neutral if the history can't be loaded.
+
+        Args:
+            today (date, optional): The date of the crawl. If None, uses the current date.
+        """
+        if not self.enabled:
+            return
+        self.today = today or date.today()
+        try:
+            self.tile_yields = self._load_tile_yields()
+            self.listings = self._load_listings()
+        except DatabaseError as e:
+            logger.warning(f"Crawl frontier history not loaded, priorities are neutral: {e}")
+            self.tile_yields, self.listings = {}, {}
+        self.max_yield = max(self.tile_yields.values(), default=0.0)
+        logger.info(f"Crawl frontier loaded: {len(self.tile_yields)} tiles, {len(self.listings)} listings")
+
+    def _load_tile_yields(self) -> dict:
+        # Imported here, the models need the Django apps to be loaded
+        from listings.listing_models import HarvestRun, TileMetric
+
+        runs = HarvestRun.objects.order_by('-started_at').values_list('pk', flat=True)[:self.history_runs]
+        totals = (TileMetric.objects.filter(run__in=list(runs)).values('tile_index')
+                  .annotate(new_listings=Sum('new_listings'), requests=Sum('requests')))
+        return {total['tile_index']: total['new_listings'] / total['requests']
+                for total in totals if total['requests']}
+
+    def _load_listings(self) -> dict:
+        from listings.listing_models import Listing
+
+        listings = {}
+        rows = (Listing.objects.filter(scrapped_at__gte=self.today - timedelta(days=self.stale_days))
+                .order_by('scrapped_at').values_list('airbnb_listing_id', 'scrapped_at', 'registration_number'))
+        for listing_id, scrapped_at, registration_number in rows.iterator(chunk_size=5000):
+            # The column stores a timestamp, whatever the model says
+            if isinstance(scrapped_at, datetime):
+                scrapped_at = scrapped_at.date()
+            listings[listing_id] = (scrapped_at, bool(registration_number))
+        return listings
+
+    def tile_priority(self, tile_index: int) -> int:
+        """
+        Get the priority of the search requests of a tile.
+
+        Args:
+            tile_index (int): The index of the tile in the coordinates grid.
+
+        Returns:
+            int: The priority, from 0 to MAX_TILE_PRIORITY.
+        """
+        if not self.enabled or not self.max_yield:
+            return 0
+        tile_yield = self.tile_yields.get(tile_index)
+        if tile_yield is None:
+            return self.MAX_TILE_PRIORITY // 2
+        return round(self.MAX_TILE_PRIORITY * tile_yield / self.max_yield)
+
+    def listing_priority(self, listing_id: str) -> int:
+        """
+        Get the priority of the details request of a listing.
+
+        Args:
+            listing_id (str): The Airbnb id of the listing.
+
+        Returns:
+            int: The priority, from LISTING_BASE_PRIORITY up.
+        """
+        if not self.enabled:
+            return 0
+        history = self.listings.get(listing_id)
+        if history is None:
+            return self.LISTING_BASE_PRIORITY + 100 + self.registration_boost
+        scrapped_at, registered = history
+        staleness = min(max((self.today - scrapped_at).days, 0), self.stale_days) / self.stale_days
+        return self.LISTING_BASE_PRIORITY + round(100 * staleness) + (0 if registered else self.registration_boost)
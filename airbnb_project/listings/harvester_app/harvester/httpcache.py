@@ -0,0 +1,78 @@
+"""
+HTTP cache of the harvester, to rerun harvests without downloading the same responses again.
+"""
+from email.utils import formatdate
+from time import time
+
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.extensions.httpcache import RFC2616Policy
+from scrapy.http import Response
+
+
+class EndpointTTLPolicy(RFC2616Policy):
+    """
+    Cache policy with a time to live per Airbnb endpoint instead of the server cache headers.
+
+    Search pages expire after `HARVEST_CACHE_SEARCH_TTL` seconds and listing details after
+    `HARVEST_CACHE_LISTING_TTL` seconds. An expired response is revalidated with `If-None-Match`
+    and `If-Modified-Since` when it has an `ETag` or a `Last-Modified` header, and reused if the
+    server answers 304 Not Modified. Only 200 responses are stored.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.search_ttl = settings.getint('HARVEST_CACHE_SEARCH_TTL', 3600)
+        self.listing_ttl = settings.getint('HARVEST_CACHE_LISTING_TTL', 7 * 24 * 3600)
+
+    def ttl(self, request):
+        """
+        Get the time to live of the cached response of a request.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            int: Seconds the cached response is fresh for.
+        """
+        return self.listing_ttl if 'airbnb_params' in request.meta else self.search_ttl
+
+    def should_cache_response(self, response, request):
+        return response.status == 200 and super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        if self._compute_current_age(cachedresponse, request, time()) < self.ttl(request):
+            return True
+        self._set_conditional_validators(request, cachedresponse)
+        return False
+
+
+class HarvestCacheMiddleware(HttpCacheMiddleware):
+    """
+    HttpCacheMiddleware reporting the bytes it saved and its hit ratio in the crawl stats.
+
+    A revalidated response is stored again with the date of the 304 response, so that its
+    time to live starts over.
+    """
+
+    def process_request(self, request, spider):
+        cached = super().process_request(request, spider)
+        if isinstance(cached, Response):
+            self.stats.inc_value('httpcache/bytes_saved', len(cached.body), spider=spider)
+        return cached
+
+    def process_response(self, request, response, spider):
+        result = super().process_response(request, response, spider)
+        if result is not response and response.status == 304:
+            self.stats.inc_value('httpcache/bytes_saved', max(len(result.body) - len(response.body), 0),
+                                 spider=spider)
+            result.headers['Date'] = response.headers.get('Date') or formatdate(usegmt=True)
+            self.storage.store_response(spider, request, result)
+        return result
+
+    def spider_closed(self, spider):
+        super().spider_closed(spider)
+        hits = sum(self.stats.get_value(f'httpcache/{key}', 0, spider=spider) for key in ('hit', 'revalidate'))
+        lookups = hits + sum(self.stats.get_value(f'httpcache/{key}', 0, spider=spider)
+                             for key in ('miss', 'invalidate'))
+        if lookups:
+            self.stats.set_value('httpcache/hit_ratio', round(hits / lookups, 4), spider=spider)
@@ -1,3 +1,6 @@
+from dataclasses import asdict, dataclass, fields
+from operator import attrgetter
+
 import scrapy
 
 
@@ -51,3 +54,111 @@ class ExpandedAirBnBListingItem(AirBnBListingItem):
     beds = scrapy.Field()
     baths_text = scrapy.Field()
     bath_is_shared = scrapy.Field()
+
+
+# Listing model fields, in the order of ListingItem.as_row(), and the item field each one is read from
+LISTING_ROW_FIELDS = (
+    ('airbnb_listing_id', 'airbnb_listing_id'),
+    ('name', 'name'),
+    ('title', 'title'),
+    ('baths', 'baths'),
+    ('beds', 'beds'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+    ('person_capacity', 'person_capacity'),
+    ('registration_number', 'registration_number'),
+    ('room_type', 'room_type'),
+    ('location', 'location'),
+    ('is_bath_shared', 'bath_is_shared'),
+    ('baths_text', 'baths_text'),
+)
+_listing_row_getter = attrgetter(*(item_field for _, item_field in LISTING_ROW_FIELDS))
+
+
+@dataclass(slots=True)
+class ListingItem:
+    """
+    Slotted item representing an expanded Airbnb listing, yielded by the spider.
+
+    It holds the same fields as ExpandedAirBnBListingItem without the per-item dict and
+    field metadata checks of scrapy.Item. Fields can be read and set by key like a dict,
+    so code written for the scrapy items keeps working, and `as_row()` gives the values
+    in the order of LISTING_ROW_FIELDS for bulk inserts.
+
+    Attributes:
+        airbnb_listing_id (str): The unique Airbnb listing ID.
+        title (str): The title of the listing.
+        name (str): The name of the listing.
+        registration_number (str): The registration number of the listing.
+        latitude (float): The latitude coordinate of the listing.
+        longitude (float): The longitude coordinate of the listing.
+        location (str): The specific location or neighborhood of the listing.
+        room_type (str): The type of room (e.g., entire home, private room).
+        person_capacity (int): The maximum number of guests the listing can accommodate.
+        baths (float): The number of bathrooms in the listing.
+        beds (float): The number of beds in the listing.
+        baths_text (str): Textual description of the bathroom facilities.
+        bath_is_shared (bool): Boolean indicating if the bathroom is shared.
+    """
+    airbnb_listing_id: str = None
+    title: str = None
+    name: str = None
+    registration_number: str = None
+    latitude: float = None
+    longitude: float = None
+    location: str = None
+    room_type: str = None
+    person_capacity: int = None
+    baths: float = None
+    beds: float = None
+    baths_text: str = None
+    bath_is_shared: bool = None
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(f"ListingItem does not support field: {key}")
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        """
+        Get the value of a field, like `dict.get`.
+
+        Args:
+            key (str): The field name.
+            default: Value returned if the field does not exist or is None.
+
+        Returns:
+            The value of the field, or `default`.
+        """
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def keys(self):
+        return [field.name for field in fields(self)]
+
+    def to_dict(self):
+        """
+        Convert the item to a dictionary, e.g. for logging or feed exports.
+
+        Returns:
+            dict: The fields of the item.
+        """
+        return asdict(self)
+
+    def as_row(self):
+        """
+        Get the values stored in a Listing row, in the order of LISTING_ROW_FIELDS.
+
+        Returns:
+            tuple: The values of the item.
+        """
+        return _listing_row_getter(self)
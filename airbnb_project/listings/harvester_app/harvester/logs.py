@@ -0,0 +1,170 @@
+"""
+Logging of the harvester hot paths: rate limited per message key, with counters and samples of the error payloads.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+
+class HarvestLog:
+    """
+    Log the repeated events of a crawl, e.g. a listing that can't be parsed, without flooding the logs.
+
+    Every event has a key, e.g. 'parsing.missing_listing_id'. At most `burst` messages of a key are logged
+    every `interval` seconds, the following ones are counted and summarized in a single line once the
+    interval is over. Every event is counted in the `log/<key>` stat. The payload of an event, e.g. the
+    search result missing an id, is kept as is in a ring buffer of the last `samples` payloads and only
+    serialized when the samples are written, at the end of the crawl.
+    """
+
+    def __init__(self, interval: float = 60.0, burst: int = 5, samples: int = 50,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the HarvestLog.
+
+        Args:
+            interval (float): Seconds of a rate limiting window.
+            burst (int): Messages logged per key and window.
+            samples (int): Number of payloads kept.
+            clock (Callable[[], float]): Monotonic clock.
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats = None
+        self.counts = Counter()
+        self.configure(interval=interval, burst=burst, samples=samples)
+
+    def configure(self, stats=None, interval: float = 60.0, burst: int = 5, samples: int = 50) -> None:
+        """
+        Set the limits and the crawl stats, and forget the events of the previous crawl.
+
+        Args:
+            stats (StatsCollector, optional): The crawler stats the events are counted in.
+            interval (float): Seconds of a rate limiting window.
+            burst (int): Messages logged per key and window.
+            samples (int): Number of payloads kept.
+        """
+        with self._lock:
+            self.stats = stats
+            self.interval = interval
+            self.burst = burst
+            self.samples = deque(maxlen=max(samples, 0))
+            self.counts = Counter()
+            # Start, logged and suppressed messages of the current window, logger and level, by key
+            self._windows = {}
+
+    def log(self, logger: logging.Logger, key: str, message: str, *args, level: int = logging.WARNING,
+            payload: Any = None, exc_info=None) -> bool:
+        """
+        Log an event, unless its key already reached its burst in the current window.
+
+        Args:
+            logger (logging.Logger): The logger of the message.
+            key (str): The key of the event, also the name of its stat.
+            message (str): The message, formatted with `args` only when it is logged.
+            *args: The arguments of the message.
+            level (int): The level of the message.
+            payload (Any, optional): Data of the event kept in the samples, e.g. the item that failed.
+            exc_info (optional): The exception info of the message.
+
+        Returns:
+            bool: Whether the message was logged.
+        """
+        now = self._clock()
+        summary = None
+        with self._lock:
+            self.counts[key] += 1
+            if payload is not None and self.samples.maxlen:
+                self.samples.append((datetime.now(timezone.utc), key, message, args, payload))
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is not None and window[2]:
+                    summary = window
+                window = self._windows[key] = [now, 0, 0, logger, level]
+            if window[1] < self.burst:
+                window[1] += 1
+                logged = True
+            else:
+                window[2] += 1
+                logged = False
+        if self.stats is not None:
+            self.stats.inc_value(f'log/{key}')
+        if summary is not None:
+            self._log_summary(key, summary)
+        if logged and logger.isEnabledFor(level):
+            logger.log(level, message, *args, exc_info=exc_info, extra={'event': key})
+        return logged
+
+    def _log_summary(self, key: str, window: list) -> None:
+        _, _, suppressed, logger, level = window
+        logger.log(level, "%d more '%s' messages in the last %g s", suppressed, key, self.interval,
+                   extra={'event': key, 'suppressed': suppressed})
+        if self.stats is not None:
+            self.stats.inc_value('log/suppressed', suppressed)
+
+    def flush(self) -> None:
+        """
+        Summarize the messages suppressed in the current windows.
+        """
+        with self._lock:
+            windows = [(key, window) for key, window in self._windows.items() if window[2]]
+            self._windows = {}
+        for key, window in windows:
+            self._log_summary(key, window)
+
+    def write_samples(self, path: str) -> int:
+        """
+        Write the sampled payloads as JSON lines.
+
+        Args:
+            path (str): The samples file, appended to.
+
+        Returns:
+            int: Number of samples written.
+        """
+        with self._lock:
+            samples = list(self.samples)
+            self.samples.clear()
+        if not samples:
+            return 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a') as samples_file:
+            for logged_at, key, message, args, payload in samples:
+                try:
+                    message = message % args if args else message
+                except (TypeError, ValueError):
+                    pass
+                samples_file.write(json.dumps({'logged_at': logged_at.isoformat(), 'event': key, 'message': message,
+                                               'payload': payload}, default=str) + '\n')
+        return len(samples)
+
+
+class JsonLogFormatter(logging.Formatter):
+    """
+    Format the log records as JSON objects, with the event key and the fields of the HarvestLog messages.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in ('event', 'suppressed'):
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# Log of the current crawl, configured by the HarvestLogReporter extension
+harvest_log = HarvestLog()
@@ -2,7 +2,13 @@
 #
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
+import logging
+
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from listings.harvester_app.harvester.archive import ResponseArchive
+from listings.harvester_app.harvester.logs import harvest_log
 
 """
 Template for middleware class that can be used to define custom middlewares
@@ -54,3 +60,69 @@ class AirbnbListingsDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ResponseArchiveMiddleware:
+    """
+    Downloader middleware archiving the body of every successful search and listing details response.
+
+    Enabled by the `RESPONSE_ARCHIVE_DIR` setting, the archive can then be parsed again with the
+    `reparse_archive` management command, e.g. after a change of the Airbnb JSON or to extract a new field.
+    It must run after HttpCompressionMiddleware (order < 590) to archive decompressed bodies.
+    """
+
+    def __init__(self, archive, stats=None, fingerprinter=None):
+        """
+        Initialize the ResponseArchiveMiddleware.
+
+        Args:
+            archive (ResponseArchive): The archive the responses are written to.
+            stats (StatsCollector, optional): The crawler stats.
+            fingerprinter (RequestFingerprinter, optional): The crawler request fingerprinter.
+        """
+        self.archive = archive
+        self.stats = stats
+        self.fingerprinter = fingerprinter
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        directory = crawler.settings.get('RESPONSE_ARCHIVE_DIR')
+        if not directory:
+            raise NotConfigured("RESPONSE_ARCHIVE_DIR is not set")
+        archive = ResponseArchive(
+            directory,
+            segment_max_bytes=crawler.settings.getint('RESPONSE_ARCHIVE_SEGMENT_SIZE', 256 * 1024 * 1024),
+            compression_level=crawler.settings.getint('RESPONSE_ARCHIVE_COMPRESSION_LEVEL', 3),
+        )
+        middleware = cls(archive, crawler.stats, crawler.request_fingerprinter)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_response(self, request, response, spider):
+        if response.status != 200 or 'cached' in response.flags or request.meta.get('skip_response_archive'):
+            return response
+        airbnb_params = request.meta.get('airbnb_params')
+        kind = 'listing' if airbnb_params is not None else 'search'
+        try:
+            _, written = self.archive.store(
+                url=request.url,
+                fingerprint=self.fingerprinter.fingerprint(request).hex(),
+                kind=kind,
+                status=response.status,
+                body=response.body,
+                meta={'airbnb_params': airbnb_params} if airbnb_params is not None else {},
+            )
+        except Exception as e:
+            harvest_log.log(spider.logger, 'archive.store_error', "Failed to archive response of %s: %s",
+                            request.url, e, level=logging.ERROR)
+            return response
+        if self.stats is not None:
+            self.stats.inc_value(f'response_archive/{kind}')
+            if written:
+                self.stats.inc_value('response_archive/bytes', len(response.body))
+            else:
+                self.stats.inc_value('response_archive/deduplicated')
+        return response
+
+    def spider_closed(self, spider):
+        self.archive.close()
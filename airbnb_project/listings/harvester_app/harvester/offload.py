@@ -0,0 +1,93 @@
+"""
+Offloading of the CPU-heavy parsing out of the Twisted reactor thread during live crawls.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+from twisted.internet import defer, reactor, threads
+from twisted.python.failure import Failure
+
+OFFLOAD_MODES = ('none', 'thread', 'process')
+
+
+class ParseOffloader:
+    """
+    Run parsing functions inline, in the reactor thread pool or in a process pool, returning Deferreds.
+
+    In 'thread' mode the functions still hold the GIL while decoding JSON, but the reactor gets
+    the GIL back every switch interval, so downloads keep progressing during a long decode. In
+    'process' mode the decoding runs in parallel on other cores and only the small extracted
+    dicts and items come back, pickled, to the reactor thread.
+    """
+
+    def __init__(self, mode: str = 'none', workers: int = None) -> None:
+        """
+        Initialize the ParseOffloader.
+
+        Args:
+            mode (str): 'none' to parse in the reactor thread, 'thread' or 'process'.
+            workers (int, optional): Number of processes in 'process' mode, defaults to the number of CPUs.
+
+        Raises:
+            ValueError: If the mode is not one of OFFLOAD_MODES.
+        """
+        if mode not in OFFLOAD_MODES:
+            raise ValueError(f"Invalid PARSE_OFFLOAD mode: {mode}, expected one of {OFFLOAD_MODES}")
+        self.mode = mode
+        self.workers = workers
+        self._executor = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'none'
+
+    def run(self, function: Callable, *args) -> defer.Deferred:
+        """
+        Run a function according to the offload mode.
+
+        Args:
+            function (Callable): The function, picklable with its arguments in 'process' mode.
+            *args: The arguments of the function.
+
+        Returns:
+            Deferred: Fired with the result of the function in the reactor thread.
+        """
+        if self.mode == 'thread':
+            return threads.deferToThread(function, *args)
+        if self.mode == 'process':
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._future_to_deferred(self._executor.submit(function, *args))
+        return defer.maybeDeferred(function, *args)
+
+    @staticmethod
+    def _future_to_deferred(future: Future) -> defer.Deferred:
+        """
+        Wrap a concurrent future in a Deferred fired in the reactor thread, whatever the reactor.
+
+        Args:
+            future (Future): The future of the process pool.
+
+        Returns:
+            Deferred: Fired with the result of the future.
+        """
+        deferred = defer.Deferred()
+
+        def done(completed: Future) -> None:
+            try:
+                result = completed.result()
+            except BaseException as e:
+                reactor.callFromThread(deferred.errback, Failure(e))
+            else:
+                reactor.callFromThread(deferred.callback, result)
+
+        future.add_done_callback(done)
+        return deferred
+
+    def close(self) -> None:
+        """
+        Shut the process pool down.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
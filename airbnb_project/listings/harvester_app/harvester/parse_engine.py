@@ -0,0 +1,311 @@
+"""
+Offline parse engine of the response archive.
+
+The pure parsing functions of `parsing` run over the archived response bodies in a pool of
+processes, which only send back the small extracted dicts and items. The items are streamed,
+chunk by chunk, to the item pipelines of the harvester (data cleaner and bulk ingest), without network.
+"""
+import logging
+import math
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+from scrapy.crawler import Crawler
+from scrapy.settings import Settings
+from scrapy.utils.misc import build_from_crawler, load_object
+
+from listings.harvester_app.harvester import parsing
+from listings.harvester_app.harvester.archive import ResponseArchive
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.logs import harvest_log
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+
+logger = logging.getLogger(__name__)
+
+
+def create_spider(**overrides) -> ListingsSpider:
+    """
+    Create a ListingsSpider bound to a crawler configured with the harvester settings, which is never started.
+
+    Args:
+        **overrides: Settings overriding the harvester settings.
+
+    Returns:
+        ListingsSpider: The spider.
+    """
+    settings = Settings(get_harvester_settings())
+    settings.setdict(overrides, priority='cmdline')
+    return ListingsSpider.from_crawler(Crawler(ListingsSpider, settings))
+
+
+def open_pipelines(spider: ListingsSpider) -> list:
+    """
+    Create and open the item pipelines of the spider settings, in order.
+
+    Args:
+        spider (ListingsSpider): The spider.
+
+    Returns:
+        list: The opened pipelines.
+    """
+    pipelines = []
+    for path, _ in sorted(spider.settings.getdict('ITEM_PIPELINES').items(), key=lambda pipeline: pipeline[1]):
+        pipeline = build_from_crawler(load_object(path), spider.crawler)
+        if hasattr(pipeline, 'open_spider'):
+            pipeline.open_spider(spider)
+        pipelines.append(pipeline)
+    return pipelines
+
+
+def process_batch(pipelines: list, items: list, spider: ListingsSpider) -> list:
+    """
+    Send a batch of items through the item pipelines, using their batch method when they have one.
+
+    Args:
+        pipelines (list): The opened pipelines.
+        items (list): The items.
+        spider (ListingsSpider): The spider.
+
+    Returns:
+        list: The processed items.
+    """
+    for pipeline in pipelines:
+        if hasattr(pipeline, 'process_items'):
+            items = pipeline.process_items(items)
+        else:
+            items = [pipeline.process_item(item, spider) for item in items]
+    return items
+
+
+def parse_search_chunk(archive_directory: str, entries: list, script_tag: str) -> dict:
+    """
+    Parse a chunk of archived search pages.
+
+    Args:
+        archive_directory (str): Root directory of the archive.
+        entries (list): The ArchiveEntry of the search pages.
+        script_tag (str): The id of the script tag holding the search JSON.
+
+    Returns:
+        dict: The search data of the listings of the pages, by Airbnb listing id.
+    """
+    archive = ResponseArchive(archive_directory)
+    listings = {}
+    try:
+        for entry in entries:
+            try:
+                page_listings, _ = parsing.parse_search_page(archive.read(entry.digest), script_tag)
+            except Exception as e:
+                harvest_log.log(logger, 'parse_engine.search_page_error', "Failed to parse archived search page %s: %s",
+                                entry.url, e, level=logging.ERROR)
+                continue
+            for listing_data in page_listings:
+                listings[listing_data['airbnb_listing_id']] = listing_data
+    finally:
+        archive.close()
+    return listings
+
+
+def parse_listing_chunk(archive_directory: str, entries: list, search_params: dict) -> tuple[list, int]:
+    """
+    Parse a chunk of archived listing details.
+
+    Args:
+        archive_directory (str): Root directory of the archive.
+        entries (list): The ArchiveEntry of the listing details.
+        search_params (dict): The search data of the listings from the re-parsed search pages,
+            used instead of the archived `airbnb_params` when available.
+
+    Returns:
+        tuple[list, int]: The ListingItem of the listings and the number of responses that could not be read.
+    """
+    archive = ResponseArchive(archive_directory)
+    items = []
+    errors = 0
+    try:
+        for entry in entries:
+            airbnb_params = entry.meta.get('airbnb_params') or {}
+            airbnb_params = search_params.get(airbnb_params.get('airbnb_listing_id'), airbnb_params)
+            try:
+                items.append(parsing.parse_listing_details(archive.read(entry.digest), airbnb_params))
+            except Exception as e:
+                errors += 1
+                harvest_log.log(logger, 'parse_engine.listing_error', "Failed to parse archived listing %s: %s",
+                                entry.url, e, level=logging.ERROR)
+    finally:
+        archive.close()
+    return items, errors
+
+
+class ParseEngine:
+    """
+    Parse the response archive in a pool of processes.
+
+    Entries are split in chunks of about the same size, several per process so that the work
+    spreads evenly, and at most two chunks per process are in flight so that results are
+    streamed to the caller as soon as they are ready without piling up in memory.
+    """
+    CHUNKS_PER_WORKER = 4
+    MAX_CHUNK_SIZE = 500
+
+    def __init__(self, archive_directory: str, workers: int = None, chunk_size: int = None,
+                 script_tag: str = parsing.DEFAULT_SCRIPT_TAG) -> None:
+        """
+        Initialize the ParseEngine.
+
+        Args:
+            archive_directory (str): Root directory of the archive.
+            workers (int, optional): Number of processes, defaults to the number of CPUs. 0 parses in this process.
+            chunk_size (int, optional): Number of responses parsed by a process at once, computed from the
+                number of entries and processes by default.
+            script_tag (str): The id of the script tag holding the search JSON.
+        """
+        self.archive_directory = archive_directory
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.script_tag = script_tag
+        self.errors = 0
+        self._executor = None
+
+    def __enter__(self) -> "ParseEngine":
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def chunks(self, entries: list) -> list[list]:
+        """
+        Split entries in chunks.
+
+        Args:
+            entries (list): The entries.
+
+        Returns:
+            list[list]: The chunks.
+        """
+        if not entries:
+            return []
+        chunk_size = self.chunk_size or min(
+            self.MAX_CHUNK_SIZE, math.ceil(len(entries) / (max(self.workers, 1) * self.CHUNKS_PER_WORKER)))
+        return [entries[start:start + chunk_size] for start in range(0, len(entries), chunk_size)]
+
+    def _map(self, function: Callable, chunks: list, *arguments) -> Iterator:
+        """
+        Apply a function to every chunk, in the pool if there is one, yielding the results in order.
+
+        Args:
+            function (Callable): The function, called with the archive directory, the chunk and `arguments`.
+            chunks (list): The chunks.
+            *arguments: Additional arguments of the function.
+
+        Yields:
+            The result of each chunk.
+        """
+        if self._executor is None:
+            for chunk in chunks:
+                yield function(self.archive_directory, chunk, *arguments)
+            return
+        pending = deque()
+        chunks = iter(chunks)
+        for chunk in chunks:
+            pending.append(self._executor.submit(function, self.archive_directory, chunk, *arguments))
+            if len(pending) >= self.workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def parse_search_pages(self, entries: list) -> dict:
+        """
+        Parse archived search pages.
+
+        Args:
+            entries (list): The ArchiveEntry of the search pages.
+
+        Returns:
+            dict: The search data of the listings, by Airbnb listing id.
+        """
+        listings = {}
+        for chunk_listings in self._map(parse_search_chunk, self.chunks(entries), self.script_tag):
+            listings.update(chunk_listings)
+        return listings
+
+    def iter_listing_items(self, entries: list, search_params: dict = None) -> Iterator[list]:
+        """
+        Parse archived listing details, yielding the items of each chunk as soon as it is parsed.
+
+        Args:
+            entries (list): The ArchiveEntry of the listing details.
+            search_params (dict, optional): The search data of the listings by Airbnb listing id.
+
+        Yields:
+            list: The ListingItem of a chunk.
+        """
+        for items, errors in self._map(parse_listing_chunk, self.chunks(entries), search_params or {}):
+            self.errors += errors
+            yield items
+
+    def run(self, since: str = None, until: str = None) -> dict:
+        """
+        Parse the archived responses of a date range and send the items through the item pipelines.
+
+        The search pages of each date are parsed first, then the listing details of that date are
+        parsed and ingested with the date as scrape date.
+
+        Args:
+            since (str, optional): First ISO date to parse.
+            until (str, optional): Last ISO date to parse.
+
+        Returns:
+            dict: The number of parsed dates, search pages, listing responses, items and errors.
+        """
+        archive = ResponseArchive(self.archive_directory)
+        entries_by_date = defaultdict(lambda: {'search': [], 'listing': []})
+        for entry in archive.entries(since=since, until=until):
+            entries_by_date[entry.archived_on][entry.kind].append(entry)
+        archive.close()
+
+        summary = {'dates': 0, 'search_pages': 0, 'responses': 0, 'items': 0, 'errors': 0}
+        for archived_on, entries in sorted(entries_by_date.items()):
+            search_params = self.parse_search_pages(entries['search'])
+            spider = create_spider(LISTINGS_SCRAPPED_AT=archived_on)
+            pipelines = open_pipelines(spider)
+            errors = self.errors
+            try:
+                for items in self.iter_listing_items(entries['listing'], search_params):
+                    summary['items'] += len(process_batch(pipelines, items, spider))
+            finally:
+                for pipeline in pipelines:
+                    if hasattr(pipeline, 'close_spider'):
+                        pipeline.close_spider(spider)
+            summary['dates'] += 1
+            summary['search_pages'] += len(entries['search'])
+            summary['responses'] += len(entries['listing']) - (self.errors - errors)
+            logger.info(f"Parsed {len(entries['search'])} search pages and {len(entries['listing'])} "
+                        f"listing responses archived on {archived_on}")
+        summary['errors'] = self.errors
+        return summary
+
+
+def reparse_archive(archive_directory: str, since: str = None, until: str = None, workers: int = None,
+                    chunk_size: int = None) -> dict:
+    """
+    Parse the archived responses of a date range again and save the listings.
+
+    Args:
+        archive_directory (str): Root directory of the archive.
+        since (str, optional): First ISO date to parse.
+        until (str, optional): Last ISO date to parse.
+        workers (int, optional): Number of processes, defaults to the number of CPUs. 0 parses in this process.
+        chunk_size (int, optional): Number of responses parsed by a process at once.
+
+    Returns:
+        dict: The number of parsed dates, search pages, listing responses, items and errors.
+    """
+    with ParseEngine(archive_directory, workers=workers, chunk_size=chunk_size) as engine:
+        return engine.run(since=since, until=until)
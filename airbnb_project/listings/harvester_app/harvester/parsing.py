@@ -0,0 +1,281 @@
+"""
+Pure parsing functions of the Airbnb responses, over the raw response bodies.
+
+They hold the parsing logic of ListingsSpider so that it can also run outside of the crawl,
+e.g. in a process pool over the response archive, and return only small dicts and items.
+"""
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from listings.harvester_app.harvester.items import ListingItem
+from listings.harvester_app.harvester.logs import harvest_log
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRIPT_TAG = "data-deferred-state-0"
+
+
+@lru_cache(maxsize=8)
+def _script_tag_pattern(script_tag: str) -> re.Pattern:
+    return re.compile(rb'<script[^>]*\bid="' + re.escape(script_tag.encode()) + rb'"[^>]*>(.*?)</script>', re.DOTALL)
+
+
+def safe_get(data, *keys, default=None):
+    """
+    Safely retrieve a nested value from a dictionary or a list.
+
+    Args:
+        data: The dictionary or list to retrieve the value from.
+        keys (tuple): The keys or indexes to navigate the nested structure.
+        default: The default value to return if the keys are not found.
+
+    Returns:
+        The value at the specified nested key or the default value.
+    """
+    try:
+        for key in keys:
+            data = data[key]
+        return data
+    except (KeyError, IndexError, TypeError):
+        return default
+
+
+def extract_script_json(body: bytes, script_tag: str = DEFAULT_SCRIPT_TAG) -> Dict[str, Any]:
+    """
+    Extract the JSON data of the script tag of a search results page.
+
+    Args:
+        body (bytes): The HTML page.
+        script_tag (str): The id of the script tag.
+
+    Returns:
+        Dict[str, Any]: The parsed JSON data from the script tag.
+
+    Raises:
+        ValueError: If the page has no such script tag or its content is not valid JSON.
+    """
+    match = _script_tag_pattern(script_tag).search(body)
+    if match is None:
+        raise ValueError(f"Script tag {script_tag} not found")
+    return json.loads(match.group(1))
+
+
+def get_search_results(search_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Get the listings of the search JSON.
+
+    Args:
+        search_json (dict): The JSON data of a search results page.
+
+    Returns:
+        list: The search results.
+    """
+    return safe_get(search_json, "niobeMinimalClientData", 0, 1, "data", "presentation", "staysSearch",
+                    "results", "searchResults", default=[])
+
+
+def get_page_cursors(search_json: Dict[str, Any]) -> List[str]:
+    """
+    Get the pagination cursors of the search JSON.
+
+    Args:
+        search_json (dict): The JSON data of a search results page.
+
+    Returns:
+        list: The pagination cursors.
+    """
+    return safe_get(search_json, "niobeMinimalClientData", 0, 1, "data", "presentation", "staysSearch",
+                    "results", "paginationInfo", "pageCursors", default=[])
+
+
+def extract_listing_data(result: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    Extract the search data of a single listing result.
+
+    Args:
+        result (Dict[str, Any]): The dictionary containing listing information.
+
+    Returns:
+        Dict[str, Any]: The listing data, or None if the result has no listing id.
+    """
+    listing = result.get("listing", {})
+    listing_id: str = listing.get("id")
+
+    if not listing_id:
+        harvest_log.log(logger, 'parsing.missing_listing_id', "Missing listing ID in a search result", payload=result)
+        return None
+
+    return {
+        "airbnb_listing_id": listing_id,
+        "title": listing.get("title", ""),
+        "name": listing.get("name", ""),
+        "latitude": listing.get("coordinate", {}).get("latitude", ""),
+        "longitude": listing.get("coordinate", {}).get("longitude", ""),
+        "room_type": listing.get("roomTypeCategory", "")
+    }
+
+
+def parse_search_page(body: bytes, script_tag: str = DEFAULT_SCRIPT_TAG) -> tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Parse a search results page.
+
+    Args:
+        body (bytes): The HTML page.
+        script_tag (str): The id of the script tag holding the search JSON.
+
+    Returns:
+        tuple: The data of the listings of the page and the pagination cursors of the search.
+    """
+    search_json = extract_script_json(body, script_tag)
+    listings = []
+    for result in get_search_results(search_json):
+        try:
+            listing_data = extract_listing_data(result)
+        except Exception as e:
+            harvest_log.log(logger, 'parsing.search_result_error', "Exception processing listing: %s", e,
+                            payload=result)
+            continue
+        if listing_data:
+            listings.append(listing_data)
+    return listings, get_page_cursors(search_json)
+
+
+def parse_capacity_and_location(details_json: Dict[str, Any], listing_item) -> None:
+    """
+    Extract the room capacity and location (City) of the listing from the listing details JSON.
+
+    Args:
+        details_json (dict): The JSON data of the listing details.
+        listing_item (ListingItem | dict): The listing, where parsed data will be stored.
+    """
+    location = ""
+    person_capacity = ""
+    try:
+        metadata = safe_get(details_json, "data", "presentation", "stayProductDetailPage", "sections", "metadata")
+        if metadata is not None:
+            sharing_config = metadata.get("sharingConfig", {})
+            location = sharing_config.get("location", "")
+            person_capacity = sharing_config.get("personCapacity", "")
+    except Exception as e:
+        harvest_log.log(logger, 'parsing.capacity_and_location_error', "Failed to parse capacity and location: %s", e)
+    finally:
+        listing_item['location'] = location
+        listing_item['person_capacity'] = person_capacity
+
+
+def parse_listings_number(details_json: Dict[str, Any], listing_item) -> None:
+    """
+    Extract the registration number, number of beds, and number of baths from the listing details JSON.
+
+    Args:
+        details_json (dict): The JSON data of the listing details.
+        listing_item (ListingItem | dict): The listing, where parsed data will be stored.
+    """
+    registration_number = ""
+    number_of_beds = ""
+    number_of_baths = ""
+    try:
+        sections = safe_get(details_json, "data", "presentation", "stayProductDetailPage", "sections", "sections",
+                            default=[])
+        for section in sections:
+            if section.get("sectionComponentType") == "PDP_DESCRIPTION_MODAL":
+                items = section.get("section", {}).get("items", [])
+                for item in items:
+                    if item.get("title") == "Registration number":
+                        registration_number = item.get("html", "").get("htmlText", "")
+            if section.get("sectionComponentType") == "AVAILABILITY_CALENDAR_DEFAULT":
+                items = section.get("section", {}).get("descriptionItems", [])
+                for item in items:
+                    title = item.get("title", "")
+                    if "bed" in title:
+                        number_of_beds = title
+                    if "bath" in title:
+                        number_of_baths = title
+    except Exception as e:
+        harvest_log.log(logger, 'parsing.listing_numbers_error', "Failed to parse listing numbers: %s", e)
+    finally:
+        listing_item["beds"] = number_of_beds
+        listing_item["baths_text"] = number_of_baths
+        listing_item["registration_number"] = registration_number
+
+
+def new_listing_item(airbnb_params: Dict[str, Any]) -> ListingItem:
+    """
+    Create the item of a listing from its search data.
+
+    Args:
+        airbnb_params (dict): The listing data extracted from the search results.
+
+    Returns:
+        ListingItem: The item, without the listing details.
+    """
+    return ListingItem(
+        airbnb_listing_id=airbnb_params.get('airbnb_listing_id'),
+        title=airbnb_params.get('title'),
+        name=airbnb_params.get('name'),
+        latitude=airbnb_params.get('latitude'),
+        longitude=airbnb_params.get('longitude'),
+        room_type=airbnb_params.get('room_type')
+    )
+
+
+def listing_details_error(details_json: Any) -> str | None:
+    """
+    Tell why a listing details response holds no details: the API answered with errors instead of data.
+
+    Args:
+        details_json: The decoded JSON response.
+
+    Returns:
+        str | None: The reason, or None if the response holds the details.
+    """
+    if not isinstance(details_json, dict):
+        return "Unexpected listing details"
+    errors = details_json.get("errors")
+    if errors and not details_json.get("data"):
+        return f"API error: {safe_get(errors, 0, 'message', default='unknown')}"
+    return None
+
+
+def parse_listing_response(body: bytes, airbnb_params: Dict[str, Any]) -> tuple[ListingItem, str | None]:
+    """
+    Parse a listing details (StaysPdpSections) response, telling whether it could be parsed.
+
+    Args:
+        body (bytes): The JSON response.
+        airbnb_params (dict): The listing data extracted from the search results.
+
+    Returns:
+        tuple: The listing, and why its details are missing or None. A listing whose details are missing
+        only holds its search data.
+    """
+    listing_item = new_listing_item(airbnb_params)
+    try:
+        details_json = json.loads(body)
+    except ValueError as e:
+        harvest_log.log(logger, 'parsing.invalid_listing_details', "Invalid listing details of %s: %s",
+                        listing_item.airbnb_listing_id, e, payload=body[:2048])
+        return listing_item, f"Invalid JSON: {e}"
+    error = listing_details_error(details_json)
+    if error is not None:
+        return listing_item, error
+    parse_capacity_and_location(details_json, listing_item)
+    parse_listings_number(details_json, listing_item)
+    return listing_item, None
+
+
+def parse_listing_details(body: bytes, airbnb_params: Dict[str, Any]) -> ListingItem:
+    """
+    Parse a listing details (StaysPdpSections) response.
+
+    Args:
+        body (bytes): The JSON response.
+        airbnb_params (dict): The listing data extracted from the search results.
+
+    Returns:
+        ListingItem: The listing, with only its search data if the response cannot be parsed.
+    """
+    return parse_listing_response(body, airbnb_params)[0]
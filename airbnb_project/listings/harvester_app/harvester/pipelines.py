@@ -2,14 +2,116 @@
 #
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-import json
-# useful for handling different item types with a single interface
+import logging
 import re
+import time
+from datetime import datetime
+from functools import lru_cache
 
-from django.core.exceptions import ValidationError
-from itemadapter import ItemAdapter
+from airbnb_project.metrics import DB_BATCH_WRITE_LATENCY
+from airbnb_project.tracing import crawl_context, is_recording, tracer
+from listings.harvester_app.harvester.items import LISTING_ROW_FIELDS, ListingItem
+from listings.harvester_app.harvester.logs import harvest_log
+from listings.harvester_app.harvester.spool import ListingSpool, insert_new_listings, replay_spool
 from listings.listing_models import Listing
-from django.db.utils import IntegrityError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection, transaction
+from django.db.utils import IntegrityError, InterfaceError, OperationalError
+from django.utils import timezone
+
+
+# Patterns applied to the bed and bath descriptions that are not in the lookup tables
+BEDS_PATTERN = re.compile(r'^\d+')
+BATHS_PATTERN = re.compile(r'^\d+\.?\d*')
+HALF_BATH_PATTERN = re.compile(r'\bhalf-bath\b', re.IGNORECASE)
+
+# Listing columns in the order of the rows built by DjangoORMPipeline.listing_row
+LISTING_COLUMNS = tuple(column for column, _ in LISTING_ROW_FIELDS)
+
+# Errors of an unreachable or overloaded database (connection lost, lock timeout), as opposed to a bad row
+DATABASE_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+
+def _build_beds_lookup():
+    """
+    Build the lookup table of the bed descriptions used by Airbnb, e.g. "1 bed" or "3 beds".
+
+    Returns:
+        dict: Lower-cased description mapped to the number of beds.
+    """
+    table = {"": None}
+    for count in range(1, 51):
+        table[f"{count} {'bed' if count == 1 else 'beds'}"] = float(count)
+    return table
+
+
+def _build_baths_lookup():
+    """
+    Build the lookup table of the bath descriptions used by Airbnb, e.g. "1.5 shared baths" or "Half-bath".
+
+    Returns:
+        dict: Lower-cased description mapped to a tuple of the number of baths and whether the bath is shared.
+    """
+    table = {"": (None, False)}
+    kinds = (("", False), ("private ", False), ("shared ", True))
+    for half_baths in range(2, 41):
+        count = half_baths / 2
+        for kind, is_shared in kinds:
+            table[f"{count:g} {kind}{'bath' if count == 1 else 'baths'}"] = (count, is_shared)
+    for kind, is_shared in kinds:
+        table[f"{kind}half-bath"] = (0.5, is_shared)
+    return table
+
+
+def parse_scrapped_at(value):
+    """
+    Parse the `LISTINGS_SCRAPPED_AT` setting, used to backfill a historic crawl.
+
+    Args:
+        value (str): ISO 8601 date or datetime.
+
+    Returns:
+        datetime: The aware scrape date, or None if the value is empty.
+    """
+    if not value:
+        return None
+    scrapped_at = datetime.fromisoformat(value)
+    return timezone.make_aware(scrapped_at) if timezone.is_naive(scrapped_at) else scrapped_at
+
+
+@lru_cache(maxsize=1024)
+def _parse_beds(text):
+    """
+    Extract the number of beds from a description that is not in the lookup table.
+
+    Args:
+        text (str): The lower-cased bed description.
+
+    Returns:
+        float | None: The number of beds, or None if the description has no leading number.
+    """
+    match = BEDS_PATTERN.search(text)
+    return float(match.group()) if match else None
+
+
+@lru_cache(maxsize=1024)
+def _parse_baths(text):
+    """
+    Extract the number of baths and whether they are shared from a description that is not in the lookup table.
+
+    Args:
+        text (str): The lower-cased bath description.
+
+    Returns:
+        tuple: The number of baths (or None) and whether the bath is shared.
+    """
+    is_shared = "shared" in text
+    match = BATHS_PATTERN.search(text)
+    if match:
+        return float(match.group()), is_shared
+    if HALF_BATH_PATTERN.search(text):
+        return 0.5, is_shared
+    return None, is_shared
 
 
 class AirbnbListingsPipelineDataCleaner:
@@ -17,22 +119,29 @@ class AirbnbListingsPipelineDataCleaner:
     A pipeline for cleaning Airbnb listing data.
 
     This class processes items scraped by the spider, performing data cleaning
-    and transformation operations on specific fields.
+    and transformation operations on specific fields. The bed and bath descriptions
+    are resolved with lookup tables of the literal values Airbnb uses, falling back
+    to precompiled patterns for anything else.
 
     Attributes:
     - fields_to_lower_case (list): A list of field names to convert to lowercase.
+    - beds_lookup (dict): Known bed descriptions mapped to the number of beds.
+    - baths_lookup (dict): Known bath descriptions mapped to the number of baths and whether they are shared.
     """
 
     fields_to_lower_case = ["title", "name"]
+    beds_lookup = _build_beds_lookup()
+    baths_lookup = _build_baths_lookup()
 
     def process_item(self, item, spider):
         """
         Process an item from the spider.
 
         This method performs several data cleaning operations:
-        1. Extracts the number of beds from the 'beds' field.
-        2. Extracts the number of bathrooms from the 'baths_text' field.
-        3. Determines if the bathroom is shared based on the 'baths_text' field.
+        1. Converts the fields in `fields_to_lower_case` to lowercase.
+        2. Extracts the number of beds from the 'beds' field.
+        3. Extracts the number of bathrooms from the 'baths_text' field.
+        4. Determines if the bathroom is shared based on the 'baths_text' field.
 
         Args:
         - item (dict): The item to process, containing scraped Airbnb listing data.
@@ -41,69 +150,86 @@ class AirbnbListingsPipelineDataCleaner:
         Returns:
         - dict: The processed item with cleaned and transformed data.
         """
-        adapter = ItemAdapter(item)
-
-        self._extract_beds(adapter)
-        self._extract_bathrooms(adapter)
+        trace_context = crawl_context(spider)
+        if not is_recording(trace_context):
+            # Not even a no-op span, the cleaning takes a few microseconds per item
+            return self._clean(item)
+        with tracer.start_as_current_span('pipeline.clean', context=trace_context):
+            return self._clean(item)
 
+    def _clean(self, item):
+        self._lower_case_fields(item)
+        item['beds'] = self.normalize_beds(item.get('beds'))
+        item['baths'], item['bath_is_shared'] = self.normalize_baths(item.get('baths_text'))
         return item
 
-    def _extract_beds(self, adapter):
+    def process_items(self, items):
         """
-        Extract the number of beds from the 'beds' field.
+        Normalize a batch of items at once.
+
+        Each distinct bed and bath description of the batch is resolved once and
+        the results are assigned to every item sharing it.
 
         Args:
-        - adapter (ItemAdapter): The item adapter containing the listing data.
-        """
-        un_formatted_beds = adapter.get('beds')
-        beds = None
+        - items (list): The items to process.
 
-        pattern = r'^\d+'
-        try:
-            match = re.search(pattern, un_formatted_beds)
-            if match:
-                beds = match.group()
-            else:
-                beds = None
-        except Exception as e:
-            print(f"Error extracting beds: {e}")
+        Returns:
+        - list: The processed items.
+        """
+        beds = {text: self.normalize_beds(text) for text in {item.get('beds') for item in items}}
+        baths = {text: self.normalize_baths(text) for text in {item.get('baths_text') for item in items}}
+        for item in items:
+            self._lower_case_fields(item)
+            item['beds'] = beds[item.get('beds')]
+            item['baths'], item['bath_is_shared'] = baths[item.get('baths_text')]
+        return items
 
-        adapter['beds'] = beds
+    def _lower_case_fields(self, item):
+        """
+        Convert the fields in `fields_to_lower_case` to lowercase.
 
-    def _extract_bathrooms(self, adapter):
+        Args:
+        - item (dict): The item to process.
         """
-        Extract bathroom information from the 'baths_text' field.
+        for field in self.fields_to_lower_case:
+            value = item.get(field)
+            if isinstance(value, str):
+                item[field] = value.lower()
 
-        This method extracts the number of bathrooms and determines if the
-        bathroom is shared based on the 'baths_text' field.
+    def normalize_beds(self, un_formatted_beds):
+        """
+        Extract the number of beds from the 'beds' field.
 
         Args:
-        - adapter (ItemAdapter): The item adapter containing the listing data.
+        - un_formatted_beds (str): The bed description, e.g. "2 beds".
+
+        Returns:
+        - float: The number of beds, or None if it could not be extracted.
         """
-        un_formatted_bathrooms = adapter.get('baths_text')
-        bathroom = None
+        if not isinstance(un_formatted_beds, str):
+            return None
+        text = un_formatted_beds.strip().lower()
+        if text in self.beds_lookup:
+            return self.beds_lookup[text]
+        return _parse_beds(text)
 
-        pattern = r'^\d+\.?\d*'
-        pattern_two = r'(?i)\bhalf-bath\b'
-        try:
-            if "shared" in un_formatted_bathrooms:
-                adapter['bath_is_shared'] = True
-            else:
-                adapter['bath_is_shared'] = False
-
-            match = re.search(pattern, un_formatted_bathrooms)
-            if match:
-                bathroom = match.group()
-            else:
-                match = re.search(pattern_two, un_formatted_bathrooms)
-                if match:
-                    bathroom = 0.5
-                elif un_formatted_bathrooms.strip() == "":
-                    bathroom = None
-        except Exception as e:
-            print(f"Error extracting bathrooms: {e}")
+    def normalize_baths(self, un_formatted_bathrooms):
+        """
+        Extract bathroom information from the 'baths_text' field.
+
+        Args:
+        - un_formatted_bathrooms (str): The bath description, e.g. "1.5 shared baths".
 
-        adapter['baths'] = bathroom
+        Returns:
+        - tuple: The number of bathrooms (or None) and whether the bathroom is shared
+          (None if there is no description).
+        """
+        if not isinstance(un_formatted_bathrooms, str):
+            return None, None
+        text = un_formatted_bathrooms.strip().lower()
+        if text in self.baths_lookup:
+            return self.baths_lookup[text]
+        return _parse_baths(text)
 
 
 class DjangoORMPipeline:
@@ -115,14 +241,75 @@ class DjangoORMPipeline:
        All fields are required and must be present in the input item. The pipeline
        includes error handling for database integrity issues and logging capabilities
        for monitoring the data processing flow.
+
+       Listings are inserted in batches of `LISTINGS_DB_BATCH_SIZE` with `bulk_create`,
+       falling back to row-by-row saves when a batch fails. The remaining listings are
+       inserted when the spider closes. The listings already stored for the same scrape
+       date are skipped and counted by the `listings/already_stored` stat.
+
+       With a spool, the listings whose write fails because the database is unavailable are
+       appended to it instead of being dropped, and so are the following batches for
+       `retry_seconds`, without waiting on the database. The spool is replayed into the
+       database when the spider opens, or with the `replay_spool` command.
     """
 
+    def __init__(self, batch_size=1, scrapped_at=None, spool=None, retry_seconds=30.0, replay_on_open=False):
+        """
+        Initialize the DjangoORMPipeline.
+
+        Args:
+            batch_size (int): Number of listings inserted at once, 1 saves every listing as it arrives.
+            scrapped_at (datetime, optional): Scrape date stored with the listings instead of the model default.
+            spool (ListingSpool, optional): Spool of the listings not saved because the database is unavailable.
+            retry_seconds (float): Seconds the listings go straight to the spool after a database failure.
+            replay_on_open (bool): Whether to replay the spool into the database when the spider opens.
+        """
+        self.batch_size = max(batch_size, 1)
+        self.scrapped_at = scrapped_at
+        self.pending = []
+        self.spool = spool
+        self.retry_seconds = retry_seconds
+        self.replay_on_open = replay_on_open
+        self.spool_until = 0.0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        spool_path = crawler.settings.get('LISTINGS_SPOOL_PATH')
+        spool = ListingSpool(spool_path,
+                             max_bytes=crawler.settings.getint('LISTINGS_SPOOL_MAX_BYTES', 256 * 1024 * 1024),
+                             fsync_every=crawler.settings.getint('LISTINGS_SPOOL_FSYNC_EVERY', 200)) \
+            if spool_path else None
+        return cls(
+            batch_size=crawler.settings.getint('LISTINGS_DB_BATCH_SIZE', 1),
+            scrapped_at=parse_scrapped_at(crawler.settings.get('LISTINGS_SCRAPPED_AT')),
+            spool=spool,
+            retry_seconds=crawler.settings.getfloat('LISTINGS_SPOOL_RETRY_SECONDS', 30.0),
+            replay_on_open=crawler.settings.getbool('LISTINGS_SPOOL_REPLAY_ON_OPEN', True),
+        )
+
+    def open_spider(self, spider):
+        """
+        Replay the listings spooled by the previous crawls, the crawl going on if the database is still unavailable.
+
+        Args:
+            spider: The spider instance that is running the crawl
+        """
+        if self.spool is None or not self.replay_on_open:
+            return
+        try:
+            summary = replay_spool(self.spool.path, self.batch_size)
+        except Exception as e:
+            spider.logger.warning(f"Listing spool {self.spool.path} not replayed: {e}")
+            return
+        if summary['read']:
+            spider.logger.info(f"{summary['inserted']} spooled listings saved to the database.")
+
     def process_item(self, item, spider):
         """
         Process a scraped item and store it in the database if valid and unique.
 
         Args:
-            item (dict): A dictionary containing scraped Airbnb listing data with these required keys:
+            item (ListingItem | dict): The scraped Airbnb listing data with these required keys:
                 - airbnb_listing_id (str): Unique identifier for the Airbnb listing
                 - name (str): Name of the listing
                 - title (str): Title of the listing
@@ -139,7 +326,7 @@ class DjangoORMPipeline:
             spider: The spider instance that is running the crawl
 
         Returns:
-            dict: The original item dictionary, unmodified
+            ListingItem | dict: The original item, unmodified
 
         Note:
             - All fields are required - missing or empty airbnb_listing_id will cause the item to be logged and skipped
@@ -149,30 +336,298 @@ class DjangoORMPipeline:
 
         # Early return if no valid airbnb_listing_id
         if not airbnb_listing_id:
-            spider.logger.error(f"Missing required airbnb_listing_id, skipping item, item Details\n{json.dumps(item)}")
+            details = item.to_dict() if isinstance(item, ListingItem) else item
+            harvest_log.log(spider.logger, 'pipeline.missing_listing_id',
+                            "Missing required airbnb_listing_id, skipping item", level=logging.ERROR, payload=details)
             return item
         try:
-            listing = Listing(
-                airbnb_listing_id=item.get('airbnb_listing_id'),
-                name=item.get('name'),
-                title=item.get('title'),
-                baths=item.get('baths'),
-                beds=item.get('beds'),
-                latitude=item.get('latitude'),
-                longitude=item.get('longitude'),
-                person_capacity=item.get('person_capacity'),
-                registration_number=item.get('registration_number'),
-                room_type=item.get('room_type'),
-                location=item.get('location'),
-                is_bath_shared=item.get('bath_is_shared'),
-                baths_text=item.get('baths_text')
-            )
-            # Save the listing to the database
-            listing.save()
-            spider.logger.info(f"New listing {item.get('airbnb_listing_id')} saved to the database.")
-        except IntegrityError as e:
-            spider.logger.error(f"Failed to save listing {item.get('airbnb_listing_id')} to the database: {e}")
+            listing = Listing(**dict(zip(LISTING_COLUMNS, self.listing_row(item))))
+            if self.scrapped_at is not None:
+                listing.scrapped_at = self.scrapped_at
+            self.pending.append(listing)
         except Exception as e:
-            spider.logger.error(f"Failed to save listing {item.get('name')} to the database: {e}")
+            harvest_log.log(spider.logger, 'pipeline.invalid_listing', "Failed to save listing %s to the database: %s",
+                            item.get('name'), e, level=logging.ERROR, payload=dict(item))
+            return item
+
+        if len(self.pending) >= self.batch_size:
+            self.flush(spider)
+        return item
+
+    def close_spider(self, spider):
+        """
+        Insert the listings still waiting for a batch when the spider closes.
+
+        Args:
+            spider: The spider instance that ran the crawl
+        """
+        self.flush(spider)
+        if self.spool is not None:
+            self.spool.close()
+
+    def flush(self, spider):
+        """
+        Insert the pending listings, falling back to row-by-row saves if the batch insert fails.
+
+        The listings are spooled instead while the database is unavailable.
+
+        Args:
+            spider: The spider instance that is running the crawl
+        """
+        listings, self.pending = self.pending, []
+        if not listings:
+            return
+        with tracer.start_as_current_span('pipeline.orm_batch', context=crawl_context(spider),
+                                          attributes={'harvest.listings': len(listings)}):
+            self._write(listings, spider)
+
+    def _write(self, listings, spider):
+        if self.spool is not None and time.monotonic() < self.spool_until:
+            self.defer(listings, spider)
+            return
+        if len(listings) > 1:
+            try:
+                with DB_BATCH_WRITE_LATENCY.labels('listings_orm').time():
+                    inserted = insert_new_listings(listings)
+                spider.logger.info(f"{inserted} new listings saved to the database.")
+                self.count_already_stored(len(listings) - inserted, spider)
+                return
+            except DATABASE_UNAVAILABLE_ERRORS as e:
+                if self.spool is not None:
+                    self.defer(listings, spider, e)
+                    return
+                spider.logger.warning(f"Batch insert of {len(listings)} listings failed, saving one by one: {e}")
+            except Exception as e:
+                spider.logger.warning(f"Batch insert of {len(listings)} listings failed, saving one by one: {e}")
+
+        for index, listing in enumerate(listings):
+            try:
+                if not insert_new_listings([listing]):
+                    self.count_already_stored(1, spider)
+                    continue
+                harvest_log.log(spider.logger, 'pipeline.listing_saved', "New listing %s saved to the database.",
+                                listing.airbnb_listing_id, level=logging.INFO)
+            except IntegrityError as e:
+                harvest_log.log(spider.logger, 'pipeline.save_error', "Failed to save listing %s to the database: %s",
+                                listing.airbnb_listing_id, e, level=logging.ERROR)
+            except DATABASE_UNAVAILABLE_ERRORS as e:
+                if self.spool is not None:
+                    self.defer(listings[index:], spider, e)
+                    return
+                harvest_log.log(spider.logger, 'pipeline.save_error', "Failed to save listing %s to the database: %s",
+                                listing.name, e, level=logging.ERROR)
+            except Exception as e:
+                harvest_log.log(spider.logger, 'pipeline.save_error', "Failed to save listing %s to the database: %s",
+                                listing.name, e, level=logging.ERROR)
+
+    @staticmethod
+    def count_already_stored(count, spider):
+        """
+        Count the listings skipped because they are already stored for the same scrape date.
+
+        Args:
+            count (int): Number of listings skipped.
+            spider: The spider instance that is running the crawl
+        """
+        if count:
+            spider.crawler.stats.inc_value('listings/already_stored', count, spider=spider)
+
+    def defer(self, listings, spider, error=None):
+        """
+        Append listings to the spool, and keep spooling for `retry_seconds` after a database failure.
+
+        Args:
+            listings (list[Listing]): The listings not saved.
+            spider: The spider instance that is running the crawl
+            error (Exception, optional): The database failure, None while the database is known to be unavailable.
+        """
+        if error is not None:
+            spider.logger.warning(f"Database unavailable, spooling the listings for {self.retry_seconds:g} s: {error}")
+            self.spool_until = time.monotonic() + self.retry_seconds
+            # Reconnect on the next attempt if the connection was lost
+            if not connection.in_atomic_block:
+                connection.close_if_unusable_or_obsolete()
+        spooled = self.spool.append(listings)
+        spider.crawler.stats.inc_value('listings/spooled', spooled, spider=spider)
+        if spooled < len(listings):
+            spider.crawler.stats.inc_value('listings/spool_dropped', len(listings) - spooled, spider=spider)
+
+    @staticmethod
+    def listing_row(item):
+        """
+        Get the values of the Listing row of an item, in the order of LISTING_ROW_FIELDS.
+
+        Args:
+            item (ListingItem | dict): The scraped item.
+
+        Returns:
+            tuple: The values of the row.
+        """
+        if isinstance(item, ListingItem):
+            return item.as_row()
+        return tuple(item.get(item_field) for _, item_field in LISTING_ROW_FIELDS)
+
+
+class PostgresCopyPipeline:
+    """
+    A Postgres ingestion pipeline for large harvests, selected with `LISTINGS_INGEST_MODE = 'copy'`.
+
+    Items are buffered and, every `LISTINGS_COPY_BATCH_SIZE` items and when the spider closes, streamed
+    with `COPY ... FROM STDIN` into a temporary staging table and merged into the Listing table with a
+    single `INSERT ... SELECT ... ON CONFLICT DO NOTHING` statement. The staging table lives in the
+    transaction of the batch, so that the COPY and the merge run on the same pooled connection and
+    nothing is left in its session. The merge keeps the last version of a listing staged in the batch
+    and skips the listings already stored for the same scrape date, so a backfill can be re-run safely.
+    The `listing_unique_scrape` constraint is the conflict target, so that two harvests or a spool
+    replay writing the same listings at once don't store them twice.
+    """
+
+    staging_table = 'listings_listing_staging'
+
+    def __init__(self, copy_batch_size=1000, scrapped_at=None):
+        """
+        Initialize the PostgresCopyPipeline.
+
+        Args:
+            copy_batch_size (int): Number of items buffered before they are copied and merged into the Listing table.
+            scrapped_at (datetime, optional): Scrape date stored with the listings, defaults to when the spider opens.
+        """
+        self.copy_batch_size = max(copy_batch_size, 1)
+        self.scrapped_at = scrapped_at
+        self.buffer = []
+        self.staged = 0
+        self.inserted = 0
+        self.fields = [Listing._meta.get_field(column) for column in LISTING_COLUMNS]
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if connection.vendor != 'postgresql':
+            raise ImproperlyConfigured("PostgresCopyPipeline requires a PostgreSQL database, "
+                                       "use LISTINGS_INGEST_MODE = 'orm' instead")
+        return cls(
+            copy_batch_size=crawler.settings.getint('LISTINGS_COPY_BATCH_SIZE', 1000),
+            scrapped_at=parse_scrapped_at(crawler.settings.get('LISTINGS_SCRAPPED_AT')),
+        )
+
+    def open_spider(self, spider):
+        self.scrapped_at = self.scrapped_at or timezone.now()
 
+    def process_item(self, item, spider):
+        """
+        Buffer a scraped item and merge the buffer into the Listing table when it is full.
+
+        Args:
+            item (ListingItem | dict): The scraped Airbnb listing data, see DjangoORMPipeline.process_item.
+            spider: The spider instance that is running the crawl
+
+        Returns:
+            ListingItem | dict: The original item, unmodified
+        """
+        if not item.get('airbnb_listing_id'):
+            details = item.to_dict() if isinstance(item, ListingItem) else item
+            harvest_log.log(spider.logger, 'pipeline.missing_listing_id',
+                            "Missing required airbnb_listing_id, skipping item", level=logging.ERROR, payload=details)
+            return item
+
+        self.buffer.append(self.copy_row(item))
+        if len(self.buffer) >= self.copy_batch_size:
+            self.copy_buffer(spider)
         return item
+
+    def close_spider(self, spider):
+        """
+        Merge the remaining items into the Listing table.
+
+        Args:
+            spider: The spider instance that ran the crawl
+        """
+        self.copy_buffer(spider)
+        spider.logger.info(f"{self.inserted} new listings saved to the database with COPY.")
+
+    def copy_row(self, item):
+        """
+        Convert an item into a staging table row, with the values converted to the column types.
+
+        Values that cannot be converted, such as an empty person capacity, are stored as NULL
+        so that a single bad value does not abort the whole COPY.
+
+        Args:
+            item (ListingItem | dict): The scraped item.
+
+        Returns:
+            tuple: The values of the row, in the order of LISTING_COLUMNS.
+        """
+        row = []
+        for field, value in zip(self.fields, DjangoORMPipeline.listing_row(item)):
+            if value == "" and field.get_internal_type() != 'TextField':
+                value = None
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                value = None
+            row.append(value)
+        return tuple(row)
+
+    def copy_buffer(self, spider):
+        """
+        Stream the buffered rows into the staging table with COPY and merge them into the Listing table,
+        in a single transaction.
+
+        Args:
+            spider: The spider instance that is running the crawl
+        """
+        rows, self.buffer = self.buffer, []
+        if not rows:
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            with DB_BATCH_WRITE_LATENCY.labels('listings_copy').time():
+                self._create_staging_table(cursor)
+                columns = ', '.join(connection.ops.quote_name(column) for column in LISTING_COLUMNS)
+                with cursor.copy(f"COPY {self.staging_table} ({columns}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            self.staged = len(rows)
+            spider.logger.debug(f"{len(rows)} listings copied to the staging table.")
+            self.merge(cursor, spider)
+
+    def merge(self, cursor, spider):
+        """
+        Insert the staged rows into the Listing table, in the transaction of the COPY.
+
+        Args:
+            cursor: The database cursor of the COPY.
+            spider: The spider instance that is running the crawl
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(Listing._meta.db_table)
+        columns = ', '.join(quote_name(column) for column in LISTING_COLUMNS)
+        staged_columns = ', '.join(f"s.{quote_name(column)}" for column in LISTING_COLUMNS)
+        listing_id = quote_name('airbnb_listing_id')
+        scrapped_at = quote_name('scrapped_at')
+        with DB_BATCH_WRITE_LATENCY.labels('listings_merge').time():
+            # NOT EXISTS skips the listings stored earlier the same day, ON CONFLICT those stored concurrently
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}, {scrapped_at}) "
+                f"SELECT DISTINCT ON (s.{listing_id}) {staged_columns}, %s "
+                f"FROM {self.staging_table} s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {table} l WHERE l.{listing_id} = s.{listing_id} "
+                f"AND l.{scrapped_at}::date = %s::date) "
+                f"ORDER BY s.{listing_id}, s.staged_position DESC "
+                f"ON CONFLICT ON CONSTRAINT listing_unique_scrape DO NOTHING",
+                [self.scrapped_at, self.scrapped_at])
+            inserted = cursor.rowcount
+        spider.logger.info(f"{inserted} of {self.staged} staged listings merged into the database.")
+        self.inserted += inserted
+        self.staged = 0
+
+    def _create_staging_table(self, cursor):
+        """
+        Create the temporary staging table of the current transaction, dropped when it commits.
+
+        Args:
+            cursor: The database cursor.
+        """
+        columns = ', '.join(f"{connection.ops.quote_name(field.column)} {field.db_type(connection)}"
+                            for field in self.fields)
+        cursor.execute(f"CREATE TEMPORARY TABLE {self.staging_table} "
+                       f"(staged_position bigserial, {columns}) ON COMMIT DROP")
@@ -0,0 +1,10 @@
+"""
+Custom signals of the harvester.
+"""
+
+# Sent by ListingsSpider after parsing a search results page, with the `response`, the `listing_ids` found on the
+# page and the `page_cursors` of the search
+search_page_parsed = object()
+# Sent by ListingsSpider when the details of a listing could not be fetched or parsed, with the `request` of the
+# details and the `reason`. The listing item is held back
+listing_failed = object()
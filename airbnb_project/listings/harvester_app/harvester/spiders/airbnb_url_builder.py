@@ -1,10 +1,48 @@
 from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from urllib.parse import quote
 
 """
 Values for the months that are used in the url builder
 """
 
 
+class URLTemplate:
+    """
+    A search URL whose query is encoded once, with a slot for the map bounds of a tile.
+
+    The bounds come first in the query, as in the URLs of AirBnbURLBuilder, so a tile URL is the
+    concatenation of the prefix, the encoded bounds of the tile and the rest of the query.
+    """
+    __slots__ = ("prefix", "suffix")
+
+    def __init__(self, prefix: str, suffix: str) -> None:
+        """
+        Initialize the URLTemplate.
+
+        Args:
+            prefix (str): The URL up to the query, included the "?".
+            suffix (str): The encoded query parameters following the bounds.
+        """
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def url(self, bounds_query: str) -> str:
+        """
+        Build the URL of a tile.
+
+        Args:
+            bounds_query (str): The encoded bounds of the tile, see `AirBnbURLBuilder.bounds_query`.
+
+        Returns:
+            str: The search URL of the tile.
+        """
+        return f"{self.prefix}{bounds_query}&{self.suffix}"
+
+    def __repr__(self) -> str:
+        return f"URLTemplate({self.prefix}{{bounds}}&{self.suffix})"
+
+
 class AirBnbURLBuilder:
     """
     A class for building AirBnb URLs for web scraping purposes.
@@ -29,6 +67,10 @@ class AirBnbURLBuilder:
     SCHEME = "https"
     BASE_URL = "www.airbnb.ca"
     HOMES_PATH = "s/Vancouver--Canada/homes"
+    # Parameters of the map bounds of a tile, first in the query and filled in per tile
+    BOUNDS_PARAMS = ("ne_lat", "ne_lng", "sw_lat", "sw_lng", "zoom_level", "zoom")
+    # Characters left as is in the encoded query, the same as Scrapy does when it escapes a request URL
+    SAFE_QUERY_CHARACTERS = "/:,@!$'()*+;"
     DEFAULT_PARAMS = {
         "ne_lat": {},
         "ne_lng": {},
@@ -43,6 +85,19 @@ class AirBnbURLBuilder:
         "place_id": "ChIJs0-pQ_FzhlQRi_OBm-qWkbs"
     }
 
+    def __init__(self, scheme=SCHEME, base_url=BASE_URL):
+        """
+        Initialize the AirBnbURLBuilder.
+
+        Args:
+            scheme (str): The scheme of the URLs. Default is "https".
+            base_url (str): The host of the URLs, e.g. a local stand-in server. Default is "www.airbnb.ca".
+        """
+        self.scheme = scheme
+        self.base_url = base_url
+        # URL templates of the last run, by months and date
+        self._templates = {}
+
     @staticmethod
     def get_params_string(params):
         """
@@ -54,14 +109,39 @@ class AirBnbURLBuilder:
         Returns:
             str: A URL-encoded query string.
         """
-        output = ""
-        for key, value in params.items():
-            if isinstance(value, tuple):
-                for item in value:
-                    output += f"{key}={item}&"
-            else:
-                output += f"{key}={value}&"
-        return output[:-1]
+        return "&".join(f"{key}={item}" for key, value in params.items()
+                        for item in (value if isinstance(value, tuple) else (value,)))
+
+    @staticmethod
+    def encode_query(params):
+        """
+        Convert a dictionary of parameters into a percent-encoded URL query string.
+
+        Args:
+            params (dict): A dictionary of parameter key-value pairs, a tuple value repeats its key.
+
+        Returns:
+            str: The query string, as sent by Scrapy for the URL of `get_params_string`.
+        """
+        safe = AirBnbURLBuilder.SAFE_QUERY_CHARACTERS
+        return "&".join(f"{quote(key, safe=safe)}={quote(str(item), safe=safe)}" for key, value in params.items()
+                        for item in (value if isinstance(value, tuple) else (value,)))
+
+    @staticmethod
+    def bounds_query(tile: Dict[str, str], zoom_level) -> str:
+        """
+        Encode the map bounds of a tile, once for all the URL templates.
+
+        Args:
+            tile (dict): The 'ne_lat', 'ne_lng', 'sw_lat' and 'sw_lng' of the tile.
+            zoom_level: The zoom level of the map.
+
+        Returns:
+            str: The encoded bounds, to fill the slot of a URLTemplate.
+        """
+        # The bounds and the zoom level are numbers, which need no escaping
+        return (f"ne_lat={tile['ne_lat']}&ne_lng={tile['ne_lng']}&sw_lat={tile['sw_lat']}&sw_lng={tile['sw_lng']}"
+                f"&zoom_level={zoom_level}&zoom={zoom_level}")
 
     def get_urls(self, *months):
         """
@@ -73,12 +153,54 @@ class AirBnbURLBuilder:
         Returns:
             list: A list of URLs for flexible month, week, weekend, multi-month, and specific date searches.
         """
+        return [self._get_full_url(params) for params in self._search_params(months, datetime.now())]
+
+    def get_templates(self, *months, today=None) -> List[URLTemplate]:
+        """
+        Get the URL templates of the different search types, compiled once per months and day.
+
+        The dates of the searches are bound when the templates are compiled, so the URLs of all the
+        tiles of a run use the same dates.
+
+        Args:
+            *months: Variable length argument list of month names.
+            today (datetime, optional): The date of the run. If None, uses the current date.
+
+        Returns:
+            list: URL templates for flexible month, week, weekend, multi-month, and specific date searches.
+        """
+        today = today or datetime.now()
+        cache_key = (months, today.date())
+        templates = self._templates.get(cache_key)
+        if templates is None:
+            prefix = f"{self.scheme}://{self.base_url}/{AirBnbURLBuilder.HOMES_PATH}?"
+            templates = [
+                URLTemplate(prefix, AirBnbURLBuilder.encode_query(
+                    {key: value for key, value in params.items() if key not in AirBnbURLBuilder.BOUNDS_PARAMS}))
+                for params in self._search_params(months, today)
+            ]
+            # Only the templates of the current run are kept
+            self._templates = {cache_key: templates}
+        return templates
+
+    def _search_params(self, months: Tuple[str, ...], today: datetime) -> List[Dict]:
+        """
+        Build the parameters of the different search types.
+
+        Args:
+            months (tuple): Month names, the current months when empty.
+            today (datetime): The date of the run.
+
+        Returns:
+            list: The parameters of the flexible month, week, weekend, multi-month, and specific date searches.
+        """
         if not len(months):
-            months = self._get_current_months()
-        check_in, check_out = self.get_date()
-        check_in_month, check_out_month = self.get_date(time_delta=90)
-        return [self.get_flexible_month(*months), self.get_flexible_week(*months), self.get_flexible_weekend(*months),
-                self.get_months(check_in_month, check_out_month), self.get_dates(check_in, check_out)]
+            months = self._get_current_months(today=today)
+        check_in, check_out = self.get_date(start_date=today)
+        check_in_month, check_out_month = self.get_date(start_date=today, time_delta=90)
+        return [self._flexible_params("one_month", months), self._flexible_params("one_week", months),
+                self._flexible_params("weekend_trip", months), self._months_params(check_in_month, check_out_month),
+                self._dates_params(check_in, check_out)]
 
     def _get_full_url(self, param):
         """
@@ -90,7 +212,7 @@ class AirBnbURLBuilder:
         Returns:
             str: A complete AirBnb search URL.
         """
-        return f"{AirBnbURLBuilder.SCHEME}://{AirBnbURLBuilder.BASE_URL}/{AirBnbURLBuilder.HOMES_PATH}?{AirBnbURLBuilder.get_params_string(param)}"
+        return f"{self.scheme}://{self.base_url}/{AirBnbURLBuilder.HOMES_PATH}?{AirBnbURLBuilder.get_params_string(param)}"
 
     def get_flexible_week(self, *month):
         """
@@ -104,10 +226,7 @@ class AirBnbURLBuilder:
         """
         if not len(month):
             month = self._get_current_months(number_of_months=1)
-        local_param = AirBnbURLBuilder.DEFAULT_PARAMS.copy()
-        local_param['flexible_trip_lengths[]'] = "one_week"
-        local_param['flexible_trip_dates[]'] = month
-        return self._get_full_url(local_param)
+        return self._get_full_url(self._flexible_params("one_week", month))
 
     def get_flexible_weekend(self, *month):
         """
@@ -121,10 +240,7 @@ class AirBnbURLBuilder:
         """
         if not len(month):
             month = self._get_current_months(number_of_months=1)
-        local_param = AirBnbURLBuilder.DEFAULT_PARAMS.copy()
-        local_param['flexible_trip_lengths[]'] = "weekend_trip"
-        local_param['flexible_trip_dates[]'] = month
-        return self._get_full_url(local_param)
+        return self._get_full_url(self._flexible_params("weekend_trip", month))
 
     def get_flexible_month(self, *month):
         """
@@ -138,10 +254,7 @@ class AirBnbURLBuilder:
         """
         if not len(month):
             month = self._get_current_months(number_of_months=1)
-        local_param = AirBnbURLBuilder.DEFAULT_PARAMS.copy()
-        local_param['flexible_trip_lengths[]'] = "one_month"
-        local_param['flexible_trip_dates[]'] = month
-        return self._get_full_url(local_param)
+        return self._get_full_url(self._flexible_params("one_month", month))
 
     def get_dates(self, check_in, check_out):
         """
@@ -154,11 +267,7 @@ class AirBnbURLBuilder:
         Returns:
             str: A URL for a specific date range search.
         """
-        local_param = AirBnbURLBuilder.DEFAULT_PARAMS.copy()
-        local_param['checkin'] = check_in
-        local_param['checkout'] = check_out
-        local_param['flexible_date_search_filter_type'] = "1"
-        return self._get_full_url(local_param)
+        return self._get_full_url(self._dates_params(check_in, check_out))
 
     def get_months(self, check_in, check_out, length=3):
         """
@@ -172,27 +281,47 @@ class AirBnbURLBuilder:
         Returns:
             str: A URL for a multi-month stay search.
         """
+        return self._get_full_url(self._months_params(check_in, check_out, length))
+
+    @staticmethod
+    def _flexible_params(trip_length, months):
+        local_param = AirBnbURLBuilder.DEFAULT_PARAMS.copy()
+        local_param['flexible_trip_lengths[]'] = trip_length
+        local_param['flexible_trip_dates[]'] = months
+        return local_param
+
+    @staticmethod
+    def _dates_params(check_in, check_out):
+        local_param = AirBnbURLBuilder.DEFAULT_PARAMS.copy()
+        local_param['checkin'] = check_in
+        local_param['checkout'] = check_out
+        local_param['flexible_date_search_filter_type'] = "1"
+        return local_param
+
+    @staticmethod
+    def _months_params(check_in, check_out, length=3):
         local_param = AirBnbURLBuilder.DEFAULT_PARAMS.copy()
         local_param['monthly_start_date'] = check_in
         local_param['monthly_end_date'] = check_out
         local_param['monthly_length'] = length
         local_param['flexible_date_search_filter_type'] = "6"
-        return self._get_full_url(local_param)
+        return local_param
 
-    def _get_current_months(self, number_of_months=3):
+    def _get_current_months(self, number_of_months=3, today=None):
         """
         Get the names of the current and upcoming months, wrapping around if necessary.
 
         Args:
             number_of_months (int): Number of months to retrieve, including the current month.
             Should be less than or equal to 12.
+            today (datetime, optional): The current date. If None, uses the current date.
 
         Returns:
             tuple: The names of the current and upcoming months in lowercase.
         """
         # Ensure number_of_months is at most 12
         number_of_months = min(number_of_months, 12)
-        current_month = datetime.now().month - 1
+        current_month = (today or datetime.now()).month - 1
         end_month = (current_month + number_of_months) % len(AirBnbURLBuilder.AirBnbMonths)
         if end_month > current_month:
             return tuple(AirBnbURLBuilder.AirBnbMonths[current_month:end_month])
@@ -19,4 +19,6 @@ CITY_COORDINATE_BOUNDARY: Dict[Cities, Dict[str, any]] = {
         ],
         "grid_size": 100  # Number of grid cells to divide the area
     }
-}
\ No newline at end of file
+}
+# Maximum number of result pages Airbnb returns for a search, more listings in a tile are not reachable
+SEARCH_PAGE_CAP = 15
@@ -3,11 +3,18 @@ import base64
 from typing import List, Dict, Any
 
 import scrapy
-from scrapy import Request
-
-from listings.harvester_app.harvester.items import ExpandedAirBnBListingItem
+from scrapy import Request, signals
+from scrapy.utils.defer import maybe_deferred_to_future
+
+from airbnb_project.tracing import tracer
+from listings.harvester_app.harvester import parsing
+from listings.harvester_app.harvester.frontier import CrawlFrontier
+from listings.harvester_app.harvester.logs import harvest_log
+from listings.harvester_app.harvester.offload import ParseOffloader
+from listings.harvester_app.harvester.signals import listing_failed, search_page_parsed
 from scrapy.http import Response
-from urllib.parse import quote
+from scrapy.spidermiddlewares.httperror import HttpError
+from urllib.parse import quote, urlsplit
 from listings.harvester_app.harvester.spiders.airbnb_url_builder import AirBnbURLBuilder
 from listings.harvester_app.harvester.spiders.coordinates_builder import AirbnbCoordinatesBuilder
 from listings.harvester_app.harvester.spiders.constants import Cities
@@ -57,6 +64,29 @@ class ListingsSpider(scrapy.Spider):
     # Instance of CoordinatesBuilder to generate the coordinates for a city.
     COORDINATES_BUILDER = AirbnbCoordinatesBuilder()
 
+    # Runs the parsing of the responses out of the reactor thread when the PARSE_OFFLOAD setting enables it
+    parse_offloader = ParseOffloader()
+
+    # Priorities of the requests, loaded from the history of the previous crawls when the crawl starts
+    frontier = CrawlFrontier(enabled=False)
+
+    # Whether the crawl only retries the listings of the dead-letter store, instead of searching the city
+    dead_letters = False
+
+    # Span context of the crawl, parent of the spans of the parsing, set by the CrawlTracer extension
+    trace_context = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.parse_offloader = ParseOffloader(crawler.settings.get('PARSE_OFFLOAD', 'none'),
+                                                crawler.settings.getint('PARSE_OFFLOAD_WORKERS') or None)
+        crawler.signals.connect(spider.parse_offloader.close, signal=signals.spider_closed)
+        base_url = urlsplit(crawler.settings.get('AIRBNB_BASE_URL') or "https://www.airbnb.ca")
+        spider.URL_BUILDER = AirBnbURLBuilder(base_url.scheme, base_url.netloc)
+        spider.frontier = CrawlFrontier.from_settings(crawler.settings)
+        return spider
+
     def start_requests(self) -> List[scrapy.FormRequest]:
         """
         Generate initial requests for scraping Airbnb listings using coordinates from a JSON file.
@@ -67,9 +97,27 @@ class ListingsSpider(scrapy.Spider):
         Returns:
             List[scrapy.FormRequest]: A list of FormRequest objects for initial scraping.
         """
+        if self.dead_letters:
+            return self._dead_letter_requests()
         coordinates = self._load_coordinates()
+        self.frontier.load()
         return self._generate_requests(coordinates)
 
+    def _dead_letter_requests(self) -> List[Request]:
+        """
+        Generate the details requests of the listings of the dead-letter store still failing.
+
+        Returns:
+            List[Request]: The requests, flagged as dead-letter retries.
+        """
+        # Imported here, the models need the Django apps to be loaded
+        from listings.listing_models import DeadLetter
+
+        max_attempts = self.settings.getint('DEAD_LETTER_MAX_ATTEMPTS', 5)
+        dead_letters = DeadLetter.objects.filter(resolved_at__isnull=True, attempts__lt=max_attempts)
+        return [self._create_listing_request(dead_letter.airbnb_params, dead_letter_retry=True)
+                for dead_letter in dead_letters.order_by('last_failed_at')]
+
     def _load_coordinates(self) -> List[Dict[str, float]]:
         """
         Generate coordinates dynamically using AirbnbCoordinatesBuilder for Vancouver.
@@ -82,7 +130,7 @@ class ListingsSpider(scrapy.Spider):
         try:
             return ListingsSpider.COORDINATES_BUILDER.build_coordinates(Cities.VANCOUVER)
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            self.logger.error(f"Coordinates not built: {e}")
             return []  # Catch-all for any other issues
 
     def _generate_requests(self, coordinates: List[Dict[str, float]]) -> List[scrapy.FormRequest]:
@@ -90,7 +138,7 @@ class ListingsSpider(scrapy.Spider):
         Construct and return a list of initial Scrapy requests using template URLs and coordinates.
 
         This method creates FormRequest objects for each combination of URL template
-        (obtained from URL_BUILDER) and coordinate set.
+        (compiled once by URL_BUILDER) and coordinate set.
 
         Args:
             coordinates (List[Dict[str, float]]): A list of coordinate dictionaries, where each
@@ -98,21 +146,24 @@ class ListingsSpider(scrapy.Spider):
 
         Returns:
             List[scrapy.FormRequest]: A list of FormRequest objects, each initialized with
-            a URL formatted with coordinates and zoom level.
+            a URL formatted with coordinates and zoom level, the tiles with the highest
+            yield first.
         """
         if not coordinates:
             return []
 
-        urls = self.URL_BUILDER.get_urls()
-        requests = []
+        templates = self.URL_BUILDER.get_templates()
         zoom_level = self.settings.get('ZOOM_LEVEL')
-        for url in urls:
-            for cord in coordinates:
-                formatted_url = url.format(
-                    cord["ne_lat"], cord["ne_lng"], cord["sw_lat"], cord["sw_lng"],
-                    zoom_level, zoom_level
-                )
-                requests.append(scrapy.FormRequest(formatted_url))
+        # The tile of the search is kept in the meta of its pages and listings, for the tile metrics
+        tiles = [{"index": index, **cord} for index, cord in enumerate(coordinates)]
+        # The bounds of a tile are encoded once for all the templates
+        bounds_queries = [self.URL_BUILDER.bounds_query(tile, zoom_level) for tile in tiles]
+        priorities = [self.frontier.tile_priority(tile["index"]) for tile in tiles]
+        requests = [scrapy.FormRequest(template.url(bounds_query), meta={'tile': tile}, priority=priority)
+                    for template in templates
+                    for tile, bounds_query, priority in zip(tiles, bounds_queries, priorities)]
+        # The engine schedules the start requests a few at a time, so their order matters as much as their priority
+        requests.sort(key=lambda request: request.priority, reverse=True)
         return requests
 
     async def parse(self, response: Response, **kwargs) -> None:
@@ -130,13 +181,27 @@ class ListingsSpider(scrapy.Spider):
             Request: Requests for individual listing detail pages.
             Request: Request for the next page of search results, if available.
         """
-        script_json = self._extract_script_json(response)
-        results = self._parse_listings_json(script_json)
+        tile = response.meta.get('tile')
+        span = tracer.start_span('spider.parse_search_page', context=self.trace_context,
+                                 attributes={'http.url': response.url})
+        try:
+            if self.parse_offloader.enabled:
+                listings, cursors = await maybe_deferred_to_future(self.parse_offloader.run(
+                    parsing.parse_search_page, response.body, self.settings.get('AIRBNB_SCRIPT_TAG')))
+                requests = [self._create_listing_request(listing_data, tile) for listing_data in listings]
+            else:
+                script_json = self._extract_script_json(response)
+                results = self._parse_listings_json(script_json)
+                cursors = self._get_cursors(script_json)
+                requests = [request async for request in self._process_listings(results, tile)]
+            span.set_attribute('harvest.listings', len(requests))
+        finally:
+            span.end()
 
         if self.next_page_cursors is None:
-            self.next_page_cursors = self._get_cursors(script_json)
-
-        async for request in self._process_listings(results):
+            self.next_page_cursors = cursors
+        self._report_search_page(response, requests, cursors)
+        for request in requests:
             yield request
 
         async for request in self._handle_pagination(response):
@@ -152,12 +217,9 @@ class ListingsSpider(scrapy.Spider):
         Returns:
             Dict[str, Any]: The parsed JSON data from the script tag.
         """
-        script_tag_name = self.settings.get('AIRBNB_SCRIPT_TAG')
-        script_tag = response.css(f'script#{script_tag_name}')
-        script_inner_text = script_tag.css('script::text').get()
-        return json.loads(script_inner_text)
+        return parsing.extract_script_json(response.body, self.settings.get('AIRBNB_SCRIPT_TAG'))
 
-    async def _process_listings(self, results: List[Dict[str, Any]]):
+    async def _process_listings(self, results: List[Dict[str, Any]], tile: Dict[str, Any] = None):
         """
         Process each listing in the results.
 
@@ -166,6 +228,7 @@ class ListingsSpider(scrapy.Spider):
 
         Args:
             results (List[Dict[str, Any]]): The list of listing results to process.
+            tile (Dict[str, Any], optional): The map tile of the search.
 
         Yields:
             Request: A request object for each listing's details page.
@@ -174,9 +237,10 @@ class ListingsSpider(scrapy.Spider):
             try:
                 listing_data = self._extract_listing_data(result)
                 if listing_data:
-                    yield self._create_listing_request(listing_data)
+                    yield self._create_listing_request(listing_data, tile)
             except Exception as e:
-                print(f"Exception processing listing: {e}")
+                harvest_log.log(self.logger, 'spider.search_result_error', "Exception processing listing: %s", e,
+                                payload=result)
 
     def _extract_listing_data(self, result: Dict[str, Any]) -> Dict[str, Any] | None:
         """
@@ -192,29 +256,17 @@ class ListingsSpider(scrapy.Spider):
             Dict[str, Any]: A dictionary of extracted listing data, or None if the listing
             should be skipped.
         """
-        listing = result.get("listing", {})
-        listing_id: str = listing.get("id")
-
-        if not listing_id:
-            print(f"Missing listing ID.\nResults: {json.dumps(result)}")
-
-            return None
+        return parsing.extract_listing_data(result)
 
-        return {
-            "airbnb_listing_id": listing_id,
-            "title": listing.get("title", ""),
-            "name": listing.get("name", ""),
-            "latitude": listing.get("coordinate", {}).get("latitude", ""),
-            "longitude": listing.get("coordinate", {}).get("longitude", ""),
-            "room_type": listing.get("roomTypeCategory", "")
-        }
-
-    def _create_listing_request(self, listing_data: Dict[str, Any]) -> Request:
+    def _create_listing_request(self, listing_data: Dict[str, Any], tile: Dict[str, Any] = None,
+                                dead_letter_retry: bool = False) -> Request:
         """
         Create a request for the listing's details page.
 
         Args:
             listing_data (Dict[str, Any]): The extracted data for a single listing.
+            tile (Dict[str, Any], optional): The map tile of the search the listing was found in.
+            dead_letter_retry (bool): Whether the request retries a failed request of the listing.
 
         Returns:
             Request: A request object for the listing's details page.
@@ -223,13 +275,36 @@ class ListingsSpider(scrapy.Spider):
         airbnb_api_key = self.settings.get('AIRBNB_PUBLIC_API_KEY')
         page_url = airbnb_api_url.format(
             base64_encode_string(combine_and_url_encode("StayListing", listing_data["airbnb_listing_id"])))
+        meta = {'airbnb_params': listing_data, 'tile': tile}
+        if dead_letter_retry:
+            meta['dead_letter_retry'] = True
         return Request(
             url=page_url,
-            callback=self.handle_listing,
+            callback=self.handle_listing_offloaded if self.parse_offloader.enabled else self.handle_listing,
+            errback=self.handle_listing_error,
             headers={'X-Airbnb-Api-Key': airbnb_api_key},
-            meta={'airbnb_params': listing_data}
+            meta=meta,
+            priority=self.frontier.listing_priority(listing_data["airbnb_listing_id"]),
+            dont_filter=dead_letter_retry
         )
 
+    def _report_search_page(self, response: Response, requests: List[Request], cursors: List[str]) -> None:
+        """
+        Send the search_page_parsed signal with the listings found on a search results page.
+
+        Args:
+            response (Response): The search results page.
+            requests (List[Request]): The requests for the details of the listings of the page.
+            cursors (List[str]): The pagination cursors of the search.
+        """
+        crawler = getattr(self, 'crawler', None)
+        if crawler is None:
+            return
+        crawler.signals.send_catch_log(
+            signal=search_page_parsed, response=response, spider=self,
+            listing_ids=[request.meta['airbnb_params']['airbnb_listing_id'] for request in requests],
+            page_cursors=cursors)
+
     async def _handle_pagination(self, response: Response):
         """
         Handle pagination for the next page of results.
@@ -246,36 +321,89 @@ class ListingsSpider(scrapy.Spider):
         if self.next_page_cursors:
             cursor_id = self.next_page_cursors.pop()
             next_url = f'{response.url}&cursor={cursor_id}'
-            yield response.follow(next_url, callback=self.parse)
+            tile = response.meta.get('tile')
+            yield response.follow(next_url, callback=self.parse, meta={'tile': tile},
+                                  priority=self.frontier.tile_priority(tile["index"]) if tile else 0)
 
-    @staticmethod
-    def handle_listing(response: Response):
+    def handle_listing(self, response: Response):
         """
         Parse method for extracting details from an Airbnb listing page.
 
+        An instance method, so that the listing requests can be serialized into a shared request queue.
+        A listing whose details can't be parsed is reported with the listing_failed signal instead of
+        being yielded without them.
+
         Args:
             response (Response): The response object from the request.
 
          Yields:
-            ExpandedAirBnBListingItem: An ExpandedAirBnBListingItem object containing details of an Airbnb listing.
+            ListingItem: A ListingItem object containing details of an Airbnb listing.
         """
         airbnb_params = response.meta.get('airbnb_params', {})
-        listing_item = ExpandedAirBnBListingItem(
-            airbnb_listing_id=airbnb_params.get('airbnb_listing_id'),
-            title=airbnb_params.get('title'),
-            name=airbnb_params.get('name'),
-            latitude=airbnb_params.get('latitude'),
-            longitude=airbnb_params.get('longitude'),
-            room_type=airbnb_params.get('room_type')
-        )
+        listing_item = parsing.new_listing_item(airbnb_params)
+        span = tracer.start_span('spider.parse_listing', context=self.trace_context)
         try:
-            script_tag_json = json.loads(response.text)
-            ListingsSpider._parse_capacity_and_location(script_tag_json, listing_item)
-            ListingsSpider._parse_listings_number(script_tag_json, listing_item)
+            script_tag_json = json.loads(response.body)
+            error = parsing.listing_details_error(script_tag_json)
+            if error is None:
+                ListingsSpider._parse_capacity_and_location(script_tag_json, listing_item)
+                ListingsSpider._parse_listings_number(script_tag_json, listing_item)
         except Exception as e:
-            print(e)
-        finally:
-            yield listing_item
+            error = f"{type(e).__name__}: {e}"
+        span.end()
+        if error is not None:
+            self._report_listing_failure(response.request, error)
+            return
+        yield listing_item
+
+    async def handle_listing_offloaded(self, response: Response):
+        """
+        Parse method for the details of an Airbnb listing, decoding and extracting them out of the reactor thread.
+
+        Args:
+            response (Response): The response object from the request.
+
+        Yields:
+            ListingItem: A ListingItem object containing details of an Airbnb listing.
+        """
+        span = tracer.start_span('spider.parse_listing', context=self.trace_context)
+        listing_item, error = await maybe_deferred_to_future(self.parse_offloader.run(
+            parsing.parse_listing_response, response.body, response.meta.get('airbnb_params', {})))
+        span.end()
+        if error is not None:
+            self._report_listing_failure(response.request, error)
+            return
+        yield listing_item
+
+    def handle_listing_error(self, failure) -> None:
+        """
+        Errback of the listing details requests, once the retries of the downloader are exhausted.
+
+        Args:
+            failure (Failure): The download failure, or the HttpError of a response with an error status.
+        """
+        if failure.check(HttpError):
+            reason = f"HTTP {failure.value.response.status}"
+        else:
+            reason = f"{failure.type.__name__}: {failure.getErrorMessage()}"
+        self._report_listing_failure(failure.request, reason)
+
+    def _report_listing_failure(self, request: Request, reason: str) -> None:
+        """
+        Send the listing_failed signal for a listing whose details are missing.
+
+        Args:
+            request (Request): The details request of the listing.
+            reason (str): Why the details are missing.
+        """
+        harvest_log.log(self.logger, 'spider.listing_failed', "Listing %s failed: %s",
+                        request.meta.get('airbnb_params', {}).get('airbnb_listing_id'), reason,
+                        payload={'url': request.url, 'reason': reason})
+        crawler = getattr(self, 'crawler', None)
+        if crawler is None:
+            return
+        crawler.stats.inc_value('listings/failed', spider=self)
+        crawler.signals.send_catch_log(signal=listing_failed, request=request, reason=reason, spider=self)
 
     @staticmethod
     def _parse_capacity_and_location(script_tag_json, listing_item):
@@ -289,19 +417,7 @@ class ListingsSpider(scrapy.Spider):
         Returns:
             None: This method modifies the `listing_item` dictionary in place, adding 'location' and 'person_capacity'.
         """
-        location = ""
-        person_capacity = ""
-        try:
-            metadata = ListingsSpider._get_metadata_from_json(script_tag_json)
-            if metadata is not None:
-                sharing_config = metadata.get("sharingConfig", {})
-                location = sharing_config.get("location", "")
-                person_capacity = sharing_config.get("personCapacity", "")
-        except Exception as e:
-            print(e)
-        finally:
-            listing_item['location'] = location
-            listing_item['person_capacity'] = person_capacity
+        parsing.parse_capacity_and_location(script_tag_json, listing_item)
 
     @staticmethod
     def _parse_listings_number(script_tag_json, listing_item):
@@ -315,54 +431,7 @@ class ListingsSpider(scrapy.Spider):
         Returns:
             None: This method modifies the `listing_item` dictionary in place, adding 'registration_number', 'beds', and 'baths_text'.
         """
-        registration_number = ""
-        number_of_beds = ""
-        number_of_baths = ""
-        try:
-            sections = ListingsSpider._parse_listing_json(script_tag_json)
-            for section in sections:
-                if section.get("sectionComponentType") == "PDP_DESCRIPTION_MODAL":
-                    items = section.get("section", {}).get("items", [])
-                    for item in items:
-                        if item.get("title") == "Registration number":
-                            registration_number = item.get("html", "").get(
-                                "htmlText", "")
-                            print("regis", registration_number)
-                if section.get("sectionComponentType") == "AVAILABILITY_CALENDAR_DEFAULT":
-                    items = section.get("section", {}).get("descriptionItems", [])
-                    for item in items:
-                        title = item.get("title", "")
-                        if "bed" in title:
-                            number_of_beds = title
-                        if "bath" in title:
-                            number_of_baths = title
-        except Exception as e:
-            print("Exception occurred:", e)
-        finally:
-            listing_item["beds"] = number_of_beds
-            listing_item["baths_text"] = number_of_baths
-            listing_item["registration_number"] = registration_number
-
-    @staticmethod
-    def _safe_get(data: dict, *keys, default=None):
-        """
-        Safely retrieve a nested value from a dictionary.
-
-        Args:
-            data (dict): The dictionary to retrieve the value from.
-            keys (tuple): The keys to navigate the nested structure.
-            default: The default value to return if the keys are not found.
-
-        Returns:
-            The value at the specified nested key or the default value.
-        """
-        try:
-            for key in keys:
-                data = data[key]
-            return data
-        except KeyError or TypeError:
-            print("data", data, keys)
-            return default
+        parsing.parse_listings_number(script_tag_json, listing_item)
 
     @staticmethod
     def _parse_listings_json(listings_json):
@@ -375,30 +444,7 @@ class ListingsSpider(scrapy.Spider):
         Returns:
             list: A list of listings extracted from the JSON object.
         """
-        return ListingsSpider._safe_get(listings_json,
-                                        "niobeMinimalClientData", 0, 1, "data", "presentation", "staysSearch",
-                                        "results", "searchResults", default=[])
-
-    @staticmethod
-    def _parse_listing_json(listing_json):
-        """
-        Parse method for extracting listing details from a JSON object.
-
-        Args:
-            listing_json (dict): The JSON object containing the listing details.
-
-        Returns:
-            list: A list of listing details extracted from the JSON object.
-        """
-        return ListingsSpider._safe_get(listing_json, "data", "presentation",
-                                        "stayProductDetailPage",
-                                        "sections", "sections", default=[])
-
-    @staticmethod
-    def _get_metadata_from_json(listing_json: dict):
-        return ListingsSpider._safe_get(listing_json, "data", "presentation",
-                                        "stayProductDetailPage",
-                                        "sections", "metadata", default=[])
+        return parsing.get_search_results(listings_json)
 
     @staticmethod
     def _get_cursors(script_json):
@@ -411,6 +457,4 @@ class ListingsSpider(scrapy.Spider):
         Returns:
             list: A list of pagination cursors extracted from the JSON object.
         """
-        return ListingsSpider._safe_get(script_json,
-                                        "niobeMinimalClientData", 0, 1, "data", "presentation", "staysSearch",
-                                        "results", "paginationInfo", "pageCursors", default=[])
+        return parsing.get_page_cursors(script_json)
@@ -0,0 +1,211 @@
+"""
+Local spool of the listings whose database write failed, replayed into the database once it is back.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from listings.listing_models import Listing
+
+logger = logging.getLogger(__name__)
+
+# Listing fields saved in the spool, in addition to the scrape date
+SPOOL_FIELDS = tuple(field.name for field in Listing._meta.concrete_fields if not field.primary_key)
+
+
+class ListingSpool:
+    """
+    Append-only JSON lines file of listings, bounded in size.
+
+    Every listing is a line of its fields. The file is flushed on every append and synced to disk every
+    `fsync_every` listings and when it is closed, so a crash loses at most the listings of the last batch.
+    Once the file reaches `max_bytes`, the listings are dropped, with an error.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, fsync_every: int = 200) -> None:
+        """
+        Initialize the ListingSpool.
+
+        Args:
+            path (str): Path of the spool file, created on the first append.
+            max_bytes (int): Maximum size of the spool file.
+            fsync_every (int): Number of listings appended between two syncs to disk.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.fsync_every = max(fsync_every, 1)
+        self._file = None
+        self._unsynced = 0
+
+    def append(self, listings) -> int:
+        """
+        Append listings to the spool.
+
+        Args:
+            listings (list[Listing]): The listings not saved.
+
+        Returns:
+            int: Number of listings appended, the others were dropped because the spool is full.
+        """
+        if self._file is not None and self._moved():
+            # The spool was moved away to be replayed, start a new one
+            self.close()
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'ab')
+        size = self._file.tell()
+        lines = []
+        for listing in listings:
+            line = json.dumps({field: getattr(listing, field) for field in SPOOL_FIELDS},
+                              cls=DjangoJSONEncoder).encode() + b'\n'
+            if size + len(line) > self.max_bytes:
+                break
+            size += len(line)
+            lines.append(line)
+        if lines:
+            self._file.write(b''.join(lines))
+            self._file.flush()
+            self._unsynced += len(lines)
+            if self._unsynced >= self.fsync_every:
+                self.sync()
+        if len(lines) < len(listings):
+            logger.error(f"Listing spool {self.path} is full ({self.max_bytes} bytes), "
+                         f"{len(listings) - len(lines)} listings dropped")
+        return len(lines)
+
+    def _moved(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+def _listing_from_record(record: dict) -> Listing:
+    listing = Listing(**{field: record.get(field) for field in SPOOL_FIELDS if field != 'scrapped_at'})
+    if record.get('scrapped_at'):
+        listing.scrapped_at = datetime.fromisoformat(record['scrapped_at'])
+    return listing
+
+
+def _scrape_date(value):
+    # The column stores a timestamp, whatever the model says
+    return value.date() if isinstance(value, datetime) else value
+
+
+def insert_new_listings(listings) -> int:
+    """
+    Insert the listings not already stored for the same scrape date.
+
+    A spooled write may have succeeded before it failed, and a rerun, a replay or a dead-letter retry may store the
+    listings of a crawl on the same day.
+
+    Args:
+        listings (list[Listing]): The listings to insert.
+
+    Returns:
+        int: Number of listings inserted.
+    """
+    stored = Listing.objects.filter(airbnb_listing_id__in={listing.airbnb_listing_id for listing in listings})
+    scrape_dates = {_scrape_date(listing.scrapped_at) for listing in listings}
+    if None not in scrape_dates:
+        # Not the previous scrapes of the listings, a year of daily harvests
+        stored = stored.filter(scrapped_at__gte=min(scrape_dates))
+    stored = set(stored.values_list('airbnb_listing_id', 'scrapped_at'))
+    stored = {(listing_id, _scrape_date(scrapped_at)) for listing_id, scrapped_at in stored}
+    new_listings = [listing for listing in listings
+                    if (listing.airbnb_listing_id, _scrape_date(listing.scrapped_at)) not in stored]
+    with transaction.atomic():
+        # The listings written by a crawl meanwhile are skipped by the listing_unique_scrape constraint
+        Listing.objects.bulk_create(new_listings, ignore_conflicts=True)
+    return len(new_listings)
+
+
+def replay_spool(path: str, batch_size: int = 1000) -> dict:
+    """
+    Load the listings of a spool file into the database, in batches.
+
+    The spool is first moved to `<path>.replay`, so that the crawls keep spooling to a new file meanwhile.
+    If the database fails again, the listings not loaded stay in `<path>.replay` and are loaded by the next
+    replay, before the spool.
+
+    Args:
+        path (str): Path of the spool file.
+        batch_size (int): Number of listings inserted at once.
+
+    Returns:
+        dict: Numbers of listings read from the spool, inserted, already stored and of unreadable lines.
+
+    Raises:
+        DatabaseError: If the database fails, once the listings not loaded are kept for the next replay.
+    """
+    replay_path = f"{path}.replay"
+    summary = {'read': 0, 'inserted': 0, 'skipped': 0, 'invalid': 0}
+    for source in (replay_path, path):
+        if not os.path.exists(source):
+            continue
+        if source == path:
+            os.replace(path, replay_path)
+        _replay_file(replay_path, max(batch_size, 1), summary)
+        os.remove(replay_path)
+    if summary['read']:
+        logger.info(f"Listing spool {path} replayed: {summary['inserted']} of {summary['read']} listings inserted")
+    return summary
+
+
+def _replay_file(replay_path: str, batch_size: int, summary: dict) -> None:
+    with open(replay_path, 'rb') as spool:
+        batch, offset = [], 0
+        for line in iter(spool.readline, b''):
+            try:
+                batch.append(_listing_from_record(json.loads(line)))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Unreadable line in the listing spool {replay_path}: {e}")
+                summary['invalid'] += 1
+            if len(batch) >= batch_size:
+                offset = _replay_batch(spool, replay_path, batch, offset, summary)
+                batch = []
+        _replay_batch(spool, replay_path, batch, offset, summary)
+
+
+def _replay_batch(spool, replay_path: str, batch, offset: int, summary: dict) -> int:
+    """
+    Insert a batch of the spool, keeping the lines from `offset` on in the spool if the database fails.
+
+    Returns:
+        int: The offset of the first line not replayed yet.
+    """
+    if batch:
+        try:
+            inserted = insert_new_listings(batch)
+        except Exception:
+            if not connection.in_atomic_block:
+                connection.close_if_unusable_or_obsolete()
+            spool.seek(offset)
+            remaining = spool.read()
+            with open(f"{replay_path}.tmp", 'wb') as pending:
+                pending.write(remaining)
+                pending.flush()
+                os.fsync(pending.fileno())
+            os.replace(f"{replay_path}.tmp", replay_path)
+            raise
+        summary['read'] += len(batch)
+        summary['inserted'] += inserted
+        summary['skipped'] += len(batch) - inserted
+    return spool.tell()
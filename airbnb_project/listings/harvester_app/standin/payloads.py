@@ -0,0 +1,72 @@
+"""
+Synthetic Airbnb listings and the payloads of the stand-in server, in the shape parsed by ListingsSpider.
+"""
+import json
+import random
+from typing import Dict, List
+
+from listings.harvester_app.harvester.spiders.constants import CITY_COORDINATE_BOUNDARY, Cities
+from listings.harvester_app.tests.samples import listing_details_json
+
+ROOM_TYPES = ("entire_home", "private_room", "shared_room", "hotel_room")
+BEDS = ("1 bed", "2 beds", "3 beds", "4 beds")
+BATHS = ("1 bath", "1.5 baths", "2 baths", "Shared half-bath")
+
+
+def synthetic_listings(count: int, city: Cities = Cities.VANCOUVER, seed: int = 0) -> List[Dict]:
+    """
+    Generate listings spread uniformly over the bounding box of a city.
+
+    Args:
+        count (int): Number of listings.
+        city (Cities): The city whose bounding box the listings are spread over.
+        seed (int): Seed of the generator, the same seed gives the same listings.
+
+    Returns:
+        list: Dictionaries with the search data ('id', 'title', 'name', 'room_type', 'latitude', 'longitude') and
+        the details ('person_capacity', 'registration_number', 'beds', 'baths') of the listings.
+    """
+    generator = random.Random(seed)
+    (lon_min, lat_min), (lon_max, lat_max) = CITY_COORDINATE_BOUNDARY[city]["bounding_box"]
+    listings = []
+    for number in range(count):
+        # Roughly a third of the listings show no registration number
+        registration_number = f"24-{generator.randrange(10 ** 6):06d}" if generator.random() > 0.3 else ""
+        listings.append({
+            "id": str(10 ** 17 + number),
+            "title": f"Home in Vancouver #{number}",
+            "name": f"Synthetic listing {number}",
+            "room_type": generator.choice(ROOM_TYPES),
+            "latitude": round(generator.uniform(lat_min, lat_max), 6),
+            "longitude": round(generator.uniform(lon_min, lon_max), 6),
+            "person_capacity": generator.randint(1, 8),
+            "registration_number": registration_number,
+            "beds": generator.choice(BEDS),
+            "baths": generator.choice(BATHS),
+        })
+    return listings
+
+
+def padded_listing_details(listing: Dict, padding_kb: int = 0) -> bytes:
+    """
+    Build the StaysPdpSections response of a listing, padded with unused sections.
+
+    Real responses weigh 100 to 200 KB, almost all of it in sections the spider doesn't read.
+
+    Args:
+        listing (dict): The listing, as generated by `synthetic_listings`.
+        padding_kb (int): Approximate size of the padding, in KB.
+
+    Returns:
+        bytes: The JSON response.
+    """
+    body = listing_details_json(location="Vancouver", person_capacity=listing["person_capacity"],
+                                registration_number=listing["registration_number"], beds=listing["beds"],
+                                baths=listing["baths"])
+    if not padding_kb:
+        return body
+    details = json.loads(body)
+    section = {"sectionComponentType": "PHOTO_TOUR", "section": {"caption": "x" * 200, "ids": list(range(20))}}
+    padding = [section] * (padding_kb * 1024 // len(json.dumps(section)))
+    details["data"]["presentation"]["stayProductDetailPage"]["sections"]["sections"].extend(padding)
+    return json.dumps(details).encode('utf-8')
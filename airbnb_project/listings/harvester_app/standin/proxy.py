@@ -0,0 +1,133 @@
+"""
+Local stand-in of an egress proxy, forwarding the requests to the stand-in server and simulating bans.
+"""
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+CAPTCHA_PAGE = b'<html><body><div id="px-captcha">Please complete the captcha to continue</div></body></html>'
+
+# Headers only meant for the proxy or the connection to the proxy
+HOP_BY_HOP_HEADERS = ('connection', 'keep-alive', 'proxy-authorization', 'proxy-connection', 'te', 'trailers',
+                      'transfer-encoding', 'upgrade')
+
+
+class StandInProxy:
+    """
+    Threaded HTTP forward proxy for plain HTTP URLs, e.g. of a StandInAirbnb server.
+
+    After `ban_after` requests, the proxy answers the following `ban_length` requests with a ban instead of
+    forwarding them: a 403, or a captcha page when `captcha` is set, as Airbnb does for a throttled egress IP.
+
+    Usage:
+        with StandInProxy(ban_after=100, ban_length=10) as proxy:
+            settings['HARVEST_PROXIES'] = [proxy.url]
+    """
+
+    def __init__(self, ban_after: int = 0, ban_length: int = 0, captcha: bool = False, host: str = "127.0.0.1",
+                 port: int = 0) -> None:
+        """
+        Initialize the StandInProxy, listening on `host` and `port` (0 for any free port).
+
+        Args:
+            ban_after (int): Number of requests forwarded before a ban, 0 to never ban.
+            ban_length (int): Number of requests banned, 0 for a permanent ban.
+            captcha (bool): Whether to ban with a captcha page rather than a 403.
+            host (str): The host to listen on.
+            port (int): The port to listen on.
+        """
+        self.ban_after = ban_after
+        self.ban_length = ban_length
+        self.captcha = captcha
+        self.forwarded = 0
+        self.banned = 0
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInProxy":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandInProxy":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def is_banned(self) -> bool:
+        """
+        Count a request and tell whether it falls in the ban.
+
+        Returns:
+            bool: Whether to ban the request.
+        """
+        with self._lock:
+            self._requests += 1
+            banned = bool(self.ban_after) and self._requests > self.ban_after and \
+                (not self.ban_length or self._requests <= self.ban_after + self.ban_length)
+            if banned:
+                self.banned += 1
+            else:
+                self.forwarded += 1
+            return banned
+
+
+def _handler(proxy: StandInProxy):
+    """
+    Build the request handler class of a StandInProxy.
+    """
+
+    class StandInProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if proxy.is_banned():
+                status, headers, body = (200, [('Content-Type', 'text/html')], CAPTCHA_PAGE) if proxy.captcha \
+                    else (403, [('Content-Type', 'text/plain')], b"Forbidden")
+            else:
+                status, headers, body = self.forward()
+            self.send_response(status)
+            for name, value in headers:
+                if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != 'content-length':
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def forward(self):
+            target = urlsplit(self.path)
+            if target.scheme != "http":
+                return 501, [('Content-Type', 'text/plain')], b"Only plain HTTP URLs are proxied"
+            headers = {name: value for name, value in self.headers.items()
+                       if name.lower() not in HOP_BY_HOP_HEADERS}
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+            try:
+                connection.request("GET", f"{target.path}?{target.query}" if target.query else target.path or "/",
+                                   headers=headers)
+                response = connection.getresponse()
+                return response.status, response.getheaders(), response.read()
+            except OSError as e:
+                return 502, [('Content-Type', 'text/plain')], f"Bad Gateway: {e}".encode()
+            finally:
+                connection.close()
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInProxyHandler
@@ -0,0 +1,274 @@
+"""
+Local stand-in of the Airbnb search pages and StaysPdpSections API, to load test the harvester without airbnb.ca.
+"""
+import base64
+import json
+import multiprocessing
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from listings.harvester_app.harvester.spiders.airbnb_url_builder import AirBnbURLBuilder
+from listings.harvester_app.standin.payloads import padded_listing_details, synthetic_listings
+from listings.harvester_app.standin.proxy import StandInProxy
+from listings.harvester_app.tests.samples import search_page_html
+
+SEARCH_PATH = f"/{AirBnbURLBuilder.HOMES_PATH}"
+LISTING_API_PATH = "/api/v3/StaysPdpSections"
+
+
+class StandInAirbnb:
+    """
+    Threaded HTTP server answering the requests of ListingsSpider with synthetic listings.
+
+    The search pages return the listings inside the requested map bounds, `page_size` at a time, with the
+    cursors of the following pages. The listing API returns the details of the listing encoded in its
+    `variables` parameter. Every response is delayed by `latency` seconds plus up to `jitter` seconds, a
+    fraction `error_rate` of them fail with a 500, and after every `burst_every` requests the following
+    `burst_length` ones are rate limited with a 429.
+
+    Usage:
+        with StandInAirbnb(listings=5000, latency=0.05) as server:
+            settings['AIRBNB_BASE_URL'] = server.url
+            settings['AIRBNB_LISTING_API_URL'] = listing_api_url(settings['AIRBNB_LISTING_API_URL'], server.url)
+    """
+
+    def __init__(self, listings: int = 1000, page_size: int = 18, padding_kb: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, burst_every: int = 0, burst_length: int = 0,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Initialize the StandInAirbnb server, listening on `host` and `port` (0 for any free port).
+
+        Args:
+            listings (int): Number of synthetic listings.
+            page_size (int): Number of listings per search page.
+            padding_kb (int): Padding of the listing details responses, in KB.
+            latency (float): Minimum delay of the responses, in seconds.
+            jitter (float): Maximum random delay added to the latency, in seconds.
+            error_rate (float): Fraction of the requests failing with a 500.
+            burst_every (int): Number of requests between two bursts of 429, 0 for no bursts.
+            burst_length (int): Number of requests rate limited in a burst.
+            seed (int): Seed of the listings and of the errors.
+            host (str): The host to listen on.
+            port (int): The port to listen on.
+        """
+        self.listings = synthetic_listings(listings, seed=seed)
+        self.listings_by_id = {listing["id"]: listing for listing in self.listings}
+        self.page_size = page_size
+        self.padding_kb = padding_kb
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.statuses = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self._httpd.server_address[0]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def start(self) -> "StandInAirbnb":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandInAirbnb":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def respond(self, path: str, query: Dict[str, List[str]]) -> tuple[int, str, bytes]:
+        """
+        Build the response of a request, after the configured latency.
+
+        Args:
+            path (str): The path of the request.
+            query (dict): The parsed query string of the request.
+
+        Returns:
+            tuple: The status, content type and body of the response.
+        """
+        with self._lock:
+            in_burst = self.burst_every and self._requests % (self.burst_every + self.burst_length) >= self.burst_every
+            self._requests += 1
+            failed = self._random.random() < self.error_rate
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+
+        if in_burst:
+            status, content_type, body = 429, "text/plain", b"Too Many Requests"
+        elif failed:
+            status, content_type, body = 500, "text/plain", b"Internal Server Error"
+        elif path == SEARCH_PATH:
+            status, content_type, body = 200, "text/html; charset=utf-8", self.search_page(query)
+        elif path.startswith(LISTING_API_PATH):
+            status, content_type, body = self.listing_details(query)
+        else:
+            status, content_type, body = 404, "text/plain", b"Not Found"
+        with self._lock:
+            self.statuses[status] += 1
+        return status, content_type, body
+
+    def search_page(self, query: Dict[str, List[str]]) -> bytes:
+        """
+        Build the search page of the listings inside the map bounds of the query.
+
+        Args:
+            query (dict): The parsed query string, with the 'ne_lat', 'ne_lng', 'sw_lat' and 'sw_lng' bounds and
+                the optional 'cursor' of the page.
+
+        Returns:
+            bytes: The HTML page.
+        """
+        def bound(name):
+            return float(query[name][0])
+
+        try:
+            ne_lat, ne_lng, sw_lat, sw_lng = bound("ne_lat"), bound("ne_lng"), bound("sw_lat"), bound("sw_lng")
+        except (KeyError, ValueError):
+            return search_page_html([])
+        matches = [listing for listing in self.listings
+                   if sw_lat <= listing["latitude"] < ne_lat and sw_lng <= listing["longitude"] < ne_lng]
+        cursor = query.get("cursor", [None])[-1]
+        offset = _decode_cursor(cursor) if cursor else 0
+        cursors = [_encode_cursor(start) for start in range(self.page_size, len(matches), self.page_size)]
+        return search_page_html(matches[offset:offset + self.page_size], cursors)
+
+    def listing_details(self, query: Dict[str, List[str]]) -> tuple[int, str, bytes]:
+        """
+        Build the StaysPdpSections response of the listing encoded in the 'variables' of the query.
+
+        Args:
+            query (dict): The parsed query string.
+
+        Returns:
+            tuple: The status, content type and body of the response.
+        """
+        try:
+            encoded_id = json.loads(query["variables"][0])["id"]
+            listing_id = unquote(base64.b64decode(encoded_id).decode("utf-8").split(":", 1)[1])
+            listing = self.listings_by_id[listing_id]
+        except (KeyError, IndexError, ValueError):
+            return 404, "application/json", b'{"errors": [{"message": "Listing not found"}]}'
+        return 200, "application/json", padded_listing_details(listing, self.padding_kb)
+
+
+class StandInProcess:
+    """
+    StandInAirbnb server, and optionally StandInProxy proxies, running in a child process, so that they don't
+    share the CPU time and memory of the harvester they load test.
+
+    Usage:
+        with StandInProcess(listings=5000, latency=0.05) as url:
+            settings['AIRBNB_BASE_URL'] = url
+    """
+
+    def __init__(self, proxies: int = 0, proxy_options: dict = None, **options) -> None:
+        """
+        Initialize the StandInProcess.
+
+        Args:
+            proxies (int): Number of StandInProxy proxies to start in front of the server.
+            proxy_options (dict, optional): The arguments of the StandInProxy proxies.
+            **options: The arguments of StandInAirbnb.
+        """
+        self.proxies = proxies
+        self.proxy_options = proxy_options or {}
+        self.options = options
+        self.url = None
+        self.proxy_urls = []
+        self._process = None
+
+    def __enter__(self) -> str:
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(ready, self.options, self.proxies, self.proxy_options), daemon=True)
+        self._process.start()
+        self.url, self.proxy_urls = ready.get(timeout=60)
+        return self.url
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._process.terminate()
+        self._process.join()
+
+
+def listing_api_url(template: str, base_url: str) -> str:
+    """
+    Point a listing API URL template, e.g. the AIRBNB_LISTING_API_URL setting, to a stand-in server.
+
+    Args:
+        template (str): The URL template of the Airbnb listing API.
+        base_url (str): The URL of the stand-in server.
+
+    Returns:
+        str: The same template on the stand-in server.
+    """
+    parts = urlsplit(template)
+    return f"{base_url}{parts.path}?{parts.query}"
+
+
+def _serve(ready, options, proxies, proxy_options) -> None:
+    server = StandInAirbnb(**options)
+    proxy_urls = [StandInProxy(**proxy_options).start().url for _ in range(proxies)]
+    ready.put((server.url, proxy_urls))
+    server.serve_forever()
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"section_offset": 0, "items_offset": offset}).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor))["items_offset"])
+    except (ValueError, KeyError, TypeError):
+        return 0
+
+
+def _handler(server: StandInAirbnb):
+    """
+    Build the request handler class of a StandInAirbnb server.
+    """
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            status, content_type, body = server.respond(parts.path, parse_qs(parts.query))
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
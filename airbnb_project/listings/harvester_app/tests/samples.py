@@ -0,0 +1,66 @@
+"""
+Builders of sample Airbnb responses, in the shape parsed by ListingsSpider.
+"""
+import json
+
+
+def search_page_html(listings, page_cursors=None):
+    """
+    Build a search results page embedding the search JSON in its deferred state script tag.
+
+    Args:
+        listings (list): Dictionaries with the 'id', 'title', 'name', 'latitude' and 'longitude' of the listings.
+        page_cursors (list, optional): The pagination cursors of the search.
+
+    Returns:
+        bytes: The HTML page.
+    """
+    results = [{
+        "listing": {
+            "id": listing["id"],
+            "title": listing.get("title", ""),
+            "name": listing.get("name", ""),
+            "roomTypeCategory": listing.get("room_type", "entire_home"),
+            "coordinate": {"latitude": listing.get("latitude", 49.28), "longitude": listing.get("longitude", -123.12)},
+        }
+    } for listing in listings]
+    search_json = {
+        "niobeMinimalClientData": [[
+            "StaysSearch",
+            {"data": {"presentation": {"staysSearch": {"results": {
+                "searchResults": results,
+                "paginationInfo": {"pageCursors": page_cursors or []},
+            }}}}},
+        ]]
+    }
+    return (f'<html><body><script id="data-deferred-state-0" type="application/json">'
+            f'{json.dumps(search_json)}</script></body></html>').encode('utf-8')
+
+
+def listing_details_json(location="Vancouver", person_capacity=2, registration_number="", beds="1 bed",
+                         baths="1 bath"):
+    """
+    Build a StaysPdpSections API response.
+
+    Args:
+        location (str): The location of the listing.
+        person_capacity (int): The number of guests.
+        registration_number (str): The registration number, omitted when empty.
+        beds (str): The bed description.
+        baths (str): The bath description.
+
+    Returns:
+        bytes: The JSON response.
+    """
+    modal_items = [{"title": "Registration number", "html": {"htmlText": registration_number}}] \
+        if registration_number else []
+    sections = {
+        "metadata": {"sharingConfig": {"location": location, "personCapacity": person_capacity}},
+        "sections": [
+            {"sectionComponentType": "PDP_DESCRIPTION_MODAL", "section": {"items": modal_items}},
+            {"sectionComponentType": "AVAILABILITY_CALENDAR_DEFAULT",
+             "section": {"descriptionItems": [{"title": beds}, {"title": baths}]}},
+        ],
+    }
+    details = {"data": {"presentation": {"stayProductDetailPage": {"sections": sections}}}}
+    return json.dumps(details).encode('utf-8')
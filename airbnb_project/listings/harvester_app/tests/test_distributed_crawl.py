@@ -0,0 +1,88 @@
+import unittest
+import fakeredis
+from scrapy import Request
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.test import get_crawler
+from listings.harvester_app.harvester.distributed import RedisKeys, RedisScheduler, RedisSeedMiddleware
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDistributedCrawl(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.clock = FakeClock()
+        self.nodes = [self.open_node() for _ in range(2)]
+
+    def open_node(self):
+        crawler = get_crawler(ListingsSpider, settings_dict={'HARVEST_REDIS_PREFIX': 'test'})
+        spider = crawler._create_spider()
+        crawler.stats.open_spider(spider)
+        scheduler = RedisScheduler(fakeredis.FakeRedis(server=self.server), crawler, idle_timeout=10,
+                                   clock=self.clock)
+        scheduler.open(spider)
+        return scheduler
+
+    def test_shared_queue_by_priority(self):
+        first, second = self.nodes
+        listing = Request("https://www.airbnb.ca/api/1", callback=first.spider.handle_listing, priority=150,
+                          meta={'airbnb_params': {'airbnb_listing_id': '1'}, 'tile': {'index': 3}})
+        self.assertTrue(first.enqueue_request(Request("https://www.airbnb.ca/s/1", priority=10)))
+        self.assertTrue(first.enqueue_request(listing))
+
+        self.assertTrue(second.has_pending_requests())
+        request = second.next_request()
+        self.assertEqual(request.url, listing.url)
+        self.assertEqual(request.callback, second.spider.handle_listing)
+        self.assertEqual(request.meta['airbnb_params'], {'airbnb_listing_id': '1'})
+        self.assertEqual(first.next_request().url, "https://www.airbnb.ca/s/1")
+        self.assertIsNone(first.next_request())
+
+    def test_duplicates_filtered_across_nodes(self):
+        first, second = self.nodes
+        self.assertTrue(first.enqueue_request(Request("https://www.airbnb.ca/api/1")))
+        self.assertFalse(second.enqueue_request(Request("https://www.airbnb.ca/api/1")))
+        self.assertTrue(second.enqueue_request(Request("https://www.airbnb.ca/api/1", dont_filter=True)))
+        self.assertEqual(len(first), 2)
+        self.assertEqual(second.stats.get_value('dupefilter/filtered', spider=second.spider), 1)
+
+    def test_waits_for_other_nodes_when_idle(self):
+        first = self.nodes[0]
+        with self.assertRaises(DontCloseSpider):
+            first.spider_idle(first.spider)
+        self.clock.now = 11
+        first.spider_idle(first.spider)
+
+    def test_last_node_deletes_the_keys(self):
+        first, second = self.nodes
+        first.enqueue_request(Request("https://www.airbnb.ca/api/1"))
+        server = fakeredis.FakeRedis(server=self.server)
+        first.close('finished')
+        self.assertEqual(server.zcard(first.keys.queue), 1)
+        second.close('finished')
+        self.assertEqual(server.keys('test:*'), [])
+
+    def test_single_seeding_node(self):
+        crawlers = [get_crawler(ListingsSpider, settings_dict={'HARVEST_REDIS_PREFIX': 'test'}) for _ in range(2)]
+        middlewares = [RedisSeedMiddleware(fakeredis.FakeRedis(server=self.server), crawler, node=f"node-{index}")
+                       for index, crawler in enumerate(crawlers)]
+        seeds = [Request("https://www.airbnb.ca/s/1"), Request("https://www.airbnb.ca/s/2")]
+
+        spider = crawlers[0]._create_spider()
+        self.assertEqual(list(middlewares[0].process_start_requests(iter(seeds), spider)), seeds)
+        self.assertEqual(list(middlewares[1].process_start_requests(iter(seeds), spider)), [])
+        server = fakeredis.FakeRedis(server=self.server)
+        self.assertEqual(server.get(RedisKeys('test', spider.name).seeded), b'node-0')
+
+
+if __name__ == '__main__':
+    unittest.main()
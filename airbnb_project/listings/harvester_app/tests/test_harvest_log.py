@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+from listings.harvester_app.harvester.extensions import HarvestLogReporter
+from listings.harvester_app.harvester.logs import HarvestLog, JsonLogFormatter
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHarvestLog(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.stats = MemoryStatsCollector(get_crawler())
+        self.log = HarvestLog(clock=self.clock)
+        self.log.configure(self.stats, interval=60, burst=2, samples=3)
+        self.logger = logging.getLogger('test_harvest_log')
+
+    def test_messages_limited_per_key(self):
+        with self.assertLogs(self.logger, level='WARNING') as logs:
+            logged = [self.log.log(self.logger, 'parsing.error', "Listing %s failed", index) for index in range(5)]
+            self.log.log(self.logger, 'spider.error', "Other error")
+        self.assertEqual(logged, [True, True, False, False, False])
+        self.assertEqual(logs.output, ["WARNING:test_harvest_log:Listing 0 failed",
+                                       "WARNING:test_harvest_log:Listing 1 failed",
+                                       "WARNING:test_harvest_log:Other error"])
+        self.assertEqual(self.stats.get_value('log/parsing.error'), 5)
+
+    def test_suppressed_messages_summarized(self):
+        for index in range(4):
+            self.log.log(self.logger, 'parsing.error', "Listing %s failed", index)
+        self.clock.now = 61
+        with self.assertLogs(self.logger, level='WARNING') as logs:
+            self.assertTrue(self.log.log(self.logger, 'parsing.error', "Listing %s failed", 4))
+            self.log.log(self.logger, 'parsing.error', "Listing %s failed", 5)
+            self.log.log(self.logger, 'parsing.error', "Listing %s failed", 6)
+            self.log.flush()
+        self.assertEqual([record.getMessage() for record in logs.records],
+                         ["2 more 'parsing.error' messages in the last 60 s", "Listing 4 failed", "Listing 5 failed",
+                          "1 more 'parsing.error' messages in the last 60 s"])
+        self.assertEqual(self.stats.get_value('log/suppressed'), 3)
+
+    def test_samples_written(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'logs', 'samples.jsonl')
+            for index in range(5):
+                self.log.log(self.logger, 'parsing.error', "Listing %s failed", index, payload={'id': index},
+                             level=logging.DEBUG)
+            self.assertEqual(self.log.write_samples(path), 3)
+            self.assertEqual(self.log.write_samples(path), 0)
+            with open(path) as samples:
+                samples = [json.loads(line) for line in samples]
+        self.assertEqual([sample['payload'] for sample in samples], [{'id': 2}, {'id': 3}, {'id': 4}])
+        self.assertEqual(samples[0]['message'], "Listing 2 failed")
+        self.assertEqual(samples[0]['event'], 'parsing.error')
+
+    def test_json_format(self):
+        record = self.logger.makeRecord('test_harvest_log', logging.ERROR, __file__, 1, "Listing %s failed", ('1',),
+                                        None, extra={'event': 'parsing.error'})
+        entry = json.loads(JsonLogFormatter().format(record))
+        self.assertEqual(entry['message'], "Listing 1 failed")
+        self.assertEqual(entry['level'], 'ERROR')
+        self.assertEqual(entry['event'], 'parsing.error')
+
+    def test_json_format_restored_after_the_crawl(self):
+        handler = logging.StreamHandler()
+        formatter = logging.Formatter("%(message)s")
+        handler.setFormatter(formatter)
+        logging.root.addHandler(handler)
+        self.addCleanup(logging.root.removeHandler, handler)
+        reporter = HarvestLogReporter(self.stats, log_format='json')
+        spider = get_crawler()._create_spider('listings')
+
+        reporter.spider_opened(spider)
+        self.assertIsInstance(handler.formatter, JsonLogFormatter)
+        reporter.spider_closed(spider)
+        self.assertIs(handler.formatter, formatter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import tempfile
+import unittest
+from email.utils import formatdate
+from time import time
+from scrapy import Spider
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+from listings.harvester_app.harvester.httpcache import EndpointTTLPolicy, HarvestCacheMiddleware
+
+
+class TestHarvestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.crawler = get_crawler(Spider, settings_dict={
+            'HTTPCACHE_ENABLED': True,
+            'HTTPCACHE_DIR': self.directory.name,
+            'HTTPCACHE_STORAGE': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+            'HTTPCACHE_POLICY': 'listings.harvester_app.harvester.httpcache.EndpointTTLPolicy',
+            'HTTPCACHE_ALWAYS_STORE': True,
+            'HTTPCACHE_IGNORE_RESPONSE_CACHE_CONTROLS': ['no-store', 'no-cache', 'must-revalidate', 'private',
+                                                         'max-age'],
+            'HARVEST_CACHE_SEARCH_TTL': 60,
+            'HARVEST_CACHE_LISTING_TTL': 3600,
+        })
+        self.spider = self.crawler._create_spider('listings')
+        self.crawler.stats.open_spider(self.spider)
+        self.middleware = HarvestCacheMiddleware.from_crawler(self.crawler)
+        self.middleware.spider_opened(self.spider)
+
+    def tearDown(self):
+        self.middleware.storage.close_spider(self.spider)
+        self.directory.cleanup()
+
+    def fetch(self, request, status=200, body=b'', headers=None):
+        """
+        Run a request through the middleware like the engine, answering with the given response on a miss.
+        """
+        cached = self.middleware.process_request(request, self.spider)
+        if cached is not None:
+            return cached
+        response = Response(request.url, status=status, body=body, headers=headers, request=request)
+        return self.middleware.process_response(request, response, self.spider)
+
+    def stat(self, key):
+        return self.crawler.stats.get_value(f'httpcache/{key}', spider=self.spider)
+
+    def test_ttl_by_endpoint(self):
+        policy = EndpointTTLPolicy(self.crawler.settings)
+        self.assertEqual(policy.ttl(Request("https://www.airbnb.ca/s/1")), 60)
+        self.assertEqual(policy.ttl(Request("https://www.airbnb.ca/api/1", meta={'airbnb_params': {}})), 3600)
+
+    def test_fresh_response_is_served_from_cache(self):
+        body = b'<html>page</html>'
+        self.fetch(Request("https://www.airbnb.ca/s/1"), body=body,
+                   headers={'Cache-Control': 'no-cache', 'Date': formatdate(usegmt=True)})
+
+        response = self.fetch(Request("https://www.airbnb.ca/s/1"), status=500)
+        self.assertEqual(response.status, 200)
+        self.assertIn('cached', response.flags)
+        self.assertEqual(self.stat('hit'), 1)
+        self.assertEqual(self.stat('bytes_saved'), len(body))
+
+    def test_errors_are_not_cached(self):
+        self.fetch(Request("https://www.airbnb.ca/s/1"), status=429)
+        self.assertEqual(self.fetch(Request("https://www.airbnb.ca/s/1"), status=200).status, 200)
+        self.assertEqual(self.stat('miss'), 2)
+
+    def test_expired_response_is_revalidated(self):
+        body = b'{"data": {}}' * 100
+        stale_date = formatdate(time() - 7200, usegmt=True)
+        self.fetch(Request("https://www.airbnb.ca/api/1", meta={'airbnb_params': {}}), body=body,
+                   headers={'ETag': '"v1"', 'Last-Modified': stale_date, 'Date': stale_date})
+
+        request = Request("https://www.airbnb.ca/api/1", meta={'airbnb_params': {}})
+        response = self.fetch(request, status=304)
+        self.assertEqual(request.headers['If-None-Match'], b'"v1"')
+        self.assertEqual(request.headers['If-Modified-Since'], stale_date.encode())
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, body)
+        self.assertEqual(self.stat('revalidate'), 1)
+        self.assertEqual(self.stat('bytes_saved'), len(body))
+
+        # The revalidated response is fresh again
+        response = self.fetch(Request("https://www.airbnb.ca/api/1", meta={'airbnb_params': {}}), status=500)
+        self.assertEqual(response.body, body)
+        self.assertEqual(self.stat('hit'), 1)
+
+        self.middleware.spider_closed(self.spider)
+        self.assertEqual(self.stat('hit_ratio'), round(2 / 3, 4))
+
+    def test_modified_response_replaces_cached_one(self):
+        stale_date = formatdate(time() - 7200, usegmt=True)
+        self.fetch(Request("https://www.airbnb.ca/s/1"), body=b'old', headers={'ETag': '"v1"', 'Date': stale_date})
+
+        response = self.fetch(Request("https://www.airbnb.ca/s/1"), body=b'new',
+                              headers={'ETag': '"v2"', 'Date': formatdate(usegmt=True)})
+        self.assertEqual(response.body, b'new')
+        self.assertEqual(self.fetch(Request("https://www.airbnb.ca/s/1"), status=500).body, b'new')
+        self.assertEqual(self.stat('invalidate'), 1)
+        self.assertEqual(self.stat('bytes_saved'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import tempfile
+import unittest
+from listings.harvester_app.harvester import parsing
+from listings.harvester_app.harvester.archive import ResponseArchive
+from listings.harvester_app.harvester.parse_engine import ParseEngine
+from listings.harvester_app.tests.samples import listing_details_json, search_page_html
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_parse_search_page(self):
+        body = search_page_html([{"id": "1", "title": "Condo"}, {"id": ""}], page_cursors=["a", "b"])
+
+        listings, cursors = parsing.parse_search_page(body)
+
+        self.assertEqual([listing["airbnb_listing_id"] for listing in listings], ["1"])
+        self.assertEqual(listings[0]["title"], "Condo")
+        self.assertEqual(cursors, ["a", "b"])
+
+    def test_missing_script_tag(self):
+        with self.assertRaises(ValueError):
+            parsing.extract_script_json(b"<html></html>")
+
+    def test_parse_listing_details(self):
+        body = listing_details_json(location="Burnaby", person_capacity=3, registration_number="24-000001",
+                                    beds="2 beds", baths="1 bath")
+
+        item = parsing.parse_listing_details(body, {"airbnb_listing_id": "1", "title": "Condo"})
+
+        self.assertEqual(item.airbnb_listing_id, "1")
+        self.assertEqual(item.title, "Condo")
+        self.assertEqual(item.location, "Burnaby")
+        self.assertEqual(item.person_capacity, 3)
+        self.assertEqual(item.registration_number, "24-000001")
+        self.assertEqual(item.beds, "2 beds")
+
+    def test_invalid_listing_details(self):
+        item = parsing.parse_listing_details(b"<html>blocked</html>", {"airbnb_listing_id": "1"})
+        self.assertEqual(item.airbnb_listing_id, "1")
+        self.assertIsNone(item.registration_number)
+
+
+class TestParseEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        archive = ResponseArchive(self.directory.name)
+        archive.store("https://www.airbnb.ca/s/1", "search-1", "search", 200,
+                      search_page_html([{"id": str(number), "title": f"Listing {number}"} for number in range(10)]))
+        for number in range(10):
+            archive.store(f"https://www.airbnb.ca/api/{number}", f"listing-{number}", "listing", 200,
+                          listing_details_json(registration_number=f"24-{number:06d}"),
+                          meta={'airbnb_params': {'airbnb_listing_id': str(number)}})
+        archive.close()
+        archive = ResponseArchive(self.directory.name)
+        self.search_entries = archive.entries(kind="search")
+        self.listing_entries = archive.entries(kind="listing")
+        archive.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunks_spread_evenly(self):
+        engine = ParseEngine(self.directory.name, workers=2)
+        self.assertEqual([len(chunk) for chunk in engine.chunks(self.listing_entries)], [2, 2, 2, 2, 2])
+        self.assertEqual(engine.chunks([]), [])
+
+    def test_parse_in_process(self):
+        with ParseEngine(self.directory.name, workers=0, chunk_size=3) as engine:
+            search_params = engine.parse_search_pages(self.search_entries)
+            items = [item for chunk in engine.iter_listing_items(self.listing_entries, search_params)
+                     for item in chunk]
+
+        self.assertEqual(len(items), 10)
+        self.assertEqual({item.title for item in items}, {f"Listing {number}" for number in range(10)})
+        self.assertEqual(engine.errors, 0)
+
+    def test_parse_in_process_pool(self):
+        with ParseEngine(self.directory.name, workers=2) as engine:
+            items = [item for chunk in engine.iter_listing_items(self.listing_entries) for item in chunk]
+
+        self.assertEqual(sorted(item.registration_number for item in items),
+                         [f"24-{number:06d}" for number in range(10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import Mock
+from scrapy.http import Request, TextResponse
+from listings.harvester_app.harvester.extensions import ReactorLagMonitor
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.offload import ParseOffloader
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+from listings.harvester_app.tests.samples import listing_details_json
+
+
+class TestParseOffloader(unittest.TestCase):
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            ParseOffloader('gpu')
+
+    def test_inline_mode(self):
+        results = []
+        ParseOffloader().run(sum, [1, 2]).addCallback(results.append)
+        self.assertEqual(results, [3])
+
+    def test_offloaded_listing_callback(self):
+        spider = ListingsSpider()
+        spider.settings = get_harvester_settings()
+        spider.parse_offloader = ParseOffloader()
+        spider.parse_offloader.mode = 'thread'
+
+        request = spider._create_listing_request({"airbnb_listing_id": "1"})
+
+        self.assertEqual(request.callback, spider.handle_listing_offloaded)
+
+    def test_handle_listing_offloaded(self):
+        spider = ListingsSpider()
+        request = Request("https://www.airbnb.ca/api/1", meta={'airbnb_params': {'airbnb_listing_id': '1'}})
+        response = TextResponse(request.url, body=listing_details_json(registration_number="24-000001"),
+                                request=request)
+
+        generator = spider.handle_listing_offloaded(response)
+        awaitable = generator.__anext__()
+        with self.assertRaises(StopIteration) as done:
+            awaitable.send(None)
+
+        self.assertEqual(done.exception.value.registration_number, "24-000001")
+
+
+class TestReactorLagMonitor(unittest.TestCase):
+
+    def test_records_lag(self):
+        stats = Mock()
+        now = [0.0]
+        monitor = ReactorLagMonitor(stats, interval=0.5, clock=lambda: now[0])
+        monitor._expected_at = 0.5
+
+        now[0] = 0.5
+        monitor.tick()
+        now[0] = 1.25
+        monitor.tick()
+        monitor.spider_closed(None)
+
+        stats.max_value.assert_any_call('reactor_lag/max_seconds', 0.25)
+        stats.inc_value.assert_any_call('reactor_lag/slow_samples')
+        stats.set_value.assert_called_once_with('reactor_lag/mean_seconds', 0.125)
+
+
+if __name__ == '__main__':
+    unittest.main()
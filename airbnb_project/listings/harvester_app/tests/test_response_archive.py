@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import Mock
+from scrapy.http import Request, Response
+from listings.harvester_app.harvester.archive import ResponseArchive
+from listings.harvester_app.harvester.middlewares import ResponseArchiveMiddleware
+
+
+class TestResponseArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = ResponseArchive(self.directory.name)
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def test_store_and_read(self):
+        digest, written = self.archive.store("https://www.airbnb.ca/s/1", "f1", "search", 200, b"<html>page</html>")
+        self.archive.flush()
+
+        self.assertTrue(written)
+        self.assertEqual(self.archive.read(digest), b"<html>page</html>")
+        with self.assertRaises(KeyError):
+            self.archive.read("missing")
+
+    def test_identical_bodies_are_stored_once(self):
+        body = b'{"data": {}}' * 100
+        first_digest, _ = self.archive.store("https://www.airbnb.ca/api/1", "f1", "listing", 200, body)
+        second_digest, written = self.archive.store("https://www.airbnb.ca/api/2", "f2", "listing", 200, body)
+        self.archive.flush()
+
+        self.assertEqual(first_digest, second_digest)
+        self.assertFalse(written)
+        self.assertEqual(len(self.archive.entries()), 2)
+        segments = [os.path.join(root, name) for root, _, names in os.walk(self.directory.name) for name in names
+                    if name.endswith('.zst')]
+        self.assertEqual(len(segments), 1)
+        self.assertLess(os.path.getsize(segments[0]), len(body))
+
+    def test_entries_by_date_and_kind(self):
+        self.archive.store("https://www.airbnb.ca/s/1", "f1", "search", 200, b"a",
+                           archived_at=datetime(2024, 11, 1, tzinfo=timezone.utc))
+        self.archive.store("https://www.airbnb.ca/s/1", "f1", "search", 200, b"b",
+                           archived_at=datetime(2024, 11, 2, tzinfo=timezone.utc))
+        self.archive.store("https://www.airbnb.ca/s/1", "f1", "search", 200, b"c",
+                           archived_at=datetime(2024, 11, 2, 12, tzinfo=timezone.utc))
+        self.archive.store("https://www.airbnb.ca/api/1", "f2", "listing", 200, b"d",
+                           meta={'airbnb_params': {'airbnb_listing_id': '1'}},
+                           archived_at=datetime(2024, 11, 2, tzinfo=timezone.utc))
+        self.archive.flush()
+
+        entries = self.archive.entries(since="2024-11-02")
+        self.assertEqual([entry.kind for entry in entries], ["listing", "search"])
+        self.assertEqual(self.archive.read(entries[1].digest), b"c")
+        self.assertEqual(entries[0].meta, {'airbnb_params': {'airbnb_listing_id': '1'}})
+        self.assertEqual(len(self.archive.entries(kind="search")), 2)
+
+
+class TestResponseArchiveMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.archive = Mock()
+        self.archive.store.return_value = ("digest", True)
+        self.stats = Mock()
+        fingerprinter = Mock()
+        fingerprinter.fingerprint.return_value = b'\x01\x02'
+        self.middleware = ResponseArchiveMiddleware(self.archive, self.stats, fingerprinter)
+
+    def test_archives_listing_response(self):
+        request = Request("https://www.airbnb.ca/api/1", meta={'airbnb_params': {'airbnb_listing_id': '1'}})
+        response = Response(request.url, status=200, body=b'{}', request=request)
+
+        self.assertIs(self.middleware.process_response(request, response, Mock()), response)
+        self.archive.store.assert_called_once_with(
+            url=request.url, fingerprint='0102', kind='listing', status=200, body=b'{}',
+            meta={'airbnb_params': {'airbnb_listing_id': '1'}})
+        self.stats.inc_value.assert_any_call('response_archive/listing')
+
+    def test_skips_errors(self):
+        request = Request("https://www.airbnb.ca/s/1")
+        self.middleware.process_response(request, Response(request.url, status=429, request=request), Mock())
+        self.archive.store.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
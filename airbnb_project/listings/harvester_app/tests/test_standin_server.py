@@ -0,0 +1,77 @@
+import base64
+import json
+import unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from listings.harvester_app.harvester import parsing
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.spiders.listings_spider import base64_encode_string, combine_and_url_encode
+from listings.harvester_app.harvester.spiders.constants import CITY_COORDINATE_BOUNDARY, Cities
+from listings.harvester_app.standin.server import StandInAirbnb, listing_api_url
+
+BOUNDS = "ne_lat=49.3&ne_lng=-123.0&sw_lat=49.19&sw_lng=-123.3"
+
+
+class TestStandInAirbnb(unittest.TestCase):
+
+    def start_server(self, **options):
+        server = StandInAirbnb(**options).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_listings_spread_over_the_city(self):
+        server = self.start_server(listings=200)
+        (lon_min, lat_min), (lon_max, lat_max) = CITY_COORDINATE_BOUNDARY[Cities.VANCOUVER]["bounding_box"]
+
+        self.assertEqual(len(server.listings_by_id), 200)
+        for listing in server.listings:
+            self.assertTrue(lat_min <= listing["latitude"] <= lat_max)
+            self.assertTrue(lon_min <= listing["longitude"] <= lon_max)
+        self.assertEqual(StandInAirbnb(listings=200).listings, server.listings)
+
+    def test_search_pages(self):
+        server = self.start_server(listings=40, page_size=18)
+
+        body = urlopen(f"{server.url}/s/Vancouver--Canada/homes?{BOUNDS}").read()
+        listings, cursors = parsing.parse_search_page(body)
+        self.assertEqual(len(listings), 18)
+        self.assertEqual(len(cursors), 2)
+
+        body = urlopen(f"{server.url}/s/Vancouver--Canada/homes?{BOUNDS}&cursor={cursors[1]}").read()
+        last_page, _ = parsing.parse_search_page(body)
+        self.assertEqual(len(last_page), 4)
+        self.assertEqual(last_page[0]["airbnb_listing_id"], server.listings[36]["id"])
+
+    def test_listing_details(self):
+        server = self.start_server(listings=5, padding_kb=20)
+        listing = server.listings[3]
+        template = listing_api_url(get_harvester_settings()['AIRBNB_LISTING_API_URL'], server.url)
+        url = template.format(base64_encode_string(combine_and_url_encode("StayListing", listing["id"])))
+
+        body = urlopen(url).read()
+        item = parsing.parse_listing_details(body, {"airbnb_listing_id": listing["id"]})
+        self.assertGreater(len(body), 20 * 1000)
+        self.assertEqual(item["person_capacity"], listing["person_capacity"])
+        self.assertEqual(item["registration_number"], listing["registration_number"])
+        self.assertEqual(item["beds"], listing["beds"])
+
+        missing = template.format(base64.b64encode(b"StayListing:404").decode())
+        with self.assertRaises(HTTPError) as error:
+            urlopen(missing)
+        self.assertEqual(error.exception.code, 404)
+        self.assertEqual(json.loads(error.exception.read())["errors"][0]["message"], "Listing not found")
+
+    def test_rate_limit_bursts(self):
+        server = self.start_server(listings=5, burst_every=4, burst_length=2)
+        statuses = []
+        for _ in range(8):
+            try:
+                statuses.append(urlopen(f"{server.url}/s/Vancouver--Canada/homes?{BOUNDS}").status)
+            except HTTPError as error:
+                statuses.append(error.code)
+        self.assertEqual(statuses, [200, 200, 200, 200, 429, 429, 200, 200])
+        self.assertEqual(server.statuses[429], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import calendar
 from datetime import datetime
+from w3lib.url import safe_url_string
 from listings.harvester_app.harvester.spiders.airbnb_url_builder import AirBnbURLBuilder
 
 
@@ -33,6 +34,12 @@ class TestAirBnbURLBuilder(unittest.TestCase):
         expected_output = "ne_lat=49.2827&ne_lng=-123.1207&sw_lat=49.206&sw_lng=-123.1789&zoom_level=12&zoom=11&search_by_map=true&tab_id=home_tab&refinement_paths[]=/homes&query=Vancouver, BC&place_id=ChIJs0-pQ_FzhlQRi_OBm-qWkbs"
         self.assertEqual(AirBnbURLBuilder.get_params_string(params), expected_output)
 
+    def test_base_url(self):
+        # Test that the URLs can point to another host, e.g. a local stand-in server
+        builder = AirBnbURLBuilder("http", "127.0.0.1:8080")
+        self.assertTrue(builder.get_flexible_week("august").startswith(
+            "http://127.0.0.1:8080/s/Vancouver--Canada/homes?ne_lat={}"))
+
     def test_get_flexible_week(self):
         # Test the method that generates a URL for a flexible week stay
         expected_url = TestAirBnbURLBuilder.BASE_AIRBNB_URL + TestAirBnbURLBuilder.BASE_AIRBNB_URL_PARAMS + "flexible_trip_lengths[]=one_week&flexible_trip_dates[]=august"
@@ -62,6 +69,27 @@ class TestAirBnbURLBuilder(unittest.TestCase):
         expected_url = TestAirBnbURLBuilder.BASE_AIRBNB_URL + TestAirBnbURLBuilder.BASE_AIRBNB_URL_PARAMS + "monthly_start_date=2023-08-01&monthly_end_date=2023-10-31&monthly_length=3&flexible_date_search_filter_type=6"
         self.assertEqual(self.builder.get_months(check_in, check_out), expected_url)
 
+    def test_templates_match_urls(self):
+        # Test that the compiled templates build the URLs Scrapy requests for the formatted URLs
+        today = datetime.now()
+        tile = {"ne_lat": "49.2099", "ne_lng": "-123.2475", "sw_lat": "49.1999", "sw_lng": "-123.2724"}
+        templates = self.builder.get_templates(today=today)
+        urls = self.builder.get_urls()
+        self.assertEqual(len(templates), len(urls))
+        for template, url in zip(templates, urls):
+            expected_url = safe_url_string(url.format(tile["ne_lat"], tile["ne_lng"], tile["sw_lat"],
+                                                      tile["sw_lng"], 15.4, 15.4))
+            self.assertEqual(template.url(AirBnbURLBuilder.bounds_query(tile, 15.4)), expected_url)
+        self.assertIn("query=Vancouver,%20BC", templates[0].suffix)
+
+    def test_templates_are_compiled_once_per_day(self):
+        today = datetime(2023, 8, 1, 9)
+        templates = self.builder.get_templates(today=today)
+        self.assertIs(self.builder.get_templates(today=datetime(2023, 8, 1, 18)), templates)
+        self.assertIn("checkin=2023-08-01&checkout=2023-08-06", templates[-1].suffix)
+        self.assertIn("flexible_trip_dates%5B%5D=august&flexible_trip_dates%5B%5D=september", templates[0].suffix)
+        self.assertIsNot(self.builder.get_templates(today=datetime(2023, 8, 2)), templates)
+
     def test_get_date(self):
         # Test the method that generates check-in and check-out dates from a start date
         start_date = datetime(2023, 8, 1)
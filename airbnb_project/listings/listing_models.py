@@ -17,5 +17,178 @@ class Listing(models.Model):
     baths_text = models.TextField(null=True, blank=True)
     scrapped_at = models.DateField(null=True, blank=True, default=timezone.now())
 
+    class Meta:
+        constraints = [
+            # A listing is stored once per scrape, the conflict target of the merge of PostgresCopyPipeline
+            models.UniqueConstraint(fields=['airbnb_listing_id', 'scrapped_at'], name='listing_unique_scrape'),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class HarvestRun(models.Model):
+    """
+    Model of a crawl of the Airbnb listings, summarizing the metrics of its map tiles.
+
+    Attributes:
+        started_at (DateTimeField): When the crawl started.
+        finished_at (DateTimeField): When the crawl finished.
+        finish_reason (CharField): Why the crawl finished, e.g. 'finished' or 'shutdown'.
+        items_scraped (PositiveIntegerField): Number of listings scraped.
+        profile_path (CharField): Directory of the profile of the crawl, when it was profiled.
+        status (CharField): The current state of the run.
+        celery_task_id (CharField): The id of the Celery task running the crawl.
+        rerun_requested (BooleanField): Whether another run was asked for while this one was running.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    finish_reason = models.CharField(max_length=64, blank=True, default="")
+    items_scraped = models.PositiveIntegerField(default=0)
+    profile_path = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    celery_task_id = models.CharField(max_length=255, blank=True, default="")
+    rerun_requested = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Harvest run {self.pk} started at {self.started_at}"
+
+    def summary(self) -> dict:
+        """
+        Summarize the tile metrics of the run, to see where the crawl budget went.
+
+        Returns:
+            dict: The run, the totals of its tiles and the number of empty and saturated tiles.
+        """
+        totals = self.tiles.aggregate(
+            tiles=models.Count('id'),
+            empty_tiles=models.Count('id', filter=models.Q(listings_found=0)),
+            saturated_tiles=models.Count('id', filter=models.Q(saturated=True)),
+            requests=models.Sum('requests', default=0),
+            pages=models.Sum('pages', default=0),
+            listings_found=models.Sum('listings_found', default=0),
+            new_listings=models.Sum('new_listings', default=0),
+            duplicate_listings=models.Sum('duplicate_listings', default=0),
+            response_seconds=models.Sum('response_seconds', default=0.0),
+        )
+        response_seconds = totals.pop('response_seconds')
+        return {
+            'run_id': self.pk,
+            'status': self.status,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'finish_reason': self.finish_reason,
+            'items_scraped': self.items_scraped,
+            'profile_path': self.profile_path,
+            **totals,
+            'duplicate_ratio': round(totals['duplicate_listings'] / totals['listings_found'], 4)
+            if totals['listings_found'] else 0.0,
+            'mean_response_ms': round(response_seconds * 1000 / totals['requests'], 1) if totals['requests'] else 0.0,
+        }
+
+
+class TileMetric(models.Model):
+    """
+    Model of the search metrics of one map tile of the coordinates grid during a harvest run.
+
+    Attributes:
+        run (ForeignKey): The harvest run.
+        tile_index (PositiveIntegerField): The index of the tile in the coordinates grid.
+        sw_lat, sw_lng, ne_lat, ne_lng (FloatField): The bounds of the tile.
+        requests (PositiveIntegerField): Number of search responses received for the tile, retries included.
+        pages (PositiveIntegerField): Number of search pages parsed.
+        listings_found (PositiveIntegerField): Number of listings found on the search pages.
+        new_listings (PositiveIntegerField): Listings not found earlier in the run, in this tile or another one.
+        duplicate_listings (PositiveIntegerField): Listings found earlier in the run.
+        max_page_cursors (PositiveIntegerField): Largest number of result pages announced by a search of the tile.
+        saturated (BooleanField): Whether a search of the tile hit the result pages cap of Airbnb, so that some
+            of its listings may be missing.
+        response_seconds (FloatField): Total download time of the search responses.
+    """
+    run = models.ForeignKey(HarvestRun, related_name='tiles', on_delete=models.CASCADE)
+    tile_index = models.PositiveIntegerField()
+    sw_lat = models.FloatField()
+    sw_lng = models.FloatField()
+    ne_lat = models.FloatField()
+    ne_lng = models.FloatField()
+    requests = models.PositiveIntegerField(default=0)
+    pages = models.PositiveIntegerField(default=0)
+    listings_found = models.PositiveIntegerField(default=0)
+    new_listings = models.PositiveIntegerField(default=0)
+    duplicate_listings = models.PositiveIntegerField(default=0)
+    max_page_cursors = models.PositiveIntegerField(default=0)
+    saturated = models.BooleanField(default=False)
+    response_seconds = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'tile_index'], name='unique_tile_per_run'),
+        ]
+
+    def __str__(self):
+        return f"Tile {self.tile_index} of harvest run {self.run_id}"
+
+    def to_feature(self) -> dict:
+        """
+        Serialize the tile as a GeoJSON polygon feature with its metrics as properties.
+
+        Returns:
+            dict: The GeoJSON feature.
+        """
+        ring = [[self.sw_lng, self.sw_lat], [self.ne_lng, self.sw_lat], [self.ne_lng, self.ne_lat],
+                [self.sw_lng, self.ne_lat], [self.sw_lng, self.sw_lat]]
+        return {
+            'type': 'Feature',
+            'id': self.tile_index,
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+            'properties': {
+                'tile_index': self.tile_index,
+                'requests': self.requests,
+                'pages': self.pages,
+                'listings_found': self.listings_found,
+                'new_listings': self.new_listings,
+                'duplicate_listings': self.duplicate_listings,
+                'max_page_cursors': self.max_page_cursors,
+                'saturated': self.saturated,
+                'mean_response_ms': round(self.response_seconds * 1000 / self.requests, 1) if self.requests else 0.0,
+            },
+        }
+
+
+class DeadLetter(models.Model):
+    """
+    Model of a listing whose details could not be fetched or parsed, kept to be retried by a later crawl.
+
+    Attributes:
+        airbnb_listing_id (TextField): The Airbnb id of the listing.
+        airbnb_params (JSONField): The listing data of the search results, to build its details request again.
+        url (TextField): The details request of the last failure.
+        reason (TextField): Why the last attempt failed, e.g. 'HTTP 500' or 'Invalid JSON: ...'.
+        attempts (PositiveIntegerField): Number of failed attempts, over all the crawls.
+        first_failed_at (DateTimeField): When the listing failed first.
+        last_failed_at (DateTimeField): When the listing failed last.
+        resolved_at (DateTimeField): When the listing was scraped at last, None while it keeps failing.
+    """
+    airbnb_listing_id = models.TextField(db_index=True)
+    airbnb_params = models.JSONField(default=dict)
+    url = models.TextField()
+    reason = models.TextField()
+    attempts = models.PositiveIntegerField(default=1)
+    first_failed_at = models.DateTimeField(default=timezone.now)
+    last_failed_at = models.DateTimeField(default=timezone.now)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Dead letter of listing {self.airbnb_listing_id}: {self.reason}"
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from listings.listing_models import Listing
+from policies.models import ListingPolicyResult
+
+# Listings stored more than once for the same scrape but the last saved row, compared on the raw scrapped_at column
+# like the listing_unique_scrape constraint, as it stores a timestamp whatever the model says
+DUPLICATE_IDS_SQL = """
+    SELECT DISTINCT listing.id FROM {table} listing
+    JOIN {table} kept ON kept.airbnb_listing_id = listing.airbnb_listing_id
+        AND kept.scrapped_at = listing.scrapped_at AND kept.id > listing.id
+"""
+
+# Listings deleted at once, with their policy results
+DELETE_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """
+    Delete the listings stored more than once for the same scrape, so that migration 0006 can add the
+    listing_unique_scrape constraint.
+    """
+    help = "Report the listings stored more than once for the same scrape, and delete them with --delete"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true',
+                            help="Delete the duplicates and their policy results, keeping the last saved row of each "
+                                 "listing and scrape. Back up the database first.")
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute(DUPLICATE_IDS_SQL.format(table=connection.ops.quote_name(Listing._meta.db_table)))
+            duplicate_ids = [row[0] for row in cursor.fetchall()]
+        if not duplicate_ids:
+            self.stdout.write(self.style.SUCCESS("No duplicate listings"))
+            return
+
+        policy_results = 0
+        with transaction.atomic():
+            for start in range(0, len(duplicate_ids), DELETE_BATCH_SIZE):
+                batch = duplicate_ids[start:start + DELETE_BATCH_SIZE]
+                policy_results += ListingPolicyResult.objects.filter(listing_id__in=batch).count()
+                if options['delete']:
+                    # Deletes their policy results too
+                    Listing.objects.filter(id__in=batch).delete()
+
+        if options['delete']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {len(duplicate_ids)} duplicate listings and their {policy_results} policy results"))
+        else:
+            self.stdout.write(f"{len(duplicate_ids)} duplicate listings, with {policy_results} policy results. "
+                              f"Back up the database, then run with --delete to delete them.")
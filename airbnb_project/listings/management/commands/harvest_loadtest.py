@@ -0,0 +1,150 @@
+import os
+import resource
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.proxies import proxy_download_slots, proxy_name
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+from listings.harvester_app.standin.server import StandInProcess, listing_api_url
+
+
+class Command(BaseCommand):
+    """
+    Run ListingsSpider against a local stand-in of Airbnb and report its throughput, latency and memory.
+    """
+    help = "Load test the harvester end-to-end against a local Airbnb stand-in server"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=2000, help="Number of synthetic listings (default: 2000)")
+        parser.add_argument('--page-size', type=int, default=18, help="Listings per search page (default: 18)")
+        parser.add_argument('--padding-kb', type=int, default=100,
+                            help="Padding of the listing details responses, in KB (default: 100)")
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help="Minimum delay of the responses, in seconds (default: 0.05)")
+        parser.add_argument('--jitter', type=float, default=0.05,
+                            help="Maximum random delay added to the latency, in seconds (default: 0.05)")
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help="Fraction of the requests failing with a 500 (default: 0)")
+        parser.add_argument('--burst-every', type=int, default=0,
+                            help="Number of requests between two bursts of 429, 0 for no bursts (default: 0)")
+        parser.add_argument('--burst-length', type=int, default=0,
+                            help="Number of requests rate limited in a burst (default: 0)")
+        parser.add_argument('--proxies', type=int, default=0,
+                            help="Number of stand-in proxies the requests are spread over, 0 to connect directly")
+        parser.add_argument('--proxy-ban-after', type=int, default=0,
+                            help="Requests forwarded by a proxy before it gets banned, 0 to never ban (default: 0)")
+        parser.add_argument('--proxy-ban-length', type=int, default=0,
+                            help="Requests banned per proxy ban, 0 for a permanent ban (default: 0)")
+        parser.add_argument('--nodes', type=int, default=1,
+                            help="Harvester nodes sharing the crawl through --redis-url, in this process (default: 1)")
+        parser.add_argument('--redis-url', default='',
+                            help="Redis of the distributed crawl, e.g. redis://localhost:6379/2, none for a local crawl")
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help="Concurrent requests of the harvester (default: 16)")
+        parser.add_argument('--download-delay', type=float, default=0.0,
+                            help="Delay between two requests of the harvester, in seconds (default: 0)")
+        parser.add_argument('--ingest', action='store_true',
+                            help="Save the listings with the configured ingest pipeline and the tile metrics, in the database")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the listings and of the errors")
+
+    def handle(self, *args, **options):
+        if options['nodes'] > 1 and not options['redis_url']:
+            raise CommandError("--nodes requires --redis-url, the nodes share their requests in Redis")
+        # The stand-in server doesn't check the key
+        os.environ.setdefault('AIRBNB_PUBLIC_API_KEY', 'stand-in')
+        settings = get_harvester_settings()
+        if not options['ingest']:
+            settings['ITEM_PIPELINES'] = {
+                'listings.harvester_app.harvester.pipelines.AirbnbListingsPipelineDataCleaner': 400,
+            }
+
+        server_options = {name: options[name] for name in (
+            'listings', 'page_size', 'padding_kb', 'latency', 'jitter', 'error_rate', 'burst_every', 'burst_length',
+            'seed')}
+        stand_in = StandInProcess(proxies=options['proxies'], proxy_options={
+            'ban_after': options['proxy_ban_after'], 'ban_length': options['proxy_ban_length']}, **server_options)
+        with stand_in as url:
+            settings.update({
+                'AIRBNB_BASE_URL': url,
+                'AIRBNB_LISTING_API_URL': listing_api_url(settings['AIRBNB_LISTING_API_URL'], url),
+                'CONCURRENT_REQUESTS': options['concurrency'],
+                'CONCURRENT_REQUESTS_PER_DOMAIN': options['concurrency'],
+                'DOWNLOAD_DELAY': options['download_delay'],
+                'HTTPCACHE_ENABLED': False,
+                'RESPONSE_ARCHIVE_DIR': '',
+                'TILE_METRICS_ENABLED': options['ingest'],
+                'FRONTIER_ENABLED': options['ingest'],
+                'DEAD_LETTER_STORE': options['ingest'],
+                'TELNETCONSOLE_ENABLED': False,
+                'LOG_LEVEL': 'DEBUG' if options['verbosity'] > 2 else 'WARNING',
+                'HARVEST_PROXIES': stand_in.proxy_urls,
+                'DOWNLOAD_SLOTS': proxy_download_slots(stand_in.proxy_urls, options['concurrency'],
+                                                       options['download_delay']),
+                # Bans are transient in the load test
+                'PROXY_POOL_QUARANTINE': 1,
+                'HARVEST_REDIS_URL': options['redis_url'],
+                'HARVEST_REDIS_PREFIX': f"loadtest:{os.getpid()}",
+                'HARVEST_REDIS_IDLE_TIMEOUT': 5,
+            })
+            if options['redis_url']:
+                settings['SCHEDULER'] = 'listings.harvester_app.harvester.distributed.RedisScheduler'
+            process = CrawlerProcess(settings=settings)
+            latencies = []
+            listing_ids = Counter()
+
+            def record_latency(response, request, spider):
+                if 'download_latency' in request.meta:
+                    latencies.append(request.meta['download_latency'])
+
+            def record_item(item, response, spider):
+                listing_ids[item['airbnb_listing_id']] += 1
+
+            crawlers = [process.create_crawler(ListingsSpider) for _ in range(options['nodes'])]
+            for crawler in crawlers:
+                crawler.signals.connect(record_latency, signal=signals.response_received)
+                crawler.signals.connect(record_item, signal=signals.item_scraped)
+                process.crawl(crawler, allowed_domains=[urlsplit(url).hostname])
+            started_at = time.perf_counter()
+            process.start()
+            seconds = time.perf_counter() - started_at
+
+        # Stats of all the nodes
+        stats = Counter()
+        for crawler in crawlers:
+            stats.update({key: value for key, value in crawler.stats.get_stats().items()
+                          if isinstance(value, (int, float)) and not isinstance(value, bool)})
+        stats['reactor_lag/max_seconds'] = max(crawler.stats.get_value('reactor_lag/max_seconds', 0)
+                                               for crawler in crawlers)
+        items = stats.get('item_scraped_count', 0)
+        # ru_maxrss is in KB on Linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [0.0] * 19
+        p50, p95 = quantiles[9], quantiles[18]
+        self.stdout.write(
+            f"Items:          {items} in {seconds:.1f} s ({items / seconds:.1f} items/s)\n"
+            f"Responses:      {len(latencies)} ({stats.get('downloader/response_status_count/429', 0)} x 429, "
+            f"{stats.get('downloader/response_status_count/500', 0)} x 500, {stats.get('retry/count', 0)} retries)\n"
+            f"Failed:         {stats.get('dead_letter/failed', 0)} listings, "
+            f"{stats.get('dead_letter/recovered', 0)} recovered by the retry pass\n"
+            f"Latency:        p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms\n"
+            f"Reactor lag:    max {stats.get('reactor_lag/max_seconds', 0) * 1000:.0f} ms\n"
+            f"Peak RSS:       {peak_rss_mb:.1f} MB")
+        if options['nodes'] > 1:
+            per_node = ', '.join(str(crawler.stats.get_value('item_scraped_count', 0)) for crawler in crawlers)
+            self.stdout.write(
+                f"Nodes:          {options['nodes']} ({per_node} items), "
+                f"{sum(count > 1 for count in listing_ids.values())} listings scraped more than once")
+        for proxy in stand_in.proxy_urls:
+            name = proxy_name(proxy)
+            self.stdout.write(
+                f"Proxy {name}: {stats.get(f'proxy_pool/{name}/requests', 0)} requests, "
+                f"{stats.get(f'proxy_pool/{name}/bans', 0)} bans, "
+                f"{stats.get(f'proxy_pool/{name}/quarantines', 0)} quarantines, "
+                f"{stats.get(f'proxy_pool/{name}/latency_ms', 0) / len(crawlers):.1f} ms")
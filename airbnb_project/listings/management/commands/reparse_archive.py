@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from listings.harvester_app.harvester.parse_engine import reparse_archive
+
+
+class Command(BaseCommand):
+    """
+    Parse the archived Airbnb responses again and save the listings, without crawling.
+    """
+    help = "Parse the raw response archive again in a pool of processes and save the listings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive', default=os.environ.get('RESPONSE_ARCHIVE_DIR'),
+                            help="Directory of the response archive (default: RESPONSE_ARCHIVE_DIR)")
+        parser.add_argument('--since', help="First date to parse, YYYY-MM-DD")
+        parser.add_argument('--until', help="Last date to parse, YYYY-MM-DD")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Number of parsing processes, 0 to parse in this process (default: number of CPUs)")
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Number of responses parsed by a process at once (default: spread evenly)")
+
+    def handle(self, *args, **options):
+        archive = options['archive']
+        if not archive or not os.path.isdir(archive):
+            raise CommandError(f"Response archive not found: {archive}")
+
+        # Don't share the database connection with the forked worker processes
+        connections.close_all()
+        summary = reparse_archive(archive, since=options['since'], until=options['until'],
+                                  workers=options['workers'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Parsed {summary['dates']} dates: {summary['search_pages']} search pages, "
+            f"{summary['responses']} listing responses, {summary['items']} items, {summary['errors']} errors"))
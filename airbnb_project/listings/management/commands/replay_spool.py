@@ -0,0 +1,34 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from listings.harvester_app.harvester.spool import replay_spool
+
+
+class Command(BaseCommand):
+    """
+    Save the listings spooled by the harvester while the database was unavailable.
+    """
+    help = "Replay the listing spool of the harvester into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spool', default=os.environ.get('LISTINGS_SPOOL_PATH', ''),
+                            help="Path of the listing spool (default: LISTINGS_SPOOL_PATH)")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Number of listings inserted at once (default: 1000)")
+
+    def handle(self, *args, **options):
+        spool = options['spool']
+        if not spool:
+            raise CommandError("No listing spool, set LISTINGS_SPOOL_PATH or pass --spool")
+        if not os.path.exists(spool) and not os.path.exists(f"{spool}.replay"):
+            self.stdout.write(f"No listing spool at {spool}")
+            return
+        try:
+            summary = replay_spool(spool, batch_size=options['batch_size'])
+        except DatabaseError as e:
+            raise CommandError(f"Database unavailable, the listings not saved are kept in {spool}.replay: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {summary['read']} listings: {summary['inserted']} saved, {summary['skipped']} already saved, "
+            f"{summary['invalid']} unreadable lines"))
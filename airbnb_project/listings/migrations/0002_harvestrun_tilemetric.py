@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('finish_reason', models.CharField(blank=True, default='', max_length=64)),
+                ('items_scraped', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TileMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tile_index', models.PositiveIntegerField()),
+                ('sw_lat', models.FloatField()),
+                ('sw_lng', models.FloatField()),
+                ('ne_lat', models.FloatField()),
+                ('ne_lng', models.FloatField()),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('pages', models.PositiveIntegerField(default=0)),
+                ('listings_found', models.PositiveIntegerField(default=0)),
+                ('new_listings', models.PositiveIntegerField(default=0)),
+                ('duplicate_listings', models.PositiveIntegerField(default=0)),
+                ('max_page_cursors', models.PositiveIntegerField(default=0)),
+                ('saturated', models.BooleanField(default=False)),
+                ('response_seconds', models.FloatField(default=0.0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tiles', to='listings.harvestrun')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('run', 'tile_index'), name='unique_tile_per_run')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_harvestrun_tilemetric'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadLetter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('airbnb_listing_id', models.TextField(db_index=True)),
+                ('airbnb_params', models.JSONField(default=dict)),
+                ('url', models.TextField()),
+                ('reason', models.TextField()),
+                ('attempts', models.PositiveIntegerField(default=1)),
+                ('first_failed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_failed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_deadletter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvestrun',
+            name='profile_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
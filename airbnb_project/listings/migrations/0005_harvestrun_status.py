@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+def set_finished_status(apps, schema_editor):
+    # The runs saved before were all saved at the end of their crawl
+    HarvestRun = apps.get_model('listings', 'HarvestRun')
+    HarvestRun.objects.filter(finish_reason='finished').update(status='succeeded')
+    HarvestRun.objects.exclude(finish_reason='finished').update(status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_harvestrun_profile_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvestrun',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='harvestrun',
+            name='celery_task_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='harvestrun',
+            name='rerun_requested',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(set_finished_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-20 09:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_no_duplicate_listings(apps, schema_editor):
+    # Deleting the duplicates would delete their policy results too, it is left to the dedupe_listings command
+    Listing = apps.get_model('listings', 'Listing')
+    duplicates = (Listing.objects.values('airbnb_listing_id', 'scrapped_at')
+                  .annotate(rows=Count('id')).filter(rows__gt=1))
+    if duplicates.exists():
+        raise RuntimeError(
+            "Some listings are stored more than once for the same scrape, the listing_unique_scrape constraint can't "
+            "be added. Back up the database, run `python manage.py dedupe_listings --delete`, then migrate again.")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_harvestrun_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_duplicate_listings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='listing',
+            constraint=models.UniqueConstraint(fields=('airbnb_listing_id', 'scrapped_at'), name='listing_unique_scrape'),
+        ),
+    ]
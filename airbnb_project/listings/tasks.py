@@ -1,35 +1,232 @@
 from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.log import configure_logging
+from twisted.python.failure import Failure
 from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
 from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.pipelines import parse_scrapped_at
+from listings.listing_models import HarvestRun
 import logging
 
 logger = logging.getLogger(__name__)
 
 configure_logging()
 
+HARVEST_LOCK_KEY = "harvest:lock"
 
-def run_spider():
+# Deletes the harvest lock if it is still held by the run, at once in Redis
+RELEASE_HARVEST_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _harvest_lock():
+    return caches[settings.HARVEST_LOCK['ALIAS']]
+
+
+def _release_harvest_lock(run_id: int) -> None:
+    lock = _harvest_lock()
+    if isinstance(lock, RedisCache):
+        # Compare and delete, not to release the lock of a run started once it expired
+        key = lock.make_and_validate_key(HARVEST_LOCK_KEY)
+        lock._cache.get_client(key, write=True).eval(RELEASE_HARVEST_LOCK_SCRIPT, 1, key, run_id)
+        return
+    # A cache local to the process, in development and in the tests
+    if lock.get(HARVEST_LOCK_KEY) == run_id:
+        lock.delete(HARVEST_LOCK_KEY)
+
+
+def current_harvest():
+    """
+    Get the harvest run holding the harvest lock.
+
+    Returns:
+        HarvestRun | None: The run, None if no harvest is running.
+    """
+    run_id = _harvest_lock().get(HARVEST_LOCK_KEY)
+    if run_id is None:
+        return None
+    run = HarvestRun.objects.filter(pk=run_id).first()
+    if run is None or run.status not in HarvestRun.ACTIVE_STATUSES:
+        # The lock of a run which is over but couldn't release it
+        _release_harvest_lock(run_id)
+        return None
+    return run
+
+
+def start_harvest(profile: str = "", queue: bool = False):
+    """
+    Start a harvest run as a Celery task, unless one is already running.
+
+    A single harvest runs at a time: the run holds a lock in the cache shared by the web app and the Celery
+    workers (Redis in production) until its crawl finishes, or HARVEST_LOCK['TIMEOUT'] if its worker dies.
+
+    Args:
+        profile (str): Profilers of the crawl, 'cpu', 'memory' or 'all', none when empty.
+        queue (bool): When a harvest is already running, whether to start another one once it finishes. Not if the
+            running one started today: the listings are stored once per scrape date, so a rerun would skip them all.
+
+    Returns:
+        tuple[HarvestRun | None, bool]: The run started, or else the run already running, and whether it was started.
+            The running run has `rerun_requested` set when another one was queued.
+    """
+    current = None
+    for _ in range(3):
+        current = current_harvest()
+        if current is None:
+            run = HarvestRun.objects.create()
+            if _harvest_lock().add(HARVEST_LOCK_KEY, run.pk, timeout=settings.HARVEST_LOCK['TIMEOUT']):
+                try:
+                    result = run_harvest_task.delay(profile=profile, run_id=run.pk)
+                except Exception:
+                    finish_harvest(run.pk, succeeded=False)
+                    raise
+                run.celery_task_id = getattr(result, 'id', None) or ""
+                HarvestRun.objects.filter(pk=run.pk).update(celery_task_id=run.celery_task_id)
+                return run, True
+            # Another harvest was started in between
+            run.delete()
+        elif not queue or timezone.localdate(current.started_at) == timezone.localdate():
+            return current, False
+        elif HarvestRun.objects.filter(pk=current.pk, status__in=HarvestRun.ACTIVE_STATUSES).update(
+                rerun_requested=True):
+            current.rerun_requested = True
+            return current, False
+        # Otherwise the current run finished in between, try again
+    return current, False
+
+
+def finish_harvest(run_id: int, succeeded: bool = True, scrapped_at=None) -> None:
+    """
+    Mark a harvest run as finished, release the harvest lock and start the harvest queued meanwhile, if any.
+
+    When the run succeeded, the policy evaluation of the listings it scraped is enqueued, unless
+    HARVEST_EVALUATE_POLICIES is False.
+
+    Args:
+        run_id (int): The id of the run.
+        succeeded (bool): Whether the crawl of the run succeeded.
+        scrapped_at (date, optional): The scrape date of the listings of the run, to evaluate.
+    """
+    finished = HarvestRun.objects.filter(pk=run_id, status__in=HarvestRun.ACTIVE_STATUSES).update(
+        status=HarvestRun.STATUS_SUCCEEDED if succeeded else HarvestRun.STATUS_FAILED,
+        finished_at=Coalesce('finished_at', Now()))
+    _release_harvest_lock(run_id)
+    if finished and succeeded and scrapped_at:
+        _evaluate_policies(scrapped_at, f"harvest run {run_id}")
+    # Read after the status update, so that a rerun requested before it isn't missed
+    if HarvestRun.objects.filter(pk=run_id, rerun_requested=True).update(rerun_requested=False):
+        logger.info(f"Starting the harvest queued during harvest run {run_id}")
+        start_harvest()
+
+
+def _evaluate_policies(scrapped_at, crawl: str) -> None:
+    """
+    Enqueue the policy evaluation of the listings of a crawl, unless HARVEST_EVALUATE_POLICIES is False.
+
+    Args:
+        scrapped_at (date): The scrape date of the listings of the crawl.
+        crawl (str): The crawl, for the logs.
+    """
+    if not settings.HARVEST_EVALUATE_POLICIES:
+        return
+    from policies.tasks import enqueue_policy_evaluation
+    try:
+        job = enqueue_policy_evaluation(scrapped_at)
+        logger.info(f"Policy evaluation job {job.pk} of {crawl} enqueued")
+    except Exception as e:
+        logger.error(f"Failed to enqueue the policy evaluation of {crawl}: {e}")
+
+
+def run_spider(profile: str = "", run_id: int = None, **spider_kwargs):
     """
     Run the Scrapy spider for harvesting listings.
 
     This function initializes a Scrapy CrawlerProcess with the required settings,
     schedules the `ListingsSpider` to run, and starts the crawling process.
-    The function runs in non-blocking mode with `stop_after_crawl=False` to keep
-    the process active after the spider completes.
+    The reactor is stopped once the crawl and its run are finished, so that the
+    task returns. It can't be started again in the same process, so the harvest
+    worker runs every task in a new child process (`--max-tasks-per-child=1`).
+
+    Args:
+        profile (str): Profilers of the crawl, 'cpu', 'memory' or 'all', none when empty.
+        run_id (int, optional): The id of the HarvestRun of the crawl, finished with the crawl.
+        **spider_kwargs: Arguments of the spider, e.g. `dead_letters=True`.
 
     Returns:
         None
     """
-    runner = CrawlerProcess(settings=get_harvester_settings())
-    runner.crawl(ListingsSpider)
-    runner.start(stop_after_crawl=False)
+    settings = get_harvester_settings()
+    if spider_kwargs.get('dead_letters'):
+        # The listings failed already, don't hammer the API with them
+        settings['CONCURRENT_REQUESTS'] = settings['DEAD_LETTER_RETRY_CONCURRENCY']
+        settings['TILE_METRICS_ENABLED'] = False
+    if profile:
+        settings['HARVEST_PROFILE'] = profile
+    if run_id:
+        settings['HARVEST_RUN_ID'] = run_id
+    # The listings are evaluated by their scrape date once the crawl finishes. Not the model default, the date the
+    # worker imported the model
+    settings['LISTINGS_SCRAPPED_AT'] = settings['LISTINGS_SCRAPPED_AT'] or timezone.localdate().isoformat()
+    runner = CrawlerProcess(settings=settings)
+    crawler = runner.create_crawler(ListingsSpider)
+    crawl = runner.crawl(crawler, **spider_kwargs)
+    # Finished before the reactor stops with the crawl
+    if run_id:
+        crawl.addBoth(_crawl_finished, crawler, run_id)
+    elif spider_kwargs.get('dead_letters'):
+        crawl.addBoth(_dead_letters_finished, crawler)
+    runner.start()
+
+
+def _crawl_finished(result, crawler, run_id: int):
+    succeeded = not isinstance(result, Failure) and crawler.stats.get_value('finish_reason') == 'finished'
+    try:
+        finish_harvest(run_id, succeeded=succeeded,
+                       scrapped_at=parse_scrapped_at(crawler.settings.get('LISTINGS_SCRAPPED_AT')).date())
+    except Exception as e:
+        logger.error(f"Failed to finish harvest run {run_id}: {e}")
+    return result
+
+
+def _dead_letters_finished(result, crawler):
+    # The listings recovered are evaluated like those of a harvest run, the ones evaluated already are skipped
+    if not isinstance(result, Failure) and crawler.stats.get_value('finish_reason') == 'finished':
+        _evaluate_policies(parse_scrapped_at(crawler.settings.get('LISTINGS_SCRAPPED_AT')).date(), "dead letters")
+    return result
+
+
+@shared_task(bind=True, ignore_result=True)
+def start_harvest_task(self, profile="", queue=False):
+    """
+    Celery task starting a harvest run, unless one is already running, scheduled by Celery beat.
+
+    Args:
+        self: Reference to the current Celery task instance.
+        profile (str): Profilers of the crawl, 'cpu', 'memory' or 'all', none when empty.
+        queue (bool): When a harvest is already running, whether to start another one once it finishes.
+
+    Returns:
+        None
+    """
+    run, started = start_harvest(profile=profile, queue=queue)
+    if started:
+        logger.info(f"Scheduled harvest run {run.pk} started")
+    else:
+        logger.warning(f"Scheduled harvest skipped, harvest run {run.pk if run else None} is already running")
 
 
 @shared_task(bind=True, retry_kwargs={'max_retries': 1}, ignore_result=True, time_limit=1800, soft_time_limit=1600)
-def run_harvest_task(self):
+def run_harvest_task(self, profile="", run_id=None):
     """
     Celery task to trigger the Scrapy spider for harvesting listings.
 
@@ -39,17 +236,49 @@ def run_harvest_task(self):
 
     Args:
         self: Reference to the current Celery task instance.
+        profile (str): Profilers of the crawl, 'cpu', 'memory' or 'all', none when empty.
+        run_id (int, optional): The id of the HarvestRun started by `start_harvest`, holding the harvest lock.
 
     Returns:
         None
     """
+    if run_id and not HarvestRun.objects.filter(pk=run_id, status=HarvestRun.STATUS_PENDING).update(
+            status=HarvestRun.STATUS_RUNNING, started_at=Now(), celery_task_id=self.request.id or ""):
+        logger.warning(f"Harvest run {run_id} isn't pending anymore, skipping it")
+        return
     try:
         # Run the spider and wait for it to complete
-        run_spider()
+        run_spider(profile=profile, run_id=run_id)
         logger.info("Scrapy process completed successfully")
     except SoftTimeLimitExceeded:
-        print("Soft time limit exceeded. Cleaning up...")
+        logger.warning("Soft time limit exceeded. Cleaning up...")
+        if run_id:
+            finish_harvest(run_id, succeeded=False)
     except TimeLimitExceeded:
-        print("Time limit exceeded. Cleaning up...")
+        logger.warning("Time limit exceeded. Cleaning up...")
+        if run_id:
+            finish_harvest(run_id, succeeded=False)
     except Exception as e:
         logger.error(f"Error in Scrapy process: {e}")
+        if run_id:
+            finish_harvest(run_id, succeeded=False)
+
+
+@shared_task(bind=True, ignore_result=True, time_limit=1800, soft_time_limit=1600)
+def run_dead_letters_task(self):
+    """
+    Celery task retrying the listings of the dead-letter store, whose details failed in the previous crawls.
+
+    Args:
+        self: Reference to the current Celery task instance.
+
+    Returns:
+        None
+    """
+    try:
+        run_spider(dead_letters=True)
+        logger.info("Dead letters retried successfully")
+    except SoftTimeLimitExceeded:
+        logger.warning("Soft time limit exceeded while retrying the dead letters")
+    except Exception as e:
+        logger.error(f"Error while retrying the dead letters: {e}")
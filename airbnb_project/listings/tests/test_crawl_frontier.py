@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+from django.test import TestCase
+from scrapy.utils.test import get_crawler
+from listings.harvester_app.harvester.frontier import CrawlFrontier
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+from listings.listing_models import HarvestRun, Listing
+
+TODAY = date(2024, 11, 30)
+
+
+class CrawlFrontierTest(TestCase):
+
+    def setUp(self):
+        for _ in range(2):
+            run = HarvestRun.objects.create()
+            for index, (new_listings, requests) in enumerate([(40, 10), (10, 10), (0, 5)]):
+                run.tiles.create(tile_index=index, sw_lat=49.2, sw_lng=-123.2, ne_lat=49.3, ne_lng=-123.1,
+                                 new_listings=new_listings, requests=requests)
+        Listing.objects.create(airbnb_listing_id="fresh", registration_number="24-000001", scrapped_at=TODAY)
+        Listing.objects.create(airbnb_listing_id="stale", registration_number="24-000002",
+                               scrapped_at=TODAY - timedelta(days=15))
+        Listing.objects.create(airbnb_listing_id="unregistered", registration_number="", scrapped_at=TODAY)
+        self.frontier = CrawlFrontier(stale_days=30, registration_boost=50)
+        self.frontier.load(today=TODAY)
+
+    def test_tile_priority(self):
+        self.assertEqual([self.frontier.tile_priority(index) for index in range(4)], [100, 25, 0, 50])
+
+    def test_listing_priority(self):
+        base = CrawlFrontier.LISTING_BASE_PRIORITY
+        self.assertEqual(self.frontier.listing_priority("fresh"), base)
+        self.assertEqual(self.frontier.listing_priority("stale"), base + 50)
+        self.assertEqual(self.frontier.listing_priority("unregistered"), base + 50)
+        self.assertEqual(self.frontier.listing_priority("unknown"), base + 150)
+        self.assertGreater(base, self.frontier.tile_priority(0))
+
+    def test_disabled(self):
+        frontier = CrawlFrontier(enabled=False)
+        frontier.load(today=TODAY)
+        self.assertEqual(frontier.tile_priority(0), 0)
+        self.assertEqual(frontier.listing_priority("unknown"), 0)
+
+    def test_seed_requests_favour_high_yield_tiles(self):
+        crawler = get_crawler(ListingsSpider, settings_dict=get_harvester_settings())
+        spider = crawler._create_spider()
+        spider.frontier.load(today=TODAY)
+        coordinates = [{"ne_lat": "49.3", "ne_lng": "-123.1", "sw_lat": "49.2", "sw_lng": "-123.2"}] * 3
+
+        requests = spider._generate_requests(coordinates)
+        self.assertEqual([request.meta['tile']['index'] for request in requests[:5]], [0] * 5)
+        self.assertEqual([request.meta['tile']['index'] for request in requests[-5:]], [2] * 5)
+        self.assertEqual(requests[0].priority, 100)
+
+        listing_request = spider._create_listing_request({"airbnb_listing_id": "stale"}, requests[0].meta['tile'])
+        self.assertEqual(listing_request.priority, CrawlFrontier.LISTING_BASE_PRIORITY + 50)
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from django.test import TestCase
+from django.urls import reverse
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.test import get_crawler
+from listings.harvester_app.harvester.extensions import CrawlProfiler, ReactorLagMonitor, TileMetricsCollector
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+
+
+class CrawlProfilerTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        settings = get_harvester_settings()
+        settings.update({'HARVEST_PROFILE': 'all', 'HARVEST_PROFILE_DIR': self.directory.name})
+        self.crawler = get_crawler(ListingsSpider, settings_dict=settings)
+        self.spider = self.crawler._create_spider()
+        self.crawler.stats.open_spider(self.spider)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_disabled_by_default(self):
+        crawler = get_crawler(ListingsSpider, settings_dict={**get_harvester_settings(), 'HARVEST_PROFILE': ''})
+        with self.assertRaises(NotConfigured):
+            CrawlProfiler.from_crawler(crawler)
+        with self.assertRaises(ValueError):
+            CrawlProfiler(crawler.stats, 'gpu')
+
+    def test_profile_saved_with_the_run(self):
+        profiler = CrawlProfiler.from_crawler(self.crawler)
+        collector = TileMetricsCollector.from_crawler(self.crawler)
+        monitor = ReactorLagMonitor(self.crawler.stats, clock=lambda: 0.7)
+        monitor._expected_at = 0.5
+        monitor.tick()
+
+        profiler.spider_opened(self.spider)
+        sorted(str(index) for index in range(10000))
+        profiler.spider_closed(self.spider)
+        collector.spider_closed(self.spider, "finished")
+
+        path = self.crawler.stats.get_value('profile/path')
+        self.assertEqual(sorted(os.listdir(path)),
+                         ['allocations.txt', 'crawl.pstats', 'crawl_profile.txt', 'reactor_lag.json'])
+        with open(os.path.join(path, 'reactor_lag.json')) as lag_file:
+            self.assertEqual(json.load(lag_file)['histogram/le_0.5'], 1)
+        with open(os.path.join(path, 'crawl_profile.txt')) as report_file:
+            self.assertIn('builtins.sorted', report_file.read())
+        run_id = self.crawler.stats.get_value('tile_metrics/run_id')
+        self.assertEqual(self.client.get(reverse('harvest_run_summary', args=[run_id])).json()['profile_path'], path)
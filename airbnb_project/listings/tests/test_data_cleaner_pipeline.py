@@ -0,0 +1,64 @@
+from django.test import TestCase
+from listings.harvester_app.harvester.items import ExpandedAirBnBListingItem
+from listings.harvester_app.harvester.pipelines import AirbnbListingsPipelineDataCleaner
+
+
+class AirbnbListingsPipelineDataCleanerTest(TestCase):
+
+    def setUp(self):
+        self.pipeline = AirbnbListingsPipelineDataCleaner()
+
+    def test_process_item(self):
+        item = ExpandedAirBnBListingItem(
+            title='Condo in Kitsilano',
+            name='Bright Condo NEAR the Beach',
+            beds='2 beds',
+            baths_text='1.5 shared baths'
+        )
+
+        self.pipeline.process_item(item, None)
+
+        self.assertEqual(item['title'], 'condo in kitsilano')
+        self.assertEqual(item['name'], 'bright condo near the beach')
+        self.assertEqual(item['beds'], 2)
+        self.assertEqual(item['baths'], 1.5)
+        self.assertTrue(item['bath_is_shared'])
+
+    def test_normalize_beds(self):
+        test_cases = [
+            ('1 bed', 1),
+            ('12 beds', 12),
+            ('60 beds', 60),  # Not in the lookup table
+            ('Studio', None),
+            ('', None),
+            (None, None),
+        ]
+        for text, expected in test_cases:
+            with self.subTest(text=text):
+                self.assertEqual(self.pipeline.normalize_beds(text), expected)
+
+    def test_normalize_baths(self):
+        test_cases = [
+            ('1 bath', (1, False)),
+            ('1 private bath', (1, False)),
+            ('2.5 shared baths', (2.5, True)),
+            ('Half-bath', (0.5, False)),
+            ('Shared half-bath', (0.5, True)),
+            ('25 baths', (25, False)),  # Not in the lookup table
+            ('Bathroom', (None, False)),
+            ('', (None, False)),
+            (None, (None, None)),
+        ]
+        for text, expected in test_cases:
+            with self.subTest(text=text):
+                self.assertEqual(self.pipeline.normalize_baths(text), expected)
+
+    def test_process_items_matches_process_item(self):
+        items = [
+            {'title': 'Home', 'name': 'A', 'beds': '3 beds', 'baths_text': '2 baths'},
+            {'title': 'Loft', 'name': 'B', 'beds': '3 beds', 'baths_text': 'Private half-bath'},
+            {'title': None, 'name': 'C', 'beds': None, 'baths_text': None},
+        ]
+        expected = [self.pipeline.process_item(dict(item), None) for item in items]
+
+        self.assertEqual(self.pipeline.process_items(items), expected)
@@ -1,6 +1,10 @@
+from django.db import connection
 from django.test import TestCase
+from unittest import skipUnless
 from listings.listing_models import Listing
-from listings.harvester_app.harvester.pipelines import DjangoORMPipeline
+from listings.harvester_app.harvester.items import ListingItem
+from listings.harvester_app.harvester.pipelines import DjangoORMPipeline, LISTING_COLUMNS, PostgresCopyPipeline, \
+    parse_scrapped_at
 from unittest.mock import Mock
 import logging
 
@@ -71,3 +75,133 @@ class DjangoORMPipelineTest(TestCase):
         # Assert that no new listing was created
         self.assertEqual(Listing.objects.count(), initial_count,
                          "Expected no new listing to be created in the database.")
+
+
+class BatchedDjangoORMPipelineTest(TestCase):
+
+    def setUp(self):
+        self.spider = Mock()
+        self.spider.logger = logging.getLogger('test_logger')
+        self.pipeline = DjangoORMPipeline(batch_size=2)
+
+    def make_item(self, airbnb_listing_id):
+        return ListingItem(
+            airbnb_listing_id=airbnb_listing_id,
+            name='Test Listing',
+            title='Beautiful Apartment',
+            baths=1.0,
+            beds=2.0,
+            latitude='49.2827',
+            longitude='-123.1207',
+            person_capacity=4,
+            registration_number='24-000001',
+            room_type='Entire home/apt',
+            location='Vancouver',
+            bath_is_shared=True,
+            baths_text='1 shared bath'
+        )
+
+    def test_listings_are_inserted_by_batch(self):
+        self.pipeline.process_item(self.make_item('1'), self.spider)
+        self.assertEqual(Listing.objects.count(), 0)
+
+        self.pipeline.process_item(self.make_item('2'), self.spider)
+        self.pipeline.process_item(self.make_item('3'), self.spider)
+        self.assertEqual(Listing.objects.count(), 2)
+
+        self.pipeline.close_spider(self.spider)
+        self.assertEqual(Listing.objects.count(), 3)
+        listing = Listing.objects.get(airbnb_listing_id='3')
+        self.assertTrue(listing.is_bath_shared)
+        self.assertEqual(listing.registration_number, '24-000001')
+
+    def test_failed_batch_saves_valid_listings(self):
+        invalid_item = self.make_item('1')
+        invalid_item['person_capacity'] = 'four'
+
+        self.pipeline.process_item(invalid_item, self.spider)
+        self.pipeline.process_item(self.make_item('2'), self.spider)
+
+        self.assertEqual(list(Listing.objects.values_list('airbnb_listing_id', flat=True)), ['2'])
+
+    def test_listings_already_stored_are_skipped(self):
+        self.pipeline.scrapped_at = parse_scrapped_at('2024-05-01')
+        for listing_id in ['1', '2']:
+            self.pipeline.process_item(self.make_item(listing_id), self.spider)
+        # A rerun of the same day, in a batch and one by one
+        for listing_id in ['1', '3', '2']:
+            self.pipeline.process_item(self.make_item(listing_id), self.spider)
+        self.pipeline.close_spider(self.spider)
+
+        self.assertEqual(sorted(Listing.objects.values_list('airbnb_listing_id', flat=True)), ['1', '2', '3'])
+        self.assertEqual([call.args[:2] for call in self.spider.crawler.stats.inc_value.call_args_list],
+                         [('listings/already_stored', 1), ('listings/already_stored', 1)])
+
+    def test_listing_row_of_dict_and_item(self):
+        item = self.make_item('1')
+        self.assertEqual(DjangoORMPipeline.listing_row(item), DjangoORMPipeline.listing_row(item.to_dict()))
+        self.assertEqual(dict(zip(LISTING_COLUMNS, item.as_row()))['is_bath_shared'], True)
+
+
+class PostgresCopyPipelineTest(TestCase):
+
+    def setUp(self):
+        self.spider = Mock()
+        self.spider.logger = logging.getLogger('test_logger')
+        self.pipeline = PostgresCopyPipeline(copy_batch_size=2)
+        self.pipeline.open_spider(self.spider)
+
+    def make_item(self, airbnb_listing_id, **fields):
+        item = {
+            'airbnb_listing_id': airbnb_listing_id,
+            'name': 'test listing',
+            'title': 'condo in kitsilano',
+            'baths': 1.0,
+            'beds': 2.0,
+            'latitude': 49.2827,
+            'longitude': -123.1207,
+            'person_capacity': 4,
+            'registration_number': '24-000001',
+            'room_type': 'Entire home/apt',
+            'location': 'Vancouver',
+            'bath_is_shared': False,
+            'baths_text': '1 bath'
+        }
+        item.update(fields)
+        return item
+
+    def test_copy_row_converts_values(self):
+        row = dict(zip(LISTING_COLUMNS, self.pipeline.copy_row(self.make_item('1', person_capacity=''))))
+
+        self.assertIsNone(row['person_capacity'])
+        self.assertEqual(row['latitude'], '49.2827')
+        self.assertEqual(row['registration_number'], '24-000001')
+
+    def test_invalid_values_are_stored_as_null(self):
+        row = dict(zip(LISTING_COLUMNS, self.pipeline.copy_row(self.make_item('1', beds='two'))))
+        self.assertIsNone(row['beds'])
+
+    def test_items_without_id_are_skipped(self):
+        self.pipeline.process_item(self.make_item(''), self.spider)
+        self.assertEqual(self.pipeline.buffer, [])
+
+    def test_parse_scrapped_at(self):
+        scrapped_at = parse_scrapped_at('2024-11-02')
+        self.assertEqual(scrapped_at.date().isoformat(), '2024-11-02')
+        self.assertIsNotNone(scrapped_at.tzinfo)
+        self.assertIsNone(parse_scrapped_at(''))
+
+    @skipUnless(connection.vendor == 'postgresql', "COPY requires PostgreSQL")
+    def test_listings_are_copied_and_merged(self):
+        for airbnb_listing_id in ['1', '2', '2', '3']:
+            self.pipeline.process_item(self.make_item(airbnb_listing_id), self.spider)
+        self.pipeline.close_spider(self.spider)
+
+        self.assertEqual(sorted(Listing.objects.values_list('airbnb_listing_id', flat=True)), ['1', '2', '3'])
+        self.assertEqual(self.pipeline.inserted, 3)
+
+        rerun = PostgresCopyPipeline(scrapped_at=self.pipeline.scrapped_at)
+        rerun.open_spider(self.spider)
+        rerun.process_item(self.make_item('1'), self.spider)
+        rerun.close_spider(self.spider)
+        self.assertEqual(Listing.objects.count(), 3)
@@ -0,0 +1,30 @@
+import os
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from airbnb_project.database import database_connection_settings
+
+
+class DatabaseConnectionSettingsTest(SimpleTestCase):
+
+    def test_pool_sized_by_process_type(self):
+        with patch.dict(os.environ, {'DB_POOL_MAX_SIZE': '3'}):
+            web = database_connection_settings('pool', 'web')
+            harvest = database_connection_settings('pool', 'harvest')
+
+        self.assertEqual(web['CONN_MAX_AGE'], 0)
+        self.assertTrue(web['CONN_HEALTH_CHECKS'])
+        self.assertEqual((web['OPTIONS']['pool']['min_size'], web['OPTIONS']['pool']['max_size']), (2, 3))
+        self.assertEqual(harvest['OPTIONS']['pool']['min_size'], 1)
+
+    def test_pgbouncer(self):
+        settings = database_connection_settings('pgbouncer', 'celery')
+
+        self.assertEqual(settings['OPTIONS'], {})
+        self.assertGreater(settings['CONN_MAX_AGE'], 0)
+        self.assertTrue(settings['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            database_connection_settings('bouncer')
+        with self.assertRaises(ValueError):
+            database_connection_settings('pool', 'beat')
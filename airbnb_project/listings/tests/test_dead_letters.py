@@ -0,0 +1,108 @@
+import json
+from unittest.mock import Mock
+from django.test import TestCase
+from scrapy.exceptions import DontCloseSpider
+from scrapy.http import Response, TextResponse
+from scrapy.spidermiddlewares.httperror import HttpError
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
+from listings.harvester_app.harvester import parsing
+from listings.harvester_app.harvester.extensions import DeadLetterCollector
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.signals import listing_failed
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+from listings.harvester_app.tests.samples import listing_details_json
+from listings.listing_models import DeadLetter
+
+API_ERROR = json.dumps({"errors": [{"message": "Internal error"}], "data": None}).encode()
+
+
+class DeadLetterTest(TestCase):
+
+    def setUp(self):
+        self.crawler = get_crawler(ListingsSpider, settings_dict=get_harvester_settings())
+        self.spider = self.crawler._create_spider()
+        self.failures = []
+        self.crawler.signals.connect(self.record_failure, signal=listing_failed)
+        self.collector = DeadLetterCollector(self.crawler, retry_concurrency=2)
+        self.crawler.engine = Mock()
+
+    def record_failure(self, request, reason, spider):
+        self.failures.append((request.meta['airbnb_params']['airbnb_listing_id'], reason))
+
+    def listing_request(self, listing_id):
+        return self.spider._create_listing_request({"airbnb_listing_id": listing_id, "title": "Condo"})
+
+    def fail(self, listing_id, reason="HTTP 500"):
+        self.collector.listing_failed(self.listing_request(listing_id), reason, self.spider)
+
+    def test_parse_listing_response(self):
+        self.assertEqual(parsing.parse_listing_response(API_ERROR, {"airbnb_listing_id": "1"})[1],
+                         "API error: Internal error")
+        item, error = parsing.parse_listing_response(listing_details_json(registration_number="24-000001"),
+                                                     {"airbnb_listing_id": "1"})
+        self.assertIsNone(error)
+        self.assertEqual(item.registration_number, "24-000001")
+
+    def test_partial_listing_is_held_back(self):
+        request = self.listing_request("1")
+        self.assertEqual(list(self.spider.handle_listing(TextResponse(request.url, body=API_ERROR, request=request))),
+                         [])
+        self.assertEqual(list(self.spider.handle_listing(TextResponse(request.url, body=b"<html>", request=request))),
+                         [])
+        self.assertEqual(self.failures[0], ("1", "API error: Internal error"))
+        self.assertTrue(self.failures[1][1].startswith("JSONDecodeError"))
+
+    def test_failed_request_is_reported(self):
+        request = self.listing_request("1")
+        failure = Failure(HttpError(Response(request.url, status=503, request=request)))
+        failure.request = request
+        request.errback(failure)
+        self.assertEqual(self.failures, [("1", "HTTP 503")])
+
+    def test_retry_pass_at_reduced_concurrency(self):
+        for listing_id in ["1", "2", "3"]:
+            self.fail(listing_id)
+
+        with self.assertRaises(DontCloseSpider):
+            self.collector.spider_idle(self.spider)
+        retries = [call.args[0] for call in self.crawler.engine.crawl.call_args_list]
+        self.assertEqual(len(retries), 2)
+        self.assertTrue(all(retry.dont_filter and retry.meta['dead_letter_pass'] for retry in retries))
+
+        # A retry done sends the next one
+        response = TextResponse(retries[0].url, body=b"{}", request=retries[0])
+        self.collector.item_scraped({"airbnb_listing_id": retries[0].meta['airbnb_params']['airbnb_listing_id']},
+                                    response, self.spider)
+        self.assertEqual(self.crawler.engine.crawl.call_count, 3)
+        self.collector.listing_failed(retries[1], "HTTP 429", self.spider)
+
+        # The pass is over once the retries are sent
+        self.collector.spider_idle(self.spider)
+        self.assertEqual(len(self.collector.failures), 2)
+        self.assertEqual(self.crawler.stats.get_value('dead_letter/recovered'), 1)
+
+    def test_store_listings_still_failing(self):
+        DeadLetter.objects.create(airbnb_listing_id="1", airbnb_params={"airbnb_listing_id": "1"}, url="", reason="",
+                                  attempts=2)
+        DeadLetter.objects.create(airbnb_listing_id="3", airbnb_params={"airbnb_listing_id": "3"}, url="", reason="")
+        self.fail("1", "HTTP 429")
+        self.fail("2")
+        request = self.listing_request("3")
+        self.collector.item_scraped({"airbnb_listing_id": "3"}, Response(request.url, request=request), self.spider)
+        self.collector.spider_closed(self.spider, "finished")
+
+        self.assertEqual(DeadLetter.objects.get(airbnb_listing_id="1").attempts, 3)
+        self.assertEqual(DeadLetter.objects.get(airbnb_listing_id="1").reason, "HTTP 429")
+        self.assertEqual(DeadLetter.objects.get(airbnb_listing_id="2").airbnb_params["title"], "Condo")
+        self.assertIsNotNone(DeadLetter.objects.get(airbnb_listing_id="3").resolved_at)
+
+    def test_dead_letters_crawl(self):
+        DeadLetter.objects.create(airbnb_listing_id="1", airbnb_params={"airbnb_listing_id": "1"}, url="", reason="")
+        DeadLetter.objects.create(airbnb_listing_id="2", airbnb_params={"airbnb_listing_id": "2"}, url="", reason="",
+                                  attempts=5)
+        spider = self.crawler._create_spider(dead_letters=True)
+
+        requests = spider.start_requests()
+        self.assertEqual([request.meta['airbnb_params']['airbnb_listing_id'] for request in requests], ["1"])
+        self.assertTrue(requests[0].dont_filter)
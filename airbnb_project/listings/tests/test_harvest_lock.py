@@ -0,0 +1,127 @@
+import datetime
+from unittest.mock import Mock, patch
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from airbnb_project.celery import app
+from listings.listing_models import HarvestRun
+from listings.tasks import HARVEST_LOCK_KEY, RELEASE_HARVEST_LOCK_SCRIPT, _dead_letters_finished, finish_harvest, \
+    start_harvest
+from policies.models import PolicyEvaluationJob
+
+
+class HarvestLockTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('harvest_listings')
+        patcher = patch('listings.tasks.run_harvest_task.delay')
+        self.mock_run_harvest_task = patcher.start()
+        self.mock_run_harvest_task.return_value.id = 'task-id'
+        self.addCleanup(patcher.stop)
+
+    def test_single_harvest_at_a_time(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        run_id = response.json()['run_id']
+        self.assertEqual(response.json()['status'], HarvestRun.STATUS_PENDING)
+        self.assertEqual(HarvestRun.objects.get(pk=run_id).celery_task_id, 'task-id')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['run_id'], run_id)
+        self.mock_run_harvest_task.assert_called_once_with(profile='', run_id=run_id)
+        self.assertEqual(HarvestRun.objects.count(), 1)
+
+        finish_harvest(run_id)
+        self.assertEqual(HarvestRun.objects.get(pk=run_id).status, HarvestRun.STATUS_SUCCEEDED)
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+
+    def test_queued_harvest_started_when_the_run_finishes(self):
+        run, started = start_harvest()
+        self.assertTrue(started)
+        # Started before midnight
+        HarvestRun.objects.filter(pk=run.pk).update(started_at=timezone.now() - datetime.timedelta(days=1))
+
+        response = self.client.get(self.url, {'queue': '1'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['run_id'], run.pk)
+        self.assertTrue(response.json()['queued'])
+        self.assertEqual(self.mock_run_harvest_task.call_count, 1)
+
+        finish_harvest(run.pk, succeeded=False)
+        self.assertEqual(HarvestRun.objects.get(pk=run.pk).status, HarvestRun.STATUS_FAILED)
+        self.assertEqual(self.mock_run_harvest_task.call_count, 2)
+        next_run = HarvestRun.objects.exclude(pk=run.pk).get()
+        self.assertEqual(cache.get(HARVEST_LOCK_KEY), next_run.pk)
+
+        # Finishing twice, e.g. by the crawl and the task, doesn't start the queued harvest again
+        finish_harvest(run.pk)
+        self.assertEqual(self.mock_run_harvest_task.call_count, 2)
+
+    def test_harvest_of_the_same_day_not_queued(self):
+        run, _ = start_harvest()
+
+        response = self.client.get(self.url, {'queue': '1'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['run_id'], run.pk)
+        self.assertNotIn('queued', response.json())
+
+        finish_harvest(run.pk)
+        self.assertEqual(self.mock_run_harvest_task.call_count, 1)
+
+    def test_lock_released_at_once_in_redis(self):
+        lock = RedisCache('redis://redis:6379/0', {})
+        with patch('listings.tasks._harvest_lock', return_value=lock), \
+                patch.object(lock._cache, 'get_client') as mock_get_client:
+            finish_harvest(42)
+
+        key = lock.make_and_validate_key(HARVEST_LOCK_KEY)
+        mock_get_client.return_value.eval.assert_called_once_with(RELEASE_HARVEST_LOCK_SCRIPT, 1, key, 42)
+
+    def test_lock_of_a_finished_run_released(self):
+        stale_run = HarvestRun.objects.create(status=HarvestRun.STATUS_FAILED)
+        cache.set(HARVEST_LOCK_KEY, stale_run.pk)
+
+        run, started = start_harvest()
+
+        self.assertTrue(started)
+        self.assertNotEqual(run.pk, stale_run.pk)
+        self.assertEqual(cache.get(HARVEST_LOCK_KEY), run.pk)
+
+    @patch('policies.tasks.evaluate_policies_task.delay')
+    def test_policy_evaluation_chained(self, mock_evaluate_policies_task):
+        mock_evaluate_policies_task.return_value.id = 'evaluation-task-id'
+        run, _ = start_harvest()
+
+        finish_harvest(run.pk, scrapped_at=datetime.date(2026, 10, 19))
+        finish_harvest(run.pk, scrapped_at=datetime.date(2026, 10, 19))
+
+        job = PolicyEvaluationJob.objects.get()
+        self.assertEqual(job.scrapped_at, datetime.date(2026, 10, 19))
+        mock_evaluate_policies_task.assert_called_once_with(job.pk)
+
+    @patch('policies.tasks.evaluate_policies_task.delay')
+    def test_policy_evaluation_of_the_dead_letters(self, mock_evaluate_policies_task):
+        mock_evaluate_policies_task.return_value.id = 'evaluation-task-id'
+        crawler = Mock()
+        crawler.settings.get.return_value = '2026-10-19'
+        crawler.stats.get_value.return_value = 'finished'
+
+        self.assertIsNone(_dead_letters_finished(None, crawler))
+
+        job = PolicyEvaluationJob.objects.get()
+        self.assertEqual(job.scrapped_at, datetime.date(2026, 10, 19))
+        mock_evaluate_policies_task.assert_called_once_with(job.pk)
+
+    def test_task_queues(self):
+        queues = {name: app.amqp.router.route({}, name)['queue'].name for name in (
+            'listings.tasks.run_harvest_task', 'listings.tasks.start_harvest_task',
+            'policies.tasks.evaluate_policies_task')}
+        self.assertEqual(queues, {
+            'listings.tasks.run_harvest_task': 'harvest',
+            'listings.tasks.start_harvest_task': 'celery',
+            'policies.tasks.evaluate_policies_task': 'policy',
+        })
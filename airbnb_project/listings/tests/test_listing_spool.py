@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import tempfile
+from unittest.mock import Mock, patch
+from django.db.utils import OperationalError
+from django.test import TestCase
+from listings.harvester_app.harvester.items import ListingItem
+from listings.harvester_app.harvester.pipelines import DjangoORMPipeline, parse_scrapped_at
+from listings.harvester_app.harvester.spool import ListingSpool, replay_spool
+from listings.listing_models import Listing
+
+
+class ListingSpoolTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'spool', 'listings.jsonl')
+        self.spider = Mock()
+        self.spider.logger = logging.getLogger('test_logger')
+        self.scrapped_at = parse_scrapped_at('2024-11-02')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_item(self, airbnb_listing_id):
+        return ListingItem(airbnb_listing_id=airbnb_listing_id, name='test listing', title='condo in kitsilano',
+                           baths=1.0, beds=2.0, latitude='49.2827', longitude='-123.1207', person_capacity=4,
+                           registration_number='24-000001', room_type='Entire home/apt', location='Vancouver',
+                           bath_is_shared=False, baths_text='1 bath')
+
+    def make_pipeline(self, **kwargs):
+        return DjangoORMPipeline(batch_size=2, scrapped_at=self.scrapped_at, spool=ListingSpool(self.path, **kwargs),
+                                 replay_on_open=True)
+
+    def spooled_ids(self, path=None):
+        with open(path or self.path) as spool:
+            return [json.loads(line)['airbnb_listing_id'] for line in spool]
+
+    def test_listings_are_spooled_while_the_database_is_unavailable(self):
+        pipeline = self.make_pipeline()
+        with patch.object(Listing.objects, 'bulk_create', side_effect=OperationalError("server closed")) as insert:
+            for airbnb_listing_id in ['1', '2', '3', '4', '5']:
+                pipeline.process_item(self.make_item(airbnb_listing_id), self.spider)
+            pipeline.close_spider(self.spider)
+
+        # Only the first batch waited on the database
+        self.assertEqual(insert.call_count, 1)
+        self.assertEqual(self.spooled_ids(), ['1', '2', '3', '4', '5'])
+        self.assertEqual(Listing.objects.count(), 0)
+
+        summary = replay_spool(self.path, batch_size=2)
+        self.assertEqual(summary, {'read': 5, 'inserted': 5, 'skipped': 0, 'invalid': 0})
+        self.assertEqual(Listing.objects.filter(scrapped_at=self.scrapped_at.date()).count(), 5)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_replay_skips_listings_already_saved(self):
+        ListingSpool(self.path).append([Listing(airbnb_listing_id=listing_id, scrapped_at=self.scrapped_at)
+                                        for listing_id in ['1', '2']])
+        Listing.objects.create(airbnb_listing_id='1', scrapped_at=self.scrapped_at)
+
+        self.assertEqual(replay_spool(self.path)['skipped'], 1)
+        self.assertEqual(sorted(Listing.objects.values_list('airbnb_listing_id', flat=True)), ['1', '2'])
+
+    def test_failed_replay_keeps_the_listings_not_saved(self):
+        spool = ListingSpool(self.path)
+        spool.append([Listing(airbnb_listing_id=listing_id) for listing_id in ['1', '2', '3']])
+        spool.close()
+        bulk_create = Listing.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(listings, **kwargs):
+            calls.append(listings)
+            if len(calls) == 2:
+                raise OperationalError("server closed")
+            return bulk_create(listings, **kwargs)
+
+        with patch.object(Listing.objects, 'bulk_create', side_effect=fail_second_batch):
+            with self.assertRaises(OperationalError):
+                replay_spool(self.path, batch_size=2)
+        self.assertEqual(self.spooled_ids(f"{self.path}.replay"), ['3'])
+
+        # New listings spooled meanwhile are replayed after the remaining ones
+        ListingSpool(self.path).append([Listing(airbnb_listing_id='4')])
+        self.assertEqual(replay_spool(self.path)['inserted'], 2)
+        self.assertEqual(sorted(Listing.objects.values_list('airbnb_listing_id', flat=True)), ['1', '2', '3', '4'])
+
+    def test_full_spool_drops_listings(self):
+        spool = ListingSpool(self.path, max_bytes=700)
+        self.assertEqual(spool.append([Listing(airbnb_listing_id=str(index)) for index in range(3)]), 2)
+        spool.close()
+        self.assertEqual(self.spooled_ids(), ['0', '1'])
+
+    def test_spool_is_replayed_when_the_spider_opens(self):
+        ListingSpool(self.path).append([Listing(airbnb_listing_id='1', scrapped_at=self.scrapped_at)])
+        self.make_pipeline().open_spider(self.spider)
+        self.assertEqual(Listing.objects.count(), 1)
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+from airbnb_project.metrics import export_metrics
+from listings.harvester_app.harvester.extensions import HarvestMetrics
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+from policies.services.business_licence_client import BusinessLicenceClient
+from policies.services.licence_status_cache import LicenceStatusCache
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class MetricsTest(TestCase):
+
+    def test_harvest_metrics(self):
+        crawler = get_crawler(ListingsSpider)
+        extension = HarvestMetrics.from_crawler(crawler)
+        spider = crawler._create_spider()
+        requests = sample('harvest_requests_total', endpoint='listing', status='200')
+        latency = sample('harvest_download_latency_seconds_count', endpoint='listing')
+        scraped = sample('harvest_items_total', outcome='scraped')
+
+        request = Request("https://www.airbnb.ca/api/v3/StaysPdpSections/1",
+                          meta={'airbnb_params': {'airbnb_listing_id': '1'}, 'download_latency': 0.2})
+        response = Response(request.url, request=request)
+        extension.response_received(response, request, spider)
+        extension.item_scraped({'airbnb_listing_id': '1'}, response, spider)
+
+        self.assertEqual(sample('harvest_requests_total', endpoint='listing', status='200'), requests + 1)
+        self.assertEqual(sample('harvest_download_latency_seconds_count', endpoint='listing'), latency + 1)
+        self.assertEqual(sample('harvest_items_total', outcome='scraped'), scraped + 1)
+
+    def test_licence_lookup_metrics(self):
+        hits = sample('licence_status_cache_lookups_total', result='local_hits')
+        lookups = sample('business_licence_request_seconds_count', outcome='ok')
+        client = BusinessLicenceClient(cache=LicenceStatusCache(), transport=MagicMock())
+        client.transport.get.return_value.json.return_value = {"results": [{"status": "Issued"}]}
+
+        client.get_licence_status("24-000001")
+        client.get_licence_status("24-000001")
+
+        self.assertEqual(sample('licence_status_cache_lookups_total', result='local_hits'), hits + 1)
+        self.assertEqual(sample('business_licence_request_seconds_count', outcome='ok'), lookups + 1)
+
+    def test_metrics_endpoint(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE harvest_requests_total counter', response.content)
+        self.assertIn(b'# TYPE db_batch_write_seconds histogram', response.content)
+
+    def test_export_to_textfile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'harvester.prom')
+            with patch.dict(os.environ, {'METRICS_TEXTFILE_PATH': path}):
+                export_metrics('harvester')
+            with open(path) as textfile:
+                self.assertIn('policy_evaluations_total', textfile.read())
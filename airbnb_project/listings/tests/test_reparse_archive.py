@@ -0,0 +1,36 @@
+import tempfile
+from datetime import datetime, timezone
+from django.core.management import call_command
+from django.test import TestCase
+from listings.harvester_app.harvester.archive import ResponseArchive
+from listings.harvester_app.tests.samples import listing_details_json, search_page_html
+from listings.listing_models import Listing
+
+
+class ReparseArchiveCommandTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        archive = ResponseArchive(self.directory.name)
+        archived_at = datetime(2024, 11, 2, 6, tzinfo=timezone.utc)
+        archive.store("https://www.airbnb.ca/s/Vancouver/homes?page=1", "search-1", "search", 200,
+                      search_page_html([{"id": "111", "title": "Condo in Kitsilano", "name": "Bright condo"}]),
+                      archived_at=archived_at)
+        archive.store("https://www.airbnb.ca/api/v3/StaysPdpSections/111", "listing-111", "listing", 200,
+                      listing_details_json(registration_number="24-000001", beds="2 beds", baths="1.5 shared baths"),
+                      meta={'airbnb_params': {'airbnb_listing_id': '111', 'title': 'Old title'}},
+                      archived_at=archived_at)
+        archive.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reparse_archive(self):
+        call_command('reparse_archive', archive=self.directory.name, workers=0, stdout=tempfile.TemporaryFile('w'))
+
+        listing = Listing.objects.get(airbnb_listing_id='111')
+        self.assertEqual(listing.title, 'condo in kitsilano')
+        self.assertEqual(listing.registration_number, '24-000001')
+        self.assertEqual(listing.beds, 2)
+        self.assertTrue(listing.is_bath_shared)
+        self.assertEqual(listing.scrapped_at.date().isoformat(), '2024-11-02')
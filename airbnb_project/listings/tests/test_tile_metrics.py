@@ -0,0 +1,98 @@
+import asyncio
+from django.test import TestCase
+from django.urls import reverse
+from scrapy import signals
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+from listings.harvester_app.harvester.extensions import TileMetricsCollector
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.spiders.constants import SEARCH_PAGE_CAP
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+from listings.harvester_app.tests.samples import search_page_html
+from listings.listing_models import HarvestRun
+
+TILES = [
+    {"index": 0, "sw_lat": "49.20", "sw_lng": "-123.27", "ne_lat": "49.21", "ne_lng": "-123.25"},
+    {"index": 1, "sw_lat": "49.21", "sw_lng": "-123.27", "ne_lat": "49.22", "ne_lng": "-123.25"},
+    {"index": 2, "sw_lat": "49.22", "sw_lng": "-123.27", "ne_lat": "49.23", "ne_lng": "-123.25"},
+]
+
+
+class TileMetricsCollectorTest(TestCase):
+
+    def setUp(self):
+        self.crawler = get_crawler(ListingsSpider, settings_dict=get_harvester_settings())
+        self.crawler.spider = self.crawler._create_spider()
+        self.crawler.stats.open_spider(self.crawler.spider)
+        self.collector = TileMetricsCollector.from_crawler(self.crawler)
+
+    def parse_search_page(self, tile, listing_ids, page_cursors=(), latency=0.2):
+        """
+        Run a search page of a tile through the spider, as downloaded by the engine.
+        """
+        spider = self.crawler.spider
+        spider.next_page_cursors = []
+        request = Request(f"https://www.airbnb.ca/s/Vancouver--Canada/homes?tile={tile['index']}",
+                          meta={'tile': tile, 'download_latency': latency})
+        response = HtmlResponse(request.url, body=search_page_html([{"id": i} for i in listing_ids],
+                                                                   list(page_cursors)), request=request)
+        self.crawler.signals.send_catch_log(signal=signals.response_received, response=response, request=request,
+                                            spider=spider)
+
+        async def collect():
+            return [output async for output in spider.parse(response)]
+
+        return asyncio.run(collect())
+
+    def test_tile_metrics(self):
+        requests = self.parse_search_page(TILES[0], ["1", "2", "3"], page_cursors=["c"] * SEARCH_PAGE_CAP)
+        self.parse_search_page(TILES[1], ["3", "4"])
+        self.parse_search_page(TILES[2], [], latency=0.4)
+
+        self.assertEqual([request.meta['tile'] for request in requests], [TILES[0]] * 3)
+        run = self.collector.save("finished")
+        tiles = list(run.tiles.order_by('tile_index'))
+        self.assertEqual([tile.listings_found for tile in tiles], [3, 2, 0])
+        self.assertEqual([tile.new_listings for tile in tiles], [3, 1, 0])
+        self.assertEqual([tile.duplicate_listings for tile in tiles], [0, 1, 0])
+        self.assertEqual([tile.saturated for tile in tiles], [True, False, False])
+        self.assertEqual(tiles[2].requests, 1)
+
+        summary = run.summary()
+        self.assertEqual(summary['tiles'], 3)
+        self.assertEqual(summary['empty_tiles'], 1)
+        self.assertEqual(summary['saturated_tiles'], 1)
+        self.assertEqual(summary['listings_found'], 5)
+        self.assertEqual(summary['duplicate_ratio'], 0.2)
+        self.assertEqual(summary['mean_response_ms'], 266.7)
+
+    def test_listing_responses_are_not_tile_requests(self):
+        request = Request("https://www.airbnb.ca/api/v3/StaysPdpSections/1",
+                          meta={'tile': TILES[0], 'airbnb_params': {'airbnb_listing_id': '1'}})
+        self.collector.response_received(HtmlResponse(request.url, request=request), request, self.crawler.spider)
+        self.assertEqual(self.collector.tiles, {})
+
+
+class HarvestRunViewsTest(TestCase):
+
+    def setUp(self):
+        self.run = HarvestRun.objects.create(finish_reason="finished", items_scraped=2)
+        self.run.tiles.create(tile_index=0, sw_lat=49.2, sw_lng=-123.27, ne_lat=49.21, ne_lng=-123.25, requests=2,
+                              pages=2, listings_found=2, new_listings=2, response_seconds=0.5)
+
+    def test_tiles_geojson(self):
+        response = self.client.get(reverse('harvest_run_tiles', args=[self.run.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        feature = response.json()['features'][0]
+        self.assertEqual(feature['geometry']['coordinates'][0][0], [-123.27, 49.2])
+        self.assertEqual(feature['geometry']['coordinates'][0][2], [-123.25, 49.21])
+        self.assertEqual(feature['properties']['listings_found'], 2)
+        self.assertEqual(feature['properties']['mean_response_ms'], 250.0)
+
+    def test_run_summary(self):
+        response = self.client.get(reverse('harvest_run_summary', args=[self.run.pk]))
+        self.assertEqual(response.json()['new_listings'], 2)
+        self.assertEqual(self.client.get(reverse('harvest_runs')).json()['runs'][0]['run_id'], self.run.pk)
+        self.assertEqual(self.client.get(reverse('harvest_run_summary', args=[self.run.pk + 1])).status_code, 404)
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+from django.test import TestCase
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from scrapy.http import TextResponse
+from scrapy.utils.test import get_crawler
+from airbnb_project import tracing
+from listings.harvester_app.harvester.extensions import CrawlTracer
+from listings.harvester_app.harvester.harvester_settings import get_harvester_settings
+from listings.harvester_app.harvester.pipelines import AirbnbListingsPipelineDataCleaner, DjangoORMPipeline
+from listings.harvester_app.harvester.spiders.listings_spider import ListingsSpider
+from listings.harvester_app.tests.samples import listing_details_json
+
+exporter = InMemorySpanExporter()
+
+
+class TracingTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        tracing.configure_tracing(sample_ratio=1.0, span_exporter=exporter)
+
+    def setUp(self):
+        exporter.clear()
+
+    def spans(self):
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    def test_trace_propagated_to_the_celery_task(self):
+        headers = {}
+        with tracing.tracer.start_as_current_span('harvest_listings') as view_span:
+            tracing.before_task_publish(headers=headers)
+        self.assertIn('traceparent', headers)
+
+        # The worker receives the custom headers of the message as attributes of the task request
+        task = SimpleNamespace(name='listings.tasks.run_harvest_task', request=SimpleNamespace(**headers))
+        tracing.task_prerun(task_id='1', task=task)
+        with tracing.tracer.start_as_current_span('harvest.crawl'):
+            pass
+        tracing.task_postrun(task=task, state='SUCCESS')
+
+        spans = self.spans()
+        task_span = spans['celery.task listings.tasks.run_harvest_task']
+        self.assertEqual(task_span.context.trace_id, view_span.get_span_context().trace_id)
+        self.assertEqual(task_span.parent.span_id, view_span.get_span_context().span_id)
+        self.assertIn('celery.queue_wait_seconds', task_span.attributes)
+        self.assertEqual(spans['harvest.crawl'].parent.span_id, task_span.context.span_id)
+
+    def test_crawl_spans(self):
+        crawler = get_crawler(ListingsSpider, settings_dict=get_harvester_settings())
+        spider = crawler._create_spider()
+        crawler.stats.open_spider(spider)
+        extension = CrawlTracer.from_crawler(crawler)
+        extension.spider_opened(spider)
+
+        request = spider._create_listing_request({"airbnb_listing_id": "1", "title": "Condo"})
+        request.meta['download_latency'] = 0.25
+        response = TextResponse(request.url, body=listing_details_json(), request=request)
+        extension.response_received(response, request, spider)
+        item = AirbnbListingsPipelineDataCleaner().process_item(next(spider.handle_listing(response)), spider)
+        pipeline = DjangoORMPipeline()
+        pipeline.process_item(item, spider)
+        pipeline.flush(spider)
+        extension.spider_closed(spider, 'finished')
+
+        spans = self.spans()
+        crawl_id = spans['harvest.crawl'].context.span_id
+        for name in ('scrapy.download', 'spider.parse_listing', 'pipeline.clean', 'pipeline.orm_batch'):
+            self.assertEqual(spans[name].parent.span_id, crawl_id)
+        download = spans['scrapy.download']
+        self.assertAlmostEqual((download.end_time - download.start_time) / 1e9, 0.25)
+        queries = [span for span in exporter.get_finished_spans() if span.name == 'db.query']
+        self.assertTrue(all(query.parent.span_id == spans['pipeline.orm_batch'].context.span_id for query in queries))
+        self.assertTrue(any('INSERT' in query.attributes['db.statement'] for query in queries))
+
+    def test_untraced_calls(self):
+        headers = {}
+        tracing.before_task_publish(headers=headers)
+        self.assertEqual(headers, {})
+        self.assertIsNone(tracing.crawl_context(Mock()))
@@ -1,6 +1,7 @@
 from django.test import TestCase, Client
 from django.urls import reverse
-from unittest.mock import patch
+from unittest.mock import ANY, patch
+from django.core.cache import cache
 import logging
 
 
@@ -23,6 +24,7 @@ class HarvestListingsViewTest(TestCase):
         self.client = Client()
         self.url = reverse('harvest_listings')
         self.logger = logging.getLogger('django')
+        cache.clear()
 
     @patch('listings.tasks.run_harvest_task.delay')
     def test_harvest_listings_success(self, mock_run_harvest_task):
@@ -53,3 +55,21 @@ class HarvestListingsViewTest(TestCase):
             response = self.client.get(self.url)
             self.assertEqual(response.status_code, 500)
             mock_run_harvest_task.assert_called_once()
+
+    @patch('listings.tasks.run_harvest_task.delay')
+    def test_harvest_listings_profile(self, mock_run_harvest_task):
+        """
+        Tests that the 'harvest_listings' view passes the profilers of the crawl to the harvest task,
+        and rejects unknown ones with a 400 status code.
+
+        Args:
+            mock_run_harvest_task: Mocked version of the 'run_harvest_task.delay' method.
+        """
+        mock_run_harvest_task.return_value.id = 'task-id'
+        response = self.client.get(self.url, {'profile': 'all'})
+        self.assertEqual(response.status_code, 202)
+        mock_run_harvest_task.assert_called_once_with(profile='all', run_id=ANY)
+
+        response = self.client.get(self.url, {'profile': 'gpu'})
+        self.assertEqual(response.status_code, 400)
+        mock_run_harvest_task.assert_called_once()
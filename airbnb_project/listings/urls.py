@@ -3,4 +3,7 @@ from . import views
 
 urlpatterns = [
     path("harvest-listings/", views.harvest_listings, name="harvest_listings"),
+    path("harvest-runs/", views.harvest_runs, name="harvest_runs"),
+    path("harvest-runs/<int:run_id>/", views.harvest_run_summary, name="harvest_run_summary"),
+    path("harvest-runs/<int:run_id>/tiles.geojson", views.harvest_run_tiles, name="harvest_run_tiles"),
 ]
@@ -1,7 +1,11 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 import logging
-from .tasks import  run_harvest_task
+from airbnb_project.tracing import tracer
+from .harvester_app.harvester.extensions import CrawlProfiler
+from .listing_models import HarvestRun
+from .tasks import start_harvest
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
@@ -11,13 +15,81 @@ logger = logging.getLogger(__name__)
 def harvest_listings(request):
     """
        Django view to initiate the harvesting process as a Celery task.
+
+       A single harvest runs at a time: when one is already running, its run is returned with a 409 status code,
+       unless the query param `queue` is set, in which case another harvest starts once it finishes, if the running
+       one started before today.
+       The query param `profile` ('cpu', 'memory' or 'all') profiles the crawl.
        """
+    profile = request.GET.get('profile', '')
+    if profile and profile not in CrawlProfiler.MODES:
+        return HttpResponse(f"Query param `profile` must be one of {', '.join(CrawlProfiler.MODES)}", status=400)
+    queue = request.GET.get('queue', '').lower() in ('1', 'true', 'yes')
     try:
-        # Trigger the Celery task
-        run_harvest_task.delay()
-        logger.info("Harvesting process started via Celery task")
-        return HttpResponse("Harvesting process started", status=202)
+        # Trigger the Celery task, in the trace of the harvest
+        with tracer.start_as_current_span('harvest_listings', attributes={'harvest.profile': profile}):
+            run, started = start_harvest(profile=profile, queue=queue)
     except Exception as e:
         # Log any unexpected errors
         logger.error(f"Failed to start harvesting process: {str(e)}")
         return HttpResponse("Failed to start harvesting process", status=500)
+    if started:
+        logger.info(f"Harvesting process started via Celery task, harvest run {run.pk}")
+        return JsonResponse(_harvest_run_status(run), status=202)
+    if run is None:
+        return JsonResponse({'error': "A harvesting process is already running"}, status=409)
+    if queue and run.rerun_requested:
+        logger.info(f"Harvesting process queued after harvest run {run.pk}")
+        return JsonResponse({**_harvest_run_status(run), 'queued': True}, status=202)
+    if queue:
+        return JsonResponse({**_harvest_run_status(run),
+                             'error': "A harvesting process of today is already running, not queueing another one"},
+                            status=409)
+    return JsonResponse({**_harvest_run_status(run), 'error': "A harvesting process is already running"},
+                        status=409)
+
+
+def _harvest_run_status(run: HarvestRun) -> dict:
+    return {
+        'run_id': run.pk,
+        'status': run.status,
+        'status_url': reverse('harvest_run_summary', args=[run.pk]),
+    }
+
+
+@require_http_methods(["GET"])
+def harvest_runs(request):
+    """
+       Django view summarizing the tile metrics of the most recent harvest runs.
+       """
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': "Query param `limit` must be an integer"}, status=400)
+    runs = HarvestRun.objects.order_by('-started_at')[:limit]
+    return JsonResponse({'runs': [run.summary() for run in runs]})
+
+
+@require_http_methods(["GET"])
+def harvest_run_summary(request, run_id):
+    """
+       Django view summarizing the tile metrics of a harvest run.
+       """
+    run = HarvestRun.objects.filter(pk=run_id).first()
+    if run is None:
+        return JsonResponse({'error': f"Harvest run {run_id} not found"}, status=404)
+    return JsonResponse(run.summary())
+
+
+@require_http_methods(["GET"])
+def harvest_run_tiles(request, run_id):
+    """
+       Django view returning the tiles of a harvest run and their metrics as a GeoJSON FeatureCollection.
+       """
+    run = HarvestRun.objects.filter(pk=run_id).first()
+    if run is None:
+        return JsonResponse({'error': f"Harvest run {run_id} not found"}, status=404)
+    return JsonResponse({
+        'type': 'FeatureCollection',
+        'features': [tile.to_feature() for tile in run.tiles.order_by('tile_index')],
+    }, content_type='application/geo+json')
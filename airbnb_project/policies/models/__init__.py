@@ -2,3 +2,4 @@ from .policy_model import Policy
 from listings.listing_models import Listing
 from .listing_policy_result_model import ListingPolicyResult
 from .policy_context_model import PolicyContext
+from .policy_evaluation_job_model import PolicyEvaluationJob
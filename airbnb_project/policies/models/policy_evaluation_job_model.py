@@ -0,0 +1,103 @@
+from django.db import models
+from django.utils import timezone
+
+
+class PolicyEvaluationJob(models.Model):
+  """
+  Model to track an asynchronous policy evaluation run for the listings scrapped on a given date.
+
+  Only aggregate counters are stored so that the progress of a run can be reported
+  without keeping the evaluated listings or the failed results in memory.
+
+  Attributes:
+      scrapped_at (DateField): The scrapping date of the listings being evaluated.
+      status (CharField): The current state of the job.
+      celery_task_id (CharField): The id of the Celery task running the evaluation.
+      total (PositiveIntegerField): Number of listings to evaluate.
+      processed (PositiveIntegerField): Number of listings evaluated so far.
+      succeeded (PositiveIntegerField): Number of policy results saved successfully.
+      failed (PositiveIntegerField): Number of listings that could not be evaluated or saved.
+      last_error (TextField): The most recent error message, if any.
+      created_at (DateTimeField): When the job was enqueued.
+      started_at (DateTimeField): When the worker started the evaluation.
+      finished_at (DateTimeField): When the evaluation finished.
+  """
+  STATUS_PENDING = "pending"
+  STATUS_RUNNING = "running"
+  STATUS_SUCCEEDED = "succeeded"
+  STATUS_FAILED = "failed"
+  STATUS_CHOICES = [
+    (STATUS_PENDING, "Pending"),
+    (STATUS_RUNNING, "Running"),
+    (STATUS_SUCCEEDED, "Succeeded"),
+    (STATUS_FAILED, "Failed"),
+  ]
+
+  scrapped_at = models.DateField()
+  status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+  celery_task_id = models.CharField(max_length=255, blank=True, default="")
+  total = models.PositiveIntegerField(default=0)
+  processed = models.PositiveIntegerField(default=0)
+  succeeded = models.PositiveIntegerField(default=0)
+  failed = models.PositiveIntegerField(default=0)
+  last_error = models.TextField(blank=True, default="")
+  created_at = models.DateTimeField(auto_now_add=True)
+  started_at = models.DateTimeField(null=True, blank=True)
+  finished_at = models.DateTimeField(null=True, blank=True)
+
+  def __str__(self) -> str:
+    """
+    Returns a string representation of the PolicyEvaluationJob instance.
+
+    Returns:
+        str: The job id, the evaluated date and the job status.
+    """
+    return f"Policy evaluation {self.pk} for {self.scrapped_at} ({self.status})"
+
+  @property
+  def elapsed_seconds(self) -> float:
+    """
+    Seconds spent on the evaluation so far, or in total once the job finished.
+
+    Returns:
+        float: Elapsed seconds, 0 if the job has not started yet.
+    """
+    if self.started_at is None:
+      return 0.0
+    end = self.finished_at or timezone.now()
+    return max((end - self.started_at).total_seconds(), 0.0)
+
+  @property
+  def throughput(self) -> float:
+    """
+    Number of listings evaluated per second.
+
+    Returns:
+        float: Listings per second, 0 if nothing was evaluated yet.
+    """
+    elapsed = self.elapsed_seconds
+    return round(self.processed / elapsed, 2) if elapsed else 0.0
+
+  def to_dict(self) -> dict:
+    """
+    Serialize the job progress for the status endpoint.
+
+    Returns:
+        dict: The job state, counters, progress and throughput.
+    """
+    return {
+      'job_id': self.pk,
+      'scrapped_at': str(self.scrapped_at),
+      'status': self.status,
+      'total': self.total,
+      'processed': self.processed,
+      'succeeded': self.succeeded,
+      'failed': self.failed,
+      'progress': round(self.processed / self.total, 4) if self.total else 0.0,
+      'throughput_per_second': self.throughput,
+      'elapsed_seconds': round(self.elapsed_seconds, 2),
+      'last_error': self.last_error,
+      'created_at': self.created_at.isoformat() if self.created_at else None,
+      'started_at': self.started_at.isoformat() if self.started_at else None,
+      'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+    }
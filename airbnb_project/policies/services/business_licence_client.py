@@ -1,16 +1,26 @@
 import json
 import requests
 import logging
-from urllib3.exceptions import HTTPError
+import time
 from urllib.parse import urlencode
+from airbnb_project.metrics import BUSINESS_LICENCE_LATENCY
+from policies.services.http_transport import ResilientTransport, get_business_licence_transport
+from policies.services.licence_status_cache import LicenceStatusCache
 class BusinessLicenceClient:
     BASE_URL = "https://opendata.vancouver.ca/api/explore/v2.1/catalog/datasets/business-licences/records"
 
-    def __init__(self) -> None:
+    def __init__(self, cache: LicenceStatusCache = None, transport: ResilientTransport = None) -> None:
         """
-        Initialize the BusinessLicenceClient with a session.
+        Initialize the BusinessLicenceClient with a transport.
+
+        Args:
+            cache (LicenceStatusCache, optional): Cache consulted before calling Opendata.
+            transport (ResilientTransport, optional): Transport used to call Opendata. Defaults to the
+                transport of the process, configured by the `BUSINESS_LICENCE_TRANSPORT` setting.
         """
-        self.session = requests.Session()
+        self.transport = transport or get_business_licence_transport()
+        self.session = self.transport.session
+        self.cache = cache
 
     def _filter_by_licence_number(self, licence_number: str) -> dict:
         """
@@ -57,19 +67,23 @@ class BusinessLicenceClient:
             dict: The JSON response from the API.
         
         Raises:
-            HTTPError: If an HTTP error occurs.
+            requests.HTTPError: If an HTTP error occurs after the retries of the transport.
+            requests.RequestException: If the request fails after the retries of the transport.
             json.JSONDecodeError: If there is an error decoding the JSON response.
         """
         try:
             query_string = urlencode(params, safe='():,')
             url = f"{self.BASE_URL}?{query_string}"
-            response = self.session.get(url=url)
+            response = self.transport.get(url)
             # Raises HTTPError, if one occurred
             response.raise_for_status()
             return response.json()
-        except HTTPError as e:
+        except requests.HTTPError as e:
             logging.error(f"Error fetching data: {e}")
             raise e
+        except requests.RequestException as e:
+            logging.error(f"Error requesting data: {e}")
+            raise e
         except json.JSONDecodeError as e:
             logging.error(f"Error decoding data: {e}")
             raise e
@@ -138,12 +152,31 @@ class BusinessLicenceClient:
             1. Given licence number "24-159412", return "Issued".
             2. Given licence number "24-243792", return "Cancelled".
         """
+        if self.cache is None:
+            return self._fetch_licence_status(licence_number)
+        return self.cache.get_or_fetch(licence_number, self._fetch_licence_status)
 
+    def _fetch_licence_status(self, licence_number: str) -> str:
+        """
+        Get a status from a licence number from Opendata, bypassing the cache.
+
+        Args:
+            licence_number (str): The licence number to check status for.
+
+        Returns:
+            str: The licence status.
+        """
         params = self._merge_query_parameters(
             self._filter_by_short_term_rental_business(),
             self._filter_by_licence_number(licence_number),
             self._get_latest_licence_status(),
         )
-        response_data = self._make_request(params)
+        started_at = time.perf_counter()
+        try:
+            response_data = self._make_request(params)
+        except Exception:
+            BUSINESS_LICENCE_LATENCY.labels('error').observe(time.perf_counter() - started_at)
+            raise
+        BUSINESS_LICENCE_LATENCY.labels('ok').observe(time.perf_counter() - started_at)
 
         return self._process_licence_status_results(response_data)
\ No newline at end of file
@@ -0,0 +1,341 @@
+import bisect
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class TransportConfig:
+    """
+    Configuration of a ResilientTransport.
+
+    Attributes:
+        pool_connections (int): Number of connection pools to cache, one per host.
+        pool_maxsize (int): Maximum number of connections kept open per host.
+        connect_timeout (float): Seconds to wait for the connection to be established.
+        read_timeout (float): Seconds to wait for the server to send a response.
+        max_retries (int): Number of retries after the first attempt.
+        backoff_base (float): Base delay in seconds of the exponential backoff.
+        backoff_max (float): Maximum delay in seconds between two attempts, including `Retry-After`.
+        retry_statuses (tuple): HTTP statuses that are retried.
+        rate_limit_per_second (float): Requests allowed per second, 0 disables the rate limiter.
+        rate_limit_burst (int): Number of requests that can be sent at once before the rate applies.
+    """
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    max_retries: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_statuses: tuple = (429, 500, 502, 503, 504)
+    rate_limit_per_second: float = 5.0
+    rate_limit_burst: int = 10
+
+    @classmethod
+    def from_settings(cls, setting_name: str = 'BUSINESS_LICENCE_TRANSPORT') -> "TransportConfig":
+        """
+        Build a config from a Django setting holding upper-cased field names.
+
+        Args:
+            setting_name (str): Name of the Django setting.
+
+        Returns:
+            TransportConfig: The config, with defaults for the missing keys.
+        """
+        config = getattr(settings, setting_name, {})
+        values = {field.name: config[field.name.upper()] for field in fields(cls) if field.name.upper() in config}
+        if 'retry_statuses' in values:
+            values['retry_statuses'] = tuple(values['retry_statuses'])
+        return cls(**values)
+
+
+class TokenBucket:
+    """
+    Client-side token bucket rate limiter shared by the threads of a process.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Initialize the TokenBucket full.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (int): Maximum number of tokens in the bucket.
+            clock (Callable[[], float]): Monotonic clock.
+            sleep (Callable[[float], None]): Function used to wait for a token.
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take a token, or compute how long to wait for the next one.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available.
+
+        Returns:
+            float: Seconds spent waiting for the token.
+        """
+        waited = 0.0
+        delay = self._reserve()
+        while delay > 0:
+            self._sleep(delay)
+            waited += delay
+            delay = self._reserve()
+        return waited
+
+
+class RequestMetrics:
+    """
+    Thread-safe counters and latency distribution of the requests sent by a transport.
+    """
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, window: int = 1000) -> None:
+        """
+        Initialize the RequestMetrics.
+
+        Args:
+            window (int): Number of recent latencies kept to compute percentiles.
+        """
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self._bucket_counts = [0] * (len(self.LATENCY_BUCKETS) + 1)
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.latency_sum = 0.0
+        self.rate_limit_wait = 0.0
+
+    def observe(self, latency: float, status: int = None) -> None:
+        """
+        Record an attempt.
+
+        Args:
+            latency (float): Seconds the attempt took.
+            status (int, optional): HTTP status of the response, None if the request failed.
+        """
+        with self._lock:
+            self.requests += 1
+            self.latency_sum += latency
+            self._recent.append(latency)
+            self._bucket_counts[bisect.bisect_left(self.LATENCY_BUCKETS, latency)] += 1
+            if status is None or status >= 500:
+                self.errors += 1
+            if status == 429:
+                self.throttled += 1
+
+    def record_retry(self) -> None:
+        """
+        Record that an attempt is retried.
+        """
+        with self._lock:
+            self.retries += 1
+
+    def record_rate_limit_wait(self, seconds: float) -> None:
+        """
+        Record the time spent waiting for the rate limiter.
+
+        Args:
+            seconds (float): Seconds waited.
+        """
+        with self._lock:
+            self.rate_limit_wait += seconds
+
+    def snapshot(self) -> dict:
+        """
+        Get the current metrics.
+
+        Returns:
+            dict: Counters, latency percentiles over the recent window and cumulative latency buckets.
+        """
+        with self._lock:
+            recent = sorted(self._recent)
+            bucket_counts = list(self._bucket_counts)
+            snapshot = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'rate_limit_wait_seconds': round(self.rate_limit_wait, 4),
+                'latency_seconds_sum': round(self.latency_sum, 4),
+            }
+
+        def percentile(fraction):
+            return round(recent[min(int(fraction * len(recent)), len(recent) - 1)], 4) if recent else 0.0
+
+        snapshot['latency_seconds_mean'] = round(snapshot['latency_seconds_sum'] / snapshot['requests'], 4) \
+            if snapshot['requests'] else 0.0
+        snapshot['latency_seconds_p50'] = percentile(0.5)
+        snapshot['latency_seconds_p95'] = percentile(0.95)
+        snapshot['latency_seconds_max'] = round(recent[-1], 4) if recent else 0.0
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.LATENCY_BUCKETS + (float('inf'),), bucket_counts):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        snapshot['latency_seconds_buckets'] = buckets
+        return snapshot
+
+
+class ResilientTransport:
+    """
+    HTTP transport with connection pooling, per-request timeouts, rate limiting and retries.
+
+    Retries use exponential backoff with full jitter and honour the `Retry-After` header
+    of 429 and 503 responses.
+    """
+
+    def __init__(self, config: TransportConfig = None, session: requests.Session = None,
+                 sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.monotonic,
+                 rng: Callable[[], float] = random.random) -> None:
+        """
+        Initialize the ResilientTransport.
+
+        Args:
+            config (TransportConfig, optional): The transport configuration.
+            session (requests.Session, optional): The session used to send requests.
+            sleep (Callable[[float], None]): Function used to wait between attempts.
+            clock (Callable[[], float]): Monotonic clock used to measure latency.
+            rng (Callable[[], float]): Random number generator in [0, 1) used for the jitter.
+        """
+        self.config = config or TransportConfig()
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.config.pool_connections,
+                              pool_maxsize=self.config.pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.metrics = RequestMetrics()
+        self.rate_limiter = TokenBucket(self.config.rate_limit_per_second, self.config.rate_limit_burst,
+                                        clock=clock, sleep=sleep) \
+            if self.config.rate_limit_per_second > 0 else None
+        self._sleep = sleep
+        self._clock = clock
+        self._rng = rng
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request, retrying connection errors, timeouts and retryable statuses.
+
+        Args:
+            url (str): The URL to request.
+            **kwargs: Additional arguments passed to `requests.Session.get`.
+
+        Returns:
+            requests.Response: The last response received.
+
+        Raises:
+            requests.ConnectionError: If the connection still fails after the last retry.
+            requests.Timeout: If the request still times out after the last retry.
+        """
+        kwargs.setdefault('timeout', (self.config.connect_timeout, self.config.read_timeout))
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.metrics.record_rate_limit_wait(self.rate_limiter.acquire())
+            started_at = self._clock()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.observe(self._clock() - started_at)
+                if attempt >= self.config.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"Request to {url} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                self.metrics.observe(self._clock() - started_at, response.status_code)
+                if response.status_code not in self.config.retry_statuses or attempt >= self.config.max_retries:
+                    return response
+                retry_after = self._retry_after(response)
+                delay = min(retry_after, self.config.backoff_max) if retry_after is not None \
+                    else self._backoff(attempt)
+                logging.warning(f"Request to {url} returned {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            self.metrics.record_retry()
+            self._sleep(delay)
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """
+        Compute the delay before the next attempt using exponential backoff with full jitter.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 0.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        return self._rng() * min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float | None:
+        """
+        Parse the `Retry-After` header of a response, given in seconds or as an HTTP date.
+
+        Args:
+            response (requests.Response): The response to inspect.
+
+        Returns:
+            float | None: Seconds to wait, or None if the header is missing or invalid.
+        """
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - timezone.now()).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_business_licence_transport() -> ResilientTransport:
+    """
+    Get the Opendata transport of the current process, so every client shares its connection pool and rate limiter.
+
+    Returns:
+        ResilientTransport: The transport configured by the `BUSINESS_LICENCE_TRANSPORT` setting.
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = ResilientTransport(TransportConfig.from_settings())
+        return _default_transport
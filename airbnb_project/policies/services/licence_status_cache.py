@@ -0,0 +1,276 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+
+from airbnb_project.metrics import LICENCE_STATUS_CACHE_LOOKUPS
+
+
+class _InFlightLookup:
+    """
+    A licence status lookup that is currently being fetched by one thread.
+
+    Other threads asking for the same licence number wait on `done` and reuse
+    the result instead of calling Opendata again.
+    """
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.status = None
+        self.error = None
+
+
+class LicenceStatusCache:
+    """
+    Two-tier cache in front of `BusinessLicenceClient.get_licence_status`.
+
+    The first tier is an in-process LRU, the second tier is a Django cache shared by all
+    workers (Redis in production). Statuses found in Opendata and "No results found" are
+    kept for separate TTLs, error statuses are never cached. Concurrent lookups of the same
+    licence number within a process are collapsed into a single request.
+    """
+    NEGATIVE_STATUS = "No results found"
+    UNCACHEABLE_STATUSES = {"Status not found", "Error processing data"}
+    KEY_PREFIX = "licence_status"
+
+    def __init__(self, shared_cache=None, local_max_size: int = 10000, positive_ttl: int = 86400,
+                 negative_ttl: int = 3600, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the LicenceStatusCache.
+
+        Args:
+            shared_cache: A Django cache shared across workers, or None to only cache in process.
+            local_max_size (int): Maximum number of licence numbers kept in the in-process LRU.
+            positive_ttl (int): Seconds to keep a status found in Opendata.
+            negative_ttl (int): Seconds to keep a "No results found" status.
+            clock (Callable[[], float]): Monotonic clock used for the in-process expiry.
+        """
+        self.shared_cache = shared_cache
+        self.local_max_size = local_max_size
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._local = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._counters = {"local_hits": 0, "shared_hits": 0, "misses": 0, "coalesced": 0}
+
+    @classmethod
+    def from_settings(cls) -> "LicenceStatusCache":
+        """
+        Build a cache configured by the `LICENCE_STATUS_CACHE` Django setting.
+
+        Returns:
+            LicenceStatusCache: The configured cache.
+        """
+        config = getattr(settings, "LICENCE_STATUS_CACHE", {})
+        alias = config.get("ALIAS")
+        return cls(
+            shared_cache=caches[alias] if alias else None,
+            local_max_size=config.get("LOCAL_MAX_SIZE", 10000),
+            positive_ttl=config.get("POSITIVE_TTL", 86400),
+            negative_ttl=config.get("NEGATIVE_TTL", 3600),
+        )
+
+    def get_or_fetch(self, licence_number: str, fetch: Callable[[str], str]) -> str:
+        """
+        Get the status of a licence number from the cache, fetching it on a miss.
+
+        Args:
+            licence_number (str): The licence number to look up.
+            fetch (Callable[[str], str]): Called with the licence number to get the status on a miss.
+
+        Returns:
+            str: The licence status.
+        """
+        key = f"{self.KEY_PREFIX}:{licence_number}"
+        with self._lock:
+            status = self._get_local(key)
+            if status is not None:
+                self._count("local_hits")
+                return status
+            lookup = self._in_flight.get(key)
+            is_leader = lookup is None
+            if is_leader:
+                lookup = self._in_flight[key] = _InFlightLookup()
+            else:
+                self._count("coalesced")
+
+        if not is_leader:
+            lookup.done.wait()
+            if lookup.error is not None:
+                raise lookup.error
+            return lookup.status
+
+        try:
+            lookup.status = self._get_shared_or_fetch(key, licence_number, fetch)
+            return lookup.status
+        except Exception as e:
+            lookup.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            lookup.done.set()
+
+    def _get_shared_or_fetch(self, key: str, licence_number: str, fetch: Callable[[str], str]) -> str:
+        """
+        Look up the shared tier, then Opendata, and fill the cache tiers with the result.
+
+        Args:
+            key (str): The cache key of the licence number.
+            licence_number (str): The licence number to look up.
+            fetch (Callable[[str], str]): Called with the licence number to get the status on a miss.
+
+        Returns:
+            str: The licence status.
+        """
+        status = self._get_shared(key)
+        if status is not None:
+            with self._lock:
+                self._count("shared_hits")
+                self._set_local(key, status)
+            return status
+
+        status = fetch(licence_number)
+        with self._lock:
+            self._count("misses")
+            if self._ttl_for(status):
+                self._set_local(key, status)
+        if self._ttl_for(status):
+            self._set_shared(key, status)
+        return status
+
+    def _count(self, result: str) -> None:
+        """
+        Count a lookup in the counters of the cache and its Prometheus metric. Called with the lock held.
+
+        Args:
+            result (str): 'local_hits', 'shared_hits', 'misses' or 'coalesced'.
+        """
+        self._counters[result] += 1
+        LICENCE_STATUS_CACHE_LOOKUPS.labels(result).inc()
+
+    def _ttl_for(self, status: str) -> int:
+        """
+        Get the TTL of a status.
+
+        Args:
+            status (str): The licence status.
+
+        Returns:
+            int: The TTL in seconds, 0 if the status must not be cached.
+        """
+        if not status or status in self.UNCACHEABLE_STATUSES:
+            return 0
+        return self.negative_ttl if status == self.NEGATIVE_STATUS else self.positive_ttl
+
+    def _get_local(self, key: str) -> str | None:
+        """
+        Get a status from the in-process LRU. Must be called with the lock held.
+
+        Args:
+            key (str): The cache key of the licence number.
+
+        Returns:
+            str | None: The cached status, or None if it is missing or expired.
+        """
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        status, expires_at = entry
+        if expires_at <= self._clock():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return status
+
+    def _set_local(self, key: str, status: str) -> None:
+        """
+        Put a status in the in-process LRU, evicting the least recently used entries. Must be called with the lock held.
+
+        Args:
+            key (str): The cache key of the licence number.
+            status (str): The licence status.
+        """
+        self._local[key] = (status, self._clock() + self._ttl_for(status))
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_max_size:
+            self._local.popitem(last=False)
+
+    def _get_shared(self, key: str) -> str | None:
+        """
+        Get a status from the shared tier. Errors of the shared cache are logged and treated as a miss.
+
+        Args:
+            key (str): The cache key of the licence number.
+
+        Returns:
+            str | None: The cached status, or None on a miss.
+        """
+        if self.shared_cache is None:
+            return None
+        try:
+            return self.shared_cache.get(key)
+        except Exception as e:
+            logging.warning(f"Shared licence status cache unavailable: {e}")
+            return None
+
+    def _set_shared(self, key: str, status: str) -> None:
+        """
+        Put a status in the shared tier. Errors of the shared cache are logged and ignored.
+
+        Args:
+            key (str): The cache key of the licence number.
+            status (str): The licence status.
+        """
+        if self.shared_cache is None:
+            return
+        try:
+            self.shared_cache.set(key, status, timeout=self._ttl_for(status))
+        except Exception as e:
+            logging.warning(f"Shared licence status cache unavailable: {e}")
+
+    def clear_local(self) -> None:
+        """
+        Empty the in-process LRU.
+        """
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> dict:
+        """
+        Get the hit and miss counters of the cache.
+
+        Returns:
+            dict: local_hits, shared_hits, misses, coalesced lookups, hit_ratio and local_size.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            counters["local_size"] = len(self._local)
+        lookups = counters["local_hits"] + counters["shared_hits"] + counters["misses"]
+        hits = counters["local_hits"] + counters["shared_hits"]
+        counters["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return counters
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_licence_status_cache() -> LicenceStatusCache:
+    """
+    Get the licence status cache of the current process, so the in-process tier is shared by every client.
+
+    Returns:
+        LicenceStatusCache: The cache configured from the Django settings.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LicenceStatusCache.from_settings()
+        return _default_cache
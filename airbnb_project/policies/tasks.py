@@ -0,0 +1,178 @@
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from airbnb_project.metrics import DB_BATCH_WRITE_LATENCY, POLICY_EVALUATIONS, export_metrics
+from listings.listing_models import Listing
+from policies.models import ListingPolicyResult, PolicyEvaluationJob
+from policies.services.business_licence_client import BusinessLicenceClient
+from policies.services.http_transport import get_business_licence_transport
+from policies.services.licence_status_cache import get_licence_status_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _save_results(results: list) -> tuple[int, int, str]:
+    """
+    Save a batch of policy results, falling back to row-by-row saves if the batch insert fails.
+
+    Args:
+        results (list): The ListingPolicyResult objects to save.
+
+    Returns:
+        tuple[int, int, str]: The number of saved results, the number of failed results
+        and the last error message (empty if there was none).
+    """
+    if not results:
+        return 0, 0, ""
+    try:
+        with DB_BATCH_WRITE_LATENCY.labels('policy_results').time():
+            ListingPolicyResult.objects.bulk_create(results)
+        return len(results), 0, ""
+    except Exception as e:
+        logger.warning(f"Batch insert of {len(results)} policy results failed, saving one by one: {e}")
+
+    saved, failed, last_error = 0, 0, ""
+    for result in results:
+        try:
+            result.save()
+            saved += 1
+        except Exception as e:
+            failed += 1
+            last_error = f"Listing {result.listing.airbnb_listing_id} not saved to Policy DB: {e}"
+            logger.error(last_error)
+    return saved, failed, last_error
+
+
+def _record_progress(job_id: int, saved: int, failed: int, last_error: str) -> None:
+    """
+    Add the outcome of a batch to the job counters.
+
+    The counters are incremented in the database so that the status endpoint sees the
+    progress while the evaluation is still running.
+
+    Args:
+        job_id (int): The id of the PolicyEvaluationJob.
+        saved (int): Number of results saved in the batch.
+        failed (int): Number of listings that failed in the batch.
+        last_error (str): The last error of the batch, if any.
+    """
+    updates = {
+        'processed': F('processed') + saved + failed,
+        'succeeded': F('succeeded') + saved,
+        'failed': F('failed') + failed,
+    }
+    if last_error:
+        updates['last_error'] = last_error
+    PolicyEvaluationJob.objects.filter(pk=job_id).update(**updates)
+
+
+def evaluate_listings(job: PolicyEvaluationJob, client: BusinessLicenceClient = None) -> None:
+    """
+    Evaluate the licence status of every listing scrapped on the job's date.
+
+    The listings already evaluated by an earlier job of the date are skipped, e.g. when the
+    dead letters of the day are retried after the harvest.
+
+    Listings are streamed from the database with `.iterator(chunk_size=...)` and the
+    results are written in batches of `POLICY_EVALUATION_BATCH_SIZE`, so memory use stays
+    flat regardless of how many listings were scrapped that day.
+
+    Args:
+        job (PolicyEvaluationJob): The job to run.
+        client (BusinessLicenceClient, optional): The client used to look up licence statuses.
+            Defaults to a client backed by the process-wide licence status cache.
+    """
+    client = client or BusinessLicenceClient(cache=get_licence_status_cache())
+    chunk_size = settings.POLICY_EVALUATION_CHUNK_SIZE
+    batch_size = settings.POLICY_EVALUATION_BATCH_SIZE
+
+    listings = (Listing.objects.filter(scrapped_at=job.scrapped_at)
+                .exclude(Exists(ListingPolicyResult.objects.filter(listing=OuterRef('pk'))))
+                .only('id', 'airbnb_listing_id', 'registration_number')
+                .order_by('id'))
+    PolicyEvaluationJob.objects.filter(pk=job.pk).update(
+        status=PolicyEvaluationJob.STATUS_RUNNING,
+        started_at=timezone.now(),
+        total=listings.count(),
+    )
+
+    batch = []
+    failed = 0
+    last_error = ""
+    for listing in listings.iterator(chunk_size=chunk_size):
+        business_licences_number = listing.registration_number
+        try:
+            status = client.get_licence_status(business_licences_number)
+        except Exception as e:
+            failed += 1
+            last_error = f"Listing {listing.airbnb_listing_id} could not be evaluated: {e}"
+            logger.error(last_error)
+            POLICY_EVALUATIONS.labels('failed').inc()
+        else:
+            POLICY_EVALUATIONS.labels('evaluated').inc()
+            batch.append(ListingPolicyResult(
+                listing=listing,
+                policy_result=status.lower() == 'issued',
+                result_details=business_licences_number or ""))
+
+        if len(batch) + failed >= batch_size:
+            saved, batch_failed, batch_error = _save_results(batch)
+            _record_progress(job.pk, saved, failed + batch_failed, batch_error or last_error)
+            batch, failed, last_error = [], 0, ""
+
+    saved, batch_failed, batch_error = _save_results(batch)
+    _record_progress(job.pk, saved, failed + batch_failed, batch_error or last_error)
+
+
+@shared_task(bind=True, ignore_result=True)
+def evaluate_policies_task(self, job_id: int):
+    """
+    Celery task to evaluate the listings of a PolicyEvaluationJob.
+
+    Args:
+        self: Reference to the current Celery task instance.
+        job_id (int): The id of the PolicyEvaluationJob to run.
+
+    Returns:
+        None
+    """
+    try:
+        job = PolicyEvaluationJob.objects.get(pk=job_id)
+    except PolicyEvaluationJob.DoesNotExist:
+        logger.error(f"Policy evaluation job {job_id} does not exist")
+        return
+
+    try:
+        evaluate_listings(job)
+        PolicyEvaluationJob.objects.filter(pk=job_id).update(
+            status=PolicyEvaluationJob.STATUS_SUCCEEDED, finished_at=timezone.now())
+        job.refresh_from_db()
+        logger.info(f"Policy evaluation finished: {job.succeeded} listings evaluated successfully, "
+                    f"failed: {job.failed}, throughput: {job.throughput}/s, "
+                    f"licence status cache: {get_licence_status_cache().stats()}, "
+                    f"Opendata requests: {get_business_licence_transport().metrics.snapshot()}")
+    except Exception as e:
+        logger.error(f"Error in policy evaluation job {job_id}: {e}")
+        PolicyEvaluationJob.objects.filter(pk=job_id).update(
+            status=PolicyEvaluationJob.STATUS_FAILED, finished_at=timezone.now(), last_error=str(e))
+    finally:
+        export_metrics('policies')
+
+
+def enqueue_policy_evaluation(scrapped_at) -> PolicyEvaluationJob:
+    """
+    Create a PolicyEvaluationJob of the listings scrapped on a date and enqueue its evaluation.
+
+    Args:
+        scrapped_at (date): The scrapping date of the listings to evaluate.
+
+    Returns:
+        PolicyEvaluationJob: The pending job.
+    """
+    job = PolicyEvaluationJob.objects.create(scrapped_at=scrapped_at)
+    result = evaluate_policies_task.delay(job.pk)
+    job.celery_task_id = result.id or ""
+    PolicyEvaluationJob.objects.filter(pk=job.pk).update(celery_task_id=job.celery_task_id)
+    return job
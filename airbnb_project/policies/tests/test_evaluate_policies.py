@@ -0,0 +1,101 @@
+import datetime
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from unittest.mock import MagicMock, patch
+from listings.listing_models import Listing
+from policies.models import ListingPolicyResult, PolicyEvaluationJob
+from policies.tasks import evaluate_listings, evaluate_policies_task
+
+
+class EvaluatePoliciesViewTest(TestCase):
+  def setUp(self):
+    self.url = reverse('evaluate_policies')
+
+  def test_missing_scrapped_at(self):
+    response = self.client.get(self.url)
+    self.assertIn(b"scrapped_at", response.content)
+    self.assertEqual(PolicyEvaluationJob.objects.count(), 0)
+
+  def test_invalid_scrapped_at(self):
+    response = self.client.get(self.url, {'scrapped_at': '2024-13-45'})
+    self.assertEqual(response.status_code, 400)
+    self.assertEqual(PolicyEvaluationJob.objects.count(), 0)
+
+  @patch('policies.tasks.evaluate_policies_task.delay')
+  def test_enqueues_job(self, mock_delay):
+    mock_delay.return_value = MagicMock(id='task-id')
+    response = self.client.get(self.url, {'scrapped_at': '2024-10-01'})
+
+    self.assertEqual(response.status_code, 202)
+    job = PolicyEvaluationJob.objects.get()
+    mock_delay.assert_called_once_with(job.pk)
+    self.assertEqual(response.json()['job_id'], job.pk)
+    self.assertEqual(response.json()['status_url'], reverse('evaluation_status', args=[job.pk]))
+    self.assertEqual(job.celery_task_id, 'task-id')
+    self.assertEqual(job.scrapped_at, datetime.date(2024, 10, 1))
+
+  def test_status(self):
+    job = PolicyEvaluationJob.objects.create(
+      scrapped_at=datetime.date(2024, 10, 1), total=4, processed=2, succeeded=1, failed=1)
+    response = self.client.get(reverse('evaluation_status', args=[job.pk]))
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response.json()['progress'], 0.5)
+    self.assertEqual(response.json()['failed'], 1)
+
+  def test_status_not_found(self):
+    response = self.client.get(reverse('evaluation_status', args=[999]))
+    self.assertEqual(response.status_code, 404)
+
+
+@override_settings(POLICY_EVALUATION_CHUNK_SIZE=2, POLICY_EVALUATION_BATCH_SIZE=2)
+class EvaluateListingsTest(TestCase):
+  def setUp(self):
+    self.scrapped_at = datetime.date(2024, 10, 1)
+    for listing_id, registration_number in [('1', '24-000001'), ('2', '24-000002'), ('3', '24-000003')]:
+      Listing.objects.create(
+        airbnb_listing_id=listing_id, registration_number=registration_number, scrapped_at=self.scrapped_at)
+    Listing.objects.create(airbnb_listing_id='4', registration_number='24-000004',
+                           scrapped_at=datetime.date(2024, 9, 30))
+    self.job = PolicyEvaluationJob.objects.create(scrapped_at=self.scrapped_at)
+
+  def test_evaluate_listings(self):
+    statuses = {'24-000001': 'Issued', '24-000002': 'Cancelled'}
+    client = MagicMock()
+    client.get_licence_status.side_effect = lambda number: statuses[number]
+
+    evaluate_listings(self.job, client=client)
+
+    self.job.refresh_from_db()
+    self.assertEqual(self.job.status, PolicyEvaluationJob.STATUS_RUNNING)
+    self.assertEqual(self.job.total, 3)
+    self.assertEqual(self.job.processed, 3)
+    self.assertEqual(self.job.succeeded, 2)
+    self.assertEqual(self.job.failed, 1)
+    self.assertIn('24-000003', self.job.last_error)
+    results = {result.listing.airbnb_listing_id: result.policy_result for result in ListingPolicyResult.objects.all()}
+    self.assertEqual(results, {'1': True, '2': False})
+
+  def test_listings_evaluated_already_skipped(self):
+    ListingPolicyResult.objects.create(listing=Listing.objects.get(airbnb_listing_id='1'), policy_result=True)
+    client = MagicMock()
+    client.get_licence_status.return_value = 'Issued'
+
+    evaluate_listings(self.job, client=client)
+
+    self.job.refresh_from_db()
+    self.assertEqual(self.job.total, 2)
+    self.assertEqual(ListingPolicyResult.objects.filter(listing__airbnb_listing_id='1').count(), 1)
+    self.assertEqual(ListingPolicyResult.objects.count(), 3)
+
+  @patch('policies.tasks.BusinessLicenceClient')
+  def test_task_marks_job_succeeded(self, mock_client_class):
+    mock_client_class.return_value.get_licence_status.return_value = 'Issued'
+
+    evaluate_policies_task(self.job.pk)
+
+    self.job.refresh_from_db()
+    self.assertEqual(self.job.status, PolicyEvaluationJob.STATUS_SUCCEEDED)
+    self.assertEqual(self.job.succeeded, 3)
+    self.assertIsNotNone(self.job.finished_at)
+    self.assertEqual(ListingPolicyResult.objects.count(), 3)
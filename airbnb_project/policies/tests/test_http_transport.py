@@ -0,0 +1,131 @@
+import requests
+from django.test import TestCase, override_settings
+from unittest.mock import MagicMock
+from policies.services.business_licence_client import BusinessLicenceClient
+from policies.services.http_transport import ResilientTransport, TokenBucket, TransportConfig
+
+
+def make_response(status_code, headers=None, json_data=None):
+  response = MagicMock(spec=requests.Response)
+  response.status_code = status_code
+  response.headers = headers or {}
+  response.json.return_value = json_data
+  if status_code >= 400:
+    response.raise_for_status.side_effect = requests.HTTPError(f"{status_code} error")
+  return response
+
+
+class FakeClock:
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+  def sleep(self, seconds):
+    self.now += seconds
+
+
+class ResilientTransportTest(TestCase):
+  def setUp(self):
+    self.session = MagicMock()
+    self.clock = FakeClock()
+    self.sleeps = []
+    self.config = TransportConfig(max_retries=3, backoff_base=1, backoff_max=30, rate_limit_per_second=0)
+
+  def make_transport(self, config=None):
+    def sleep(seconds):
+      self.sleeps.append(seconds)
+      self.clock.sleep(seconds)
+    return ResilientTransport(config or self.config, session=self.session, sleep=sleep, clock=self.clock,
+                              rng=lambda: 0.5)
+
+  def test_sets_timeout(self):
+    self.session.get.return_value = make_response(200)
+    self.make_transport().get("https://example.com")
+    self.session.get.assert_called_once_with("https://example.com", timeout=(3.05, 10.0))
+
+  def test_retries_with_jittered_backoff(self):
+    self.session.get.side_effect = [make_response(503), make_response(502), make_response(200)]
+    transport = self.make_transport()
+
+    response = transport.get("https://example.com")
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(self.sleeps, [0.5, 1.0])
+    self.assertEqual(transport.metrics.snapshot()['retries'], 2)
+    self.assertEqual(transport.metrics.snapshot()['errors'], 2)
+
+  def test_honours_retry_after(self):
+    self.session.get.side_effect = [make_response(429, headers={'Retry-After': '7'}), make_response(200)]
+    transport = self.make_transport()
+
+    transport.get("https://example.com")
+
+    self.assertEqual(self.sleeps, [7.0])
+    self.assertEqual(transport.metrics.snapshot()['throttled'], 1)
+
+  def test_retries_connection_errors(self):
+    self.session.get.side_effect = [requests.ConnectionError("reset"), make_response(200)]
+    self.assertEqual(self.make_transport().get("https://example.com").status_code, 200)
+
+  def test_gives_up_after_max_retries(self):
+    self.session.get.side_effect = requests.Timeout("slow")
+    with self.assertRaises(requests.Timeout):
+      self.make_transport().get("https://example.com")
+    self.assertEqual(self.session.get.call_count, 4)
+
+  def test_returns_last_response_after_max_retries(self):
+    self.session.get.return_value = make_response(429)
+    self.assertEqual(self.make_transport().get("https://example.com").status_code, 429)
+    self.assertEqual(self.session.get.call_count, 4)
+
+  def test_latency_metrics(self):
+    def slow_get(url, **kwargs):
+      self.clock.now += 0.2
+      return make_response(200)
+    self.session.get.side_effect = slow_get
+    transport = self.make_transport()
+
+    transport.get("https://example.com")
+    snapshot = transport.metrics.snapshot()
+
+    self.assertEqual(snapshot['requests'], 1)
+    self.assertAlmostEqual(snapshot['latency_seconds_p95'], 0.2)
+    self.assertEqual(snapshot['latency_seconds_buckets']['0.1'], 0)
+    self.assertEqual(snapshot['latency_seconds_buckets']['0.25'], 1)
+
+  @override_settings(BUSINESS_LICENCE_TRANSPORT={'MAX_RETRIES': 1, 'POOL_MAXSIZE': 20})
+  def test_config_from_settings(self):
+    config = TransportConfig.from_settings()
+    self.assertEqual(config.max_retries, 1)
+    self.assertEqual(config.pool_maxsize, 20)
+    self.assertEqual(config.read_timeout, 10.0)
+
+
+class TokenBucketTest(TestCase):
+  def test_rate_limits_after_burst(self):
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    self.assertEqual(bucket.acquire(), 0)
+    self.assertEqual(bucket.acquire(), 0)
+    self.assertAlmostEqual(bucket.acquire(), 0.5)
+    self.assertAlmostEqual(clock.now, 0.5)
+
+
+class BusinessLicenceClientErrorTest(TestCase):
+  def test_http_error_is_raised(self):
+    transport = MagicMock()
+    transport.get.return_value = make_response(500)
+    client = BusinessLicenceClient(transport=transport)
+
+    with self.assertRaises(requests.HTTPError):
+      client.get_licence_status("24-000001")
+
+  def test_status_from_transport(self):
+    transport = MagicMock()
+    transport.get.return_value = make_response(200, json_data={'results': [{'status': 'Issued'}]})
+    client = BusinessLicenceClient(transport=transport)
+
+    self.assertEqual(client.get_licence_status("24-000001"), "Issued")
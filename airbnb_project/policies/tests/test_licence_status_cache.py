@@ -0,0 +1,118 @@
+import threading
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from unittest.mock import MagicMock, patch
+from policies.services.business_licence_client import BusinessLicenceClient
+from policies.services.licence_status_cache import LicenceStatusCache
+
+
+class FakeClock:
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+class LicenceStatusCacheTest(TestCase):
+  def setUp(self):
+    self.shared_cache = LocMemCache('licence-status-test', {})
+    self.shared_cache.clear()
+    self.clock = FakeClock()
+    self.cache = LicenceStatusCache(
+      shared_cache=self.shared_cache, local_max_size=2, positive_ttl=100, negative_ttl=10, clock=self.clock)
+
+  def test_local_hit(self):
+    fetch = MagicMock(return_value="Issued")
+    self.assertEqual(self.cache.get_or_fetch("24-000001", fetch), "Issued")
+    self.assertEqual(self.cache.get_or_fetch("24-000001", fetch), "Issued")
+
+    fetch.assert_called_once_with("24-000001")
+    self.assertEqual(self.cache.stats()["local_hits"], 1)
+    self.assertEqual(self.cache.stats()["misses"], 1)
+
+  def test_shared_hit_across_workers(self):
+    other_worker = LicenceStatusCache(shared_cache=self.shared_cache)
+    other_worker.get_or_fetch("24-000001", MagicMock(return_value="Cancelled"))
+
+    fetch = MagicMock()
+    self.assertEqual(self.cache.get_or_fetch("24-000001", fetch), "Cancelled")
+    fetch.assert_not_called()
+    self.assertEqual(self.cache.stats()["shared_hits"], 1)
+
+  def test_separate_ttl_for_no_results(self):
+    shared_cache = MagicMock()
+    shared_cache.get.return_value = None
+    cache = LicenceStatusCache(shared_cache=shared_cache, positive_ttl=100, negative_ttl=10, clock=self.clock)
+
+    cache.get_or_fetch("24-000001", MagicMock(return_value="Issued"))
+    cache.get_or_fetch("24-100000", MagicMock(return_value="No results found"))
+
+    shared_cache.set.assert_any_call("licence_status:24-000001", "Issued", timeout=100)
+    shared_cache.set.assert_any_call("licence_status:24-100000", "No results found", timeout=10)
+
+    self.clock.now = 11
+    fetch = MagicMock(return_value="Issued")
+    cache.get_or_fetch("24-000001", fetch)
+    cache.get_or_fetch("24-100000", fetch)
+    fetch.assert_called_once_with("24-100000")
+
+  def test_errors_are_not_cached(self):
+    fetch = MagicMock(return_value="Error processing data")
+    self.cache.get_or_fetch("24-000001", fetch)
+    self.cache.get_or_fetch("24-000001", fetch)
+
+    self.assertEqual(fetch.call_count, 2)
+    self.assertIsNone(self.shared_cache.get("licence_status:24-000001"))
+
+  def test_lru_eviction(self):
+    for number in ["24-000001", "24-000002", "24-000003"]:
+      self.cache.get_or_fetch(number, MagicMock(return_value="Issued"))
+
+    self.assertEqual(self.cache.stats()["local_size"], 2)
+
+  def test_shared_cache_unavailable(self):
+    shared_cache = MagicMock()
+    shared_cache.get.side_effect = ConnectionError("redis is down")
+    shared_cache.set.side_effect = ConnectionError("redis is down")
+    cache = LicenceStatusCache(shared_cache=shared_cache)
+
+    self.assertEqual(cache.get_or_fetch("24-000001", MagicMock(return_value="Issued")), "Issued")
+
+  def test_single_flight(self):
+    release = threading.Event()
+    calls = []
+
+    def fetch(licence_number):
+      calls.append(licence_number)
+      release.wait(5)
+      return "Pending"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(self.cache.get_or_fetch("24-000001", fetch)))
+               for _ in range(5)]
+    for thread in threads:
+      thread.start()
+    while self.cache.stats()["coalesced"] < 4:
+      threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(calls, ["24-000001"])
+    self.assertEqual(results, ["Pending"] * 5)
+
+  def test_single_flight_propagates_errors(self):
+    cache = LicenceStatusCache()
+    with self.assertRaises(ValueError):
+      cache.get_or_fetch("24-000001", MagicMock(side_effect=ValueError("boom")))
+    self.assertEqual(cache.get_or_fetch("24-000001", MagicMock(return_value="Issued")), "Issued")
+
+
+class CachedBusinessLicenceClientTest(TestCase):
+  @patch.object(BusinessLicenceClient, '_fetch_licence_status', return_value="Issued")
+  def test_client_uses_cache(self, mock_fetch):
+    client = BusinessLicenceClient(cache=LicenceStatusCache())
+    self.assertEqual(client.get_licence_status("24-000001"), "Issued")
+    self.assertEqual(client.get_licence_status("24-000001"), "Issued")
+    mock_fetch.assert_called_once_with("24-000001")
@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path("evaluate-policies/", views.evaluate_policies, name="evaluate_policies"),
+    path("evaluate-policies/<int:job_id>/", views.evaluation_status, name="evaluation_status"),
 ]
@@ -1,11 +1,10 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_http_methods
 import logging
-import datetime
-from listings.listing_models import Listing
-from policies.services.business_licence_client import BusinessLicenceClient
-import json
-from policies.models import ListingPolicyResult
+from policies.models import PolicyEvaluationJob
+from policies.tasks import enqueue_policy_evaluation
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
@@ -14,37 +13,40 @@ logger = logging.getLogger(__name__)
 @require_http_methods(["GET"])
 def evaluate_policies(request):
     """
-       Django view to initiate the policy evaluation
+       Django view to enqueue the policy evaluation as a Celery task.
+
+       Returns the id of the created job straight away; the progress of the job
+       is reported by the `evaluation_status` view.
        """
+    if not request.GET.get('scrapped_at', None):
+        return HttpResponse("Please provide query param `scrapped_at`in YYYY-MM-DD format")
+    try:
+        scrapped_at = parse_date(request.GET['scrapped_at'])
+    except ValueError:
+        scrapped_at = None
+    if scrapped_at is None:
+        return HttpResponse("Please provide query param `scrapped_at`in YYYY-MM-DD format", status=400)
+
     try:
-        logger.info("Evaluating Listings....")
-        unprocessed_items = []
-        success_counter = 0
-        if not request.GET.get('scrapped_at', None):
-            return HttpResponse("Please provide query param `scrapped_at`in YYYY-MM-DD format")
-        for listing in Listing.objects.filter(scrapped_at=request.GET['scrapped_at']):
-            logger.info(f'listing: {listing.airbnb_listing_id}')
-            business_licences_number = listing.registration_number
-            status = BusinessLicenceClient().get_licence_status(business_licences_number)
-            logger.info(f'evaluation status: {status}')
-            policy_evaluation_result = True if status.lower() == 'issued' else False
-            listing_policy_result = ListingPolicyResult(
-            listing=listing,
-            policy_result=policy_evaluation_result,
-            result_details=business_licences_number,
-            result_datetime=datetime.datetime.utcnow())
-            # Save the listing to the database
-            try:
-                logger.info('Trying to save in DB...')
-                listing_policy_result.save()
-                success_counter += 1
-                logger.info(f"{listing.airbnb_listing_id}: evaluated to {policy_evaluation_result} and was saved successfully in DB")
-            except Exception as e:
-                logger.error(f"Item Id: {listing.airbnb_listing_id} not saved to Policy DB, Full item: {listing_policy_result}, error: {e}")
-                unprocessed_items.append(listing_policy_result)
-        logger.error(f'All unprocessed Items: {unprocessed_items}')
-        return HttpResponse(f"Policy Evaluation Finished - \n Total {success_counter} listings evaluated successfully. Failed: {len(unprocessed_items)}", status=202)
+        job = enqueue_policy_evaluation(scrapped_at)
+        logger.info(f"Policy evaluation job {job.pk} for {scrapped_at} enqueued")
+        return JsonResponse({
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse('evaluation_status', args=[job.pk]),
+        }, status=202)
     except Exception as e:
         # Log any unexpected errors
         logger.error(f"Failed to start policy evaluation process: {str(e)}")
         return HttpResponse("Failed to start policy evaluation process", status=500)
+
+
+@require_http_methods(["GET"])
+def evaluation_status(request, job_id):
+    """
+       Django view reporting the progress, throughput and failures of a policy evaluation job.
+       """
+    job = PolicyEvaluationJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'error': f"Policy evaluation job {job_id} not found"}, status=404)
+    return JsonResponse(job.to_dict())